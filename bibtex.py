@@ -0,0 +1,222 @@
+"""
+BibTeX Import
+Streaming BibTeX parser for bulk publication import. The input is read in
+chunks and entries are yielded as soon as they are complete, so large
+bibliographies never need to be held in memory at once. Parsed entries are
+converted to plain-text publication records; LaTeX escaping happens later in
+the renderer like every other field.
+"""
+
+import itertools
+import re
+import unicodedata
+from typing import Dict, List, Any, Iterable, Iterator, Optional, TextIO, Tuple
+
+CHUNK_SIZE = 64 * 1024
+# Longest "@type{" header we wait for before treating an "@" as stray text
+MAX_HEADER_CHARS = 256
+
+ENTRY_START_RE = re.compile(r'@\s*([A-Za-z]+)\s*([{(])')
+PARTIAL_START_RE = re.compile(r'@\s*[A-Za-z]*\s*$')
+DELIMITER_RE = re.compile(r'[{}()]')
+FIELD_NAME_RE = re.compile(r'\s*([A-Za-z][\w\-:.]*)\s*=\s*')
+BARE_VALUE_RE = re.compile(r'\s*([\w\-:.]+)\s*')
+SEPARATOR_RE = re.compile(r'\s*(#|,|$)')
+
+MONTHS = {m: str(i) for i, m in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1)}
+
+# TeX accent commands and the combining characters they stand for
+ACCENTS = {'"': '\u0308', "'": '\u0301', '`': '\u0300', '^': '\u0302', '~': '\u0303',
+           '=': '\u0304', '.': '\u0307', 'c': '\u0327', 'v': '\u030c', 'u': '\u0306', 'H': '\u030b'}
+ACCENT_RE = re.compile(r'\\([\'"`^~=.]|[cvuH](?![A-Za-z]))\s*\{?\s*\\?([A-Za-z])\}?')
+SYMBOLS = {r'\LaTeX': 'LaTeX', r'\TeX': 'TeX', r'\&': '&', r'\%': '%', r'\$': '$', r'\_': '_', r'\#': '#',
+           r'\ss': 'ß', r'\o': 'ø', r'\O': 'Ø', r'\aa': 'å', r'\AA': 'Å', r'\ae': 'æ', r'\l': 'ł', r'\L': 'Ł',
+           '---': '—', '--': '–', '~': ' '}
+# Control words must not match the start of a longer one (\L in \LaTeX)
+SYMBOL_RE = re.compile('|'.join(re.escape(s) + (r'(?![A-Za-z])' if s[-1].isalpha() else '')
+                                for s in sorted(SYMBOLS, key=len, reverse=True)))
+COMMAND_RE = re.compile(r'\\[A-Za-z]+\s*')
+
+VENUE_FIELDS = ['journal', 'booktitle', 'school', 'institution', 'publisher', 'howpublished']
+
+
+class BibtexError(ValueError):
+    """An entry could not be parsed"""
+
+
+def read_chunks(stream: TextIO, size: int = CHUNK_SIZE) -> Iterator[str]:
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _find_close(text: str, pos: int, opener: str) -> int:
+    """Index of the delimiter closing an entry body that starts at pos, or -1"""
+    depth = 0
+    for match in DELIMITER_RE.finditer(text, pos):
+        char = match.group()
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            if depth == 0:
+                return match.start() if opener == '{' else -1
+            depth -= 1
+        elif char == ')' and opener == '(' and depth == 0:
+            return match.start()
+    return -1
+
+
+def iter_raw_entries(chunks: Iterable[str], errors: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+    """Yield (entry type, body) pairs as soon as each entry is complete"""
+    buffer = ''
+    # A trailing None marks the end of input, when unfinished entries are reported
+    for chunk in itertools.chain(chunks, [None]):
+        final = chunk is None
+        buffer += chunk or ''
+        while True:
+            start = buffer.find('@')
+            if start < 0:
+                buffer = ''
+                break
+            header = ENTRY_START_RE.match(buffer, start)
+            if header is None:
+                tail = buffer[start:start + MAX_HEADER_CHARS]
+                if not final and PARTIAL_START_RE.match(tail) and len(tail) < MAX_HEADER_CHARS:
+                    buffer = buffer[start:]
+                    break
+                # Text outside entries is a comment in BibTeX
+                buffer = buffer[start + 1:]
+                continue
+            end = _find_close(buffer, header.end(), header.group(2))
+            if end < 0:
+                if not final:
+                    buffer = buffer[start:]
+                    break
+                if errors is not None:
+                    errors.append(f"{buffer[start:header.end() + 30].strip()}...: entry is never closed")
+                # Look for complete entries after the broken one
+                buffer = buffer[header.end():]
+                continue
+            yield header.group(1).lower(), buffer[header.end():end]
+            buffer = buffer[end + 1:]
+
+
+def _parse_value(body: str, pos: int, strings: Dict[str, str]) -> Tuple[str, int]:
+    """Parse a possibly concatenated field value starting at pos"""
+    parts = []
+    while True:
+        while pos < len(body) and body[pos].isspace():
+            pos += 1
+        if pos >= len(body):
+            raise BibtexError("Missing field value")
+        if body[pos] == '{':
+            end = _find_close(body, pos + 1, '{')
+            if end < 0:
+                raise BibtexError("Unbalanced braces in field value")
+            parts.append(body[pos + 1:end])
+            pos = end + 1
+        elif body[pos] == '"':
+            depth, end = 0, pos + 1
+            while end < len(body) and not (body[end] == '"' and depth == 0):
+                depth += {'{': 1, '}': -1}.get(body[end], 0)
+                end += 1
+            if end >= len(body):
+                raise BibtexError("Unterminated quoted field value")
+            parts.append(body[pos + 1:end])
+            pos = end + 1
+        else:
+            bare = BARE_VALUE_RE.match(body, pos)
+            if not bare or not bare.group(1):
+                raise BibtexError(f"Unexpected character {body[pos]!r} in field value")
+            word = bare.group(1)
+            parts.append(word if word.isdigit() else strings.get(word.lower(), MONTHS.get(word.lower(), word)))
+            pos = bare.end()
+        separator = SEPARATOR_RE.match(body, pos)
+        if separator is None:
+            raise BibtexError(f"Expected ',' or '#' at {body[pos:pos + 20]!r}")
+        pos = separator.end()
+        if separator.group(1) != '#':
+            return ''.join(parts), pos
+
+
+def parse_fields(body: str, pos: int, strings: Dict[str, str]) -> Dict[str, str]:
+    fields = {}
+    while pos < len(body) and body[pos:].strip():
+        name = FIELD_NAME_RE.match(body, pos)
+        if name is None:
+            raise BibtexError(f"Expected a field name at {body[pos:pos + 20]!r}")
+        fields[name.group(1).lower()], pos = _parse_value(body, name.end(), strings)
+    return fields
+
+
+def iter_bibtex(chunks: Iterable[str], errors: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield parsed entries with 'entry_type', 'cite_key' and lower-cased fields.
+
+    @string macros are expanded, @comment and @preamble are skipped. Entries
+    that fail to parse are skipped and described in errors when given.
+    """
+    strings: Dict[str, str] = {}
+    for entry_type, body in iter_raw_entries(chunks, errors):
+        if entry_type in ('comment', 'preamble'):
+            continue
+        try:
+            if entry_type == 'string':
+                strings.update(parse_fields(body, 0, strings))
+                continue
+            cite_key, _, rest = body.partition(',')
+            fields = parse_fields(rest, 0, strings)
+        except BibtexError as e:
+            if errors is not None:
+                errors.append(f"@{entry_type}{{{body[:40].strip()}...: {e}")
+            continue
+        yield {'entry_type': entry_type, 'cite_key': cite_key.strip(), **fields}
+
+
+def detex(text: str) -> str:
+    """Convert the common TeX markup found in bibliographies to plain text"""
+    text = ACCENT_RE.sub(lambda m: unicodedata.normalize('NFC', m.group(2) + ACCENTS[m.group(1)]), text)
+    text = SYMBOL_RE.sub(lambda m: SYMBOLS[m.group()], text)
+    text = COMMAND_RE.sub('', text).replace('{', '').replace('}', '')
+    return ' '.join(text.split())
+
+
+def format_authors(authors: str) -> str:
+    """'Last, First and First Last' -> 'First Last, First Last'"""
+    names = []
+    for name in re.split(r'\s+and\s+', authors.strip()):
+        if ',' in name:
+            last, _, first = name.partition(',')
+            name = f"{first.strip()} {last.strip()}"
+        if name.strip():
+            names.append(detex(name))
+    if len(names) > 1 and names[-1].lower() == 'others':
+        names[-1] = 'et al.'
+    return ', '.join(names)
+
+
+def to_publication(entry: Dict[str, Any]) -> Dict[str, str]:
+    """Reduce a parsed entry to the publication fields used in resumes"""
+    venue = next((entry[field] for field in VENUE_FIELDS if entry.get(field)), '')
+    url = entry.get('url', '')
+    if not url and entry.get('doi'):
+        url = 'https://doi.org/' + re.sub(r'^(https?://(dx\.)?doi\.org/)', '', entry['doi'].strip())
+    return {
+        'cite_key': entry.get('cite_key', ''),
+        'entry_type': entry.get('entry_type', ''),
+        'title': detex(entry.get('title', '')),
+        'authors': format_authors(entry.get('author', '') or entry.get('editor', '')),
+        'venue': detex(venue),
+        'year': detex(entry.get('year', '')),
+        'url': url.strip(),
+    }
+
+
+def import_publications(stream: TextIO, errors: Optional[List[str]] = None) -> Iterator[Dict[str, str]]:
+    """Stream publication records out of a BibTeX file"""
+    for entry in iter_bibtex(read_chunks(stream), errors):
+        publication = to_publication(entry)
+        if publication['title']:
+            yield publication
@@ -0,0 +1,117 @@
+"""
+Shared Artifact Store
+Content-addressed, size-bounded store for generated artifacts such as PDFs.
+Blobs live on local disk under their SHA-256, identical artifacts are stored
+once, and the least recently used blobs are evicted when the store grows past
+its byte budget. Sessions keep only the key.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Optional
+
+DEFAULT_STORE_DIR = os.path.join(tempfile.gettempdir(), 'latex-resume-builder-artifacts')
+DEFAULT_STORE_MB = 512
+
+KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class BlobStore:
+    """LRU-evicting blob store keyed by content hash"""
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR, max_bytes: int = DEFAULT_STORE_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # key -> size in bytes, least recently used first
+        self.entries: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def _load(self):
+        """Rebuild the LRU order from files left by earlier runs"""
+        found = []
+        for shard in os.listdir(self.root):
+            shard_dir = os.path.join(self.root, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if KEY_RE.match(name):
+                    stat = os.stat(os.path.join(shard_dir, name))
+                    found.append((stat.st_mtime, name, stat.st_size))
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.total_bytes += size
+        with self.lock:
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used blobs until the store fits its budget"""
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its key; existing content is not rewritten"""
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        with self.lock:
+            if key in self.entries and os.path.exists(path):
+                self.entries.move_to_end(key)
+                os.utime(path)
+                return key
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            self.total_bytes -= self.entries.pop(key, 0)
+            self.entries[key] = len(data)
+            self.total_bytes += len(data)
+            self._evict()
+        return key
+
+    def path(self, key: str) -> Optional[str]:
+        """Location of a blob on disk, or None if it was evicted"""
+        if not KEY_RE.match(key or ''):
+            return None
+        path = self._path(key)
+        with self.lock:
+            if not os.path.exists(path):
+                self.total_bytes -= self.entries.pop(key, 0)
+                return None
+            if key not in self.entries:
+                # Written by another process sharing the directory
+                self.entries[key] = os.path.getsize(path)
+                self.total_bytes += self.entries[key]
+            self.entries.move_to_end(key)
+            os.utime(path)
+        return path
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """Open a blob for streaming reads, or None if it was evicted"""
+        path = self.path(key)
+        if path is None:
+            return None
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            return None
+
+    def __contains__(self, key: str) -> bool:
+        return self.path(key) is not None
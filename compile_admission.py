@@ -0,0 +1,174 @@
+"""
+Compile Admission Control
+Per-user token buckets limit how often a single user or session can compile,
+and a global admission controller caps concurrent pdflatex processes and
+sheds load once the wait queue is full. Rejections carry a retry-after hint
+so the UI can tell the user when to try again.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_LIMITS = {
+    'compile_rate_per_minute': 6.0,
+    'compile_burst': 3,
+    'max_concurrent_compiles': os.cpu_count() or 2,
+    'max_queued_compiles': 2 * (os.cpu_count() or 2),
+    'compile_queue_timeout': 10.0,
+}
+
+# Buckets idle for this long are full again and can be forgotten
+BUCKET_IDLE_SECONDS = 3600
+
+
+class CompileRejected(Exception):
+    """Raised when a compile is refused by rate limiting or load shedding"""
+
+    def __init__(self, message: str, retry_after: float, reason: str):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at a fixed rate"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self, now: Optional[float] = None) -> Tuple[bool, float]:
+        """Take one token; returns (allowed, seconds until a token is available)"""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.refill_per_second
+
+
+class RateLimiter:
+    """Token buckets keyed by user or session id"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = burst
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def check(self, key: str):
+        """Consume a token for key or raise CompileRejected"""
+        with self.lock:
+            now = time.monotonic()
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                self._evict_idle(now)
+                bucket = self.buckets[key] = TokenBucket(self.burst, self.rate_per_second)
+            allowed, retry_after = bucket.try_acquire(now)
+        if not allowed:
+            raise CompileRejected(
+                f"You're compiling too often. Try again in {retry_after:.0f}s.", retry_after, 'rate_limited'
+            )
+
+    def refund(self, key: str):
+        """Return the token taken by check when the compile never ran"""
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.tokens = min(bucket.capacity, bucket.tokens + 1)
+
+    def _evict_idle(self, now: float):
+        """Drop buckets nobody has touched recently"""
+        stale = [key for key, b in self.buckets.items() if now - b.updated > BUCKET_IDLE_SECONDS]
+        for key in stale:
+            del self.buckets[key]
+
+
+class AdmissionController:
+    """Caps concurrent compiles and sheds requests when the queue is full"""
+
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout: float):
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.lock = threading.Lock()
+        self.waiting = 0
+        self.running = 0
+        # Exponentially weighted average compile time, used for retry hints
+        self.avg_seconds = 5.0
+
+    def estimated_wait(self) -> float:
+        """Rough time until a newly queued job would start"""
+        return self.avg_seconds * (self.waiting + 1) / self.max_concurrent
+
+    def overloaded(self) -> CompileRejected:
+        """Rejection for a request shed because the queue is full"""
+        retry_after = self.estimated_wait()
+        return CompileRejected(
+            f"The server is busy compiling other resumes. Try again in {retry_after:.0f}s.",
+            retry_after, 'overloaded'
+        )
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn in a compile slot, waiting briefly or shedding under load"""
+        with self.lock:
+            if self.waiting >= self.max_queued:
+                raise self.overloaded()
+            self.waiting += 1
+
+        acquired = self.slots.acquire(timeout=self.queue_timeout)
+        with self.lock:
+            self.waiting -= 1
+            if acquired:
+                self.running += 1
+        if not acquired:
+            retry_after = self.estimated_wait()
+            raise CompileRejected(
+                f"Timed out waiting for a free compiler. Try again in {retry_after:.0f}s.",
+                retry_after, 'queue_timeout'
+            )
+
+        started = time.monotonic()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.monotonic() - started
+            with self.lock:
+                self.running -= 1
+                self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * elapsed
+            self.slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load, for status displays"""
+        with self.lock:
+            return {'running': self.running, 'waiting': self.waiting,
+                    'max_concurrent': self.max_concurrent, 'avg_seconds': self.avg_seconds}
+
+
+class CompileGate:
+    """Rate limiting per user followed by global admission control"""
+
+    def __init__(self, limits: Optional[Dict[str, Any]] = None, admission: Optional[AdmissionController] = None):
+        """Gates with their own rate limits can share another gate's admission controller"""
+        limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.limiter = RateLimiter(float(limits['compile_rate_per_minute']), int(limits['compile_burst']))
+        self.admission = admission or AdmissionController(
+            int(limits['max_concurrent_compiles']),
+            int(limits['max_queued_compiles']),
+            float(limits['compile_queue_timeout'])
+        )
+
+    def run(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Charge key's bucket, then run fn once admitted; shed requests are not charged"""
+        self.limiter.check(key)
+        try:
+            return self.admission.run(fn, *args, **kwargs)
+        except CompileRejected:
+            self.limiter.refund(key)
+            raise
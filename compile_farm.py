@@ -0,0 +1,394 @@
+"""
+Compile Farm
+SQLite-backed job queue that lets compiles run on worker processes instead of
+inside the web server. App nodes submit LaTeX into a database file on a shared
+volume and wait for the PDF; any number of workers, on this host or others
+mounting the same volume, lease jobs, compile them and write back the result.
+Throughput grows by starting more workers.
+
+Leases expire unless the worker holding them heartbeats, so a job whose worker
+crashed or lost the volume is picked up again by another worker. Results are
+only accepted from the current lease holder. Identical in-flight or recently
+finished sources share one job.
+
+Lease expiry times are wall-clock timestamps written by one host and compared
+by others, so every host must keep its clock synchronized (NTP). Skew up to
+LEASE_SECONDS - HEARTBEAT_SECONDS is absorbed; beyond that a live job can be
+leased twice. Fencing still keeps the first result only, so skew wastes
+compiles but cannot corrupt results.
+
+The journal mode is a property of the database file, so it is chosen once
+with the init command rather than by every process that opens the database.
+
+Usage:
+    python compile_farm.py init --db /shared/compile-farm.db --journal-mode wal
+    python compile_farm.py worker --db /shared/compile-farm.db --concurrency 2
+    python compile_farm.py stats --db /shared/compile-farm.db
+    python compile_farm.py purge --db /shared/compile-farm.db
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import signal
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+
+from latex_renderer import compile_latex, LatexCompileError
+from tex_env import load_environment
+
+DEFAULT_FARM_DB = os.path.join(tempfile.gettempdir(), 'latex-resume-builder-farm', 'compile-farm.db')
+# A lease not renewed for this long is considered abandoned
+LEASE_SECONDS = 30.0
+HEARTBEAT_SECONDS = LEASE_SECONDS / 3
+# Jobs leased this many times without finishing are failed instead of retried
+MAX_ATTEMPTS = 3
+DEFAULT_WAIT_SECONDS = 120.0
+# Farm compiles an app node lets wait at once; workers, not the node's CPUs, bound throughput
+DEFAULT_FARM_CONCURRENCY = 64
+# WAL needs shared memory between processes; network filesystems need 'delete'
+JOURNAL_MODES = ('wal', 'delete')
+WAIT_POLL_MIN = 0.05
+WAIT_POLL_MAX = 0.5
+IDLE_POLL_SECONDS = 0.25
+# Finished jobs are kept this long so identical sources reuse the PDF
+RESULT_TTL = 10 * 60
+# Queued jobs nobody picked up for this long are abandoned by their waiters
+STALE_QUEUED_SECONDS = 10 * 60
+PURGE_INTERVAL = 60.0
+BUSY_TIMEOUT = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    source_hash TEXT NOT NULL,
+    latex TEXT NOT NULL,
+    limits TEXT NOT NULL,
+    status TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    leased_by TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    finished_at REAL,
+    pdf BLOB,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted_at);
+CREATE INDEX IF NOT EXISTS jobs_source ON jobs (source_hash, status);
+"""
+
+
+def source_hash(latex: str, limits: Dict[str, Any]) -> str:
+    digest = hashlib.sha256(json.dumps(limits, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(latex.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def error_record(error: LatexCompileError) -> str:
+    return json.dumps({'message': str(error), 'log': error.log, 'kind': error.kind, 'errors': error.errors})
+
+
+def error_from_record(record: str) -> LatexCompileError:
+    data = json.loads(record)
+    return LatexCompileError(data['message'], data.get('log', ''), data.get('kind', 'latex_error'),
+                             data.get('errors'))
+
+
+class CompileFarm:
+    """Client and worker operations on the shared job database"""
+
+    def __init__(self, path: str = DEFAULT_FARM_DB, journal_mode: Optional[str] = None,
+                 lease_seconds: float = LEASE_SECONDS):
+        """journal_mode switches the database file's mode; None keeps whatever it has"""
+        if journal_mode is not None and journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"journal_mode must be one of: {', '.join(JOURNAL_MODES)}")
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        if journal_mode is not None:
+            conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        conn.executescript(SCHEMA)
+
+    def journal_mode(self) -> str:
+        return self._connection().execute("PRAGMA journal_mode").fetchone()[0]
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; transactions are managed explicitly"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self.local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction that takes the database lock up front"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # Client side
+
+    def submit(self, latex: str, limits: Optional[Dict[str, Any]] = None) -> str:
+        """Queue a compile and return its job id, joining an identical job if one exists"""
+        limits = limits or {}
+        key = source_hash(latex, limits)
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE source_hash = ? AND "
+                "(status IN ('queued', 'leased') OR (status = 'done' AND finished_at > ?)) "
+                "ORDER BY submitted_at DESC LIMIT 1", (key, now - RESULT_TTL)).fetchone()
+            if row is not None:
+                return row['id']
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, source_hash, latex, limits, status, submitted_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, key, latex, json.dumps(limits, default=str), now))
+            return job_id
+
+    def result(self, job_id: str) -> Optional[bytes]:
+        """The PDF for a finished job, None while it is pending; raises if it failed"""
+        row = self._connection().execute("SELECT status, pdf, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise LatexCompileError("The compile job was discarded before it finished", kind='unavailable')
+        if row['status'] == 'done':
+            return row['pdf']
+        if row['status'] == 'failed':
+            raise error_from_record(row['error'])
+        return None
+
+    def wait(self, job_id: str, timeout: float = DEFAULT_WAIT_SECONDS) -> bytes:
+        """Poll until the job finishes"""
+        deadline = time.monotonic() + timeout
+        delay = WAIT_POLL_MIN
+        while True:
+            pdf = self.result(job_id)
+            if pdf is not None:
+                return pdf
+            if time.monotonic() >= deadline:
+                raise LatexCompileError("No compile worker finished the job in time", kind='unavailable')
+            time.sleep(delay)
+            delay = min(WAIT_POLL_MAX, delay * 2)
+
+    def compile(self, latex: str, limits: Optional[Dict[str, Any]] = None,
+                timeout: float = DEFAULT_WAIT_SECONDS) -> bytes:
+        """Drop-in replacement for compile_latex that runs on a farm worker"""
+        return self.wait(self.submit(latex, limits), timeout)
+
+    # Worker side
+
+    def lease(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Claim the oldest queued job, or one whose lease has expired"""
+        while True:
+            now = time.time()
+            with self._transaction() as conn:
+                row = conn.execute(
+                    "SELECT id, latex, limits, attempts FROM jobs WHERE status = 'queued' OR "
+                    "(status = 'leased' AND lease_expires < ?) ORDER BY submitted_at LIMIT 1", (now,)).fetchone()
+                if row is None:
+                    return None
+                if row['attempts'] >= MAX_ATTEMPTS:
+                    error = LatexCompileError("Compile workers repeatedly stopped while running this job",
+                                              kind='unavailable')
+                    conn.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, pdf = NULL "
+                                 "WHERE id = ?", (error_record(error), now, row['id']))
+                    continue
+                conn.execute("UPDATE jobs SET status = 'leased', leased_by = ?, lease_expires = ?, "
+                             "attempts = attempts + 1 WHERE id = ?",
+                             (worker_id, now + self.lease_seconds, row['id']))
+                return {'id': row['id'], 'latex': row['latex'], 'limits': json.loads(row['limits']),
+                        'worker_id': worker_id, 'attempt': row['attempts'] + 1}
+
+    def _update_leased(self, job: Dict[str, Any], assignments: str, params: Tuple) -> bool:
+        """Apply an update only while this worker still holds the job's lease"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status = 'leased' AND leased_by = ? "
+                "AND attempts = ?", params + (job['id'], job['worker_id'], job['attempt']))
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job: Dict[str, Any]) -> bool:
+        """Extend a lease; False if it was lost to another worker"""
+        return self._update_leased(job, "lease_expires = ?", (time.time() + self.lease_seconds,))
+
+    def complete(self, job: Dict[str, Any], pdf: bytes) -> bool:
+        return self._update_leased(job, "status = 'done', pdf = ?, finished_at = ?, lease_expires = NULL",
+                                   (pdf, time.time()))
+
+    def fail(self, job: Dict[str, Any], error: LatexCompileError) -> bool:
+        return self._update_leased(job, "status = 'failed', error = ?, finished_at = ?, lease_expires = NULL",
+                                   (error_record(error), time.time()))
+
+    def requeue(self, job: Dict[str, Any]) -> bool:
+        """Hand a job back without counting it as finished"""
+        return self._update_leased(job, "status = 'queued', leased_by = NULL, lease_expires = NULL", ())
+
+    def purge(self, result_ttl: float = RESULT_TTL, stale_queued: float = STALE_QUEUED_SECONDS) -> int:
+        """Delete old results and queued jobs their waiters have given up on"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE (status IN ('done', 'failed') AND finished_at < ?) OR "
+                "(status = 'queued' AND submitted_at < ?)", (now - result_ttl, now - stale_queued))
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        conn = self._connection()
+        counts = {row['status']: row['n'] for row in
+                  conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+        oldest = conn.execute("SELECT MIN(submitted_at) AS t FROM jobs WHERE status = 'queued'").fetchone()['t']
+        workers = conn.execute("SELECT COUNT(DISTINCT leased_by) AS n FROM jobs WHERE status = 'leased' "
+                               "AND lease_expires >= ?", (now,)).fetchone()['n']
+        finished = conn.execute("SELECT COUNT(*) AS n FROM jobs WHERE status IN ('done', 'failed') "
+                                "AND finished_at >= ?", (now - 60,)).fetchone()['n']
+        return {
+            'queued': counts.get('queued', 0),
+            'leased': counts.get('leased', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'oldest_queued_seconds': round(now - oldest, 1) if oldest else 0.0,
+            'busy_workers': workers,
+            'finished_last_minute': finished,
+        }
+
+
+class Heartbeat:
+    """Keeps a job's lease alive while it compiles"""
+
+    def __init__(self, farm: CompileFarm, job: Dict[str, Any], interval: float = HEARTBEAT_SECONDS):
+        self.farm = farm
+        self.job = job
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"heartbeat-{job['id'][:8]}", daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                if not self.farm.heartbeat(self.job):
+                    return
+            except sqlite3.Error:
+                # A busy or briefly unreachable volume; the next beat may get through
+                continue
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+class Worker:
+    """Leases jobs from the farm and compiles them with a fixed number of threads"""
+
+    def __init__(self, farm: CompileFarm, concurrency: int = 1,
+                 compile_fn: Callable[..., bytes] = compile_latex, worker_id: Optional[str] = None):
+        self.farm = farm
+        self.concurrency = concurrency
+        self.compile_fn = compile_fn
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+        self.processed = 0
+        self.lock = threading.Lock()
+
+    def run_job(self, job: Dict[str, Any]):
+        with Heartbeat(self.farm, job):
+            try:
+                pdf = self.compile_fn(job['latex'], job['limits'])
+            except LatexCompileError as e:
+                self.farm.fail(job, e)
+            except Exception:
+                # Not the document's fault; let this or another worker try again
+                self.farm.requeue(job)
+                raise
+            else:
+                self.farm.complete(job, pdf)
+        with self.lock:
+            self.processed += 1
+
+    def _loop(self, slot: int):
+        worker_id = f"{self.worker_id}:{slot}"
+        while not self.stopping.is_set():
+            try:
+                job = self.farm.lease(worker_id)
+            except sqlite3.Error as e:
+                print(f"⚠️ {worker_id}: could not lease a job: {e}")
+                self.stopping.wait(IDLE_POLL_SECONDS * 4)
+                continue
+            if job is None:
+                self.stopping.wait(IDLE_POLL_SECONDS)
+                continue
+            try:
+                self.run_job(job)
+            except Exception as e:
+                print(f"⚠️ {worker_id}: job {job['id']} failed: {e}")
+
+    def run(self):
+        """Work until stop() is called, purging old jobs now and then"""
+        threads = [threading.Thread(target=self._loop, args=(slot,), name=f"farm-worker-{slot}", daemon=True)
+                   for slot in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        while not self.stopping.wait(PURGE_INTERVAL):
+            try:
+                self.farm.purge()
+            except sqlite3.Error:
+                pass
+        # Jobs already leased are finished before exiting
+        for thread in threads:
+            thread.join()
+
+    def stop(self, *args):
+        self.stopping.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile farm worker and queue tools")
+    parser.add_argument('command', choices=['init', 'worker', 'stats', 'purge'])
+    parser.add_argument('--db', default=DEFAULT_FARM_DB, help="Shared job database path")
+    parser.add_argument('--journal-mode', choices=JOURNAL_MODES,
+                        help="Switch the database to this mode; use 'delete' on a network filesystem")
+    parser.add_argument('--concurrency', type=int, default=1, help="Compiles this worker runs at once")
+    args = parser.parse_args()
+
+    farm = CompileFarm(args.db, args.journal_mode)
+    if args.command == 'init':
+        print(f"✅ {args.db} is ready (journal mode: {farm.journal_mode()})")
+    elif args.command == 'stats':
+        print(json.dumps(farm.stats(), indent=2))
+    elif args.command == 'purge':
+        print(f"🧹 Removed {farm.purge()} jobs")
+    else:
+        env = load_environment()
+        if env.pdflatex is None:
+            parser.error("pdflatex not found. Please install TeX Live or MiKTeX")
+        worker = Worker(farm, args.concurrency)
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        print(f"🚀 Worker {worker.worker_id} ({env.version}) compiling {args.concurrency} at a time from {args.db}")
+        worker.run()
+        print(f"👋 Worker stopped after {worker.processed} jobs")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,25 @@ service cloud.firestore {
       allow create: if request.auth != null && 
                       request.auth.uid == request.resource.data.user_id;
     }
+
+    // Per-user search index, one entry document per saved resume
+    match /search_indexes/{userId}/{document=**} {
+      allow read, write: if request.auth != null && request.auth.uid == userId;
+    }
+
+    // Version history: per-version deltas and content-addressed section blobs
+    match /resume_versions/{document} {
+      allow read, write: if request.auth != null && 
+                           request.auth.uid == resource.data.user_id;
+      allow create: if request.auth != null && 
+                      request.auth.uid == request.resource.data.user_id;
+    }
+    match /resume_blobs/{document} {
+      allow read, write: if request.auth != null && 
+                           request.auth.uid == resource.data.user_id;
+      allow create: if request.auth != null && 
+                      request.auth.uid == request.resource.data.user_id;
+    }
     
     // Prevent access to other collections
     match /{document=**} {
@@ -69,4 +88,7 @@ def validate_firebase_config():
         return True
     except Exception as e:
         print(f"❌ Error validating Firebase config: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+if __name__ == "__main__":
+    create_firestore_rules()
@@ -0,0 +1,179 @@
+"""
+Batched Firestore Writes
+Helpers for multi-resume operations. Writes are grouped into batches that stay
+within Firestore's per-commit limit, commits are retried with exponential
+backoff on transient errors, and every input item gets its own outcome.
+"""
+
+import random
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Iterable, Optional
+
+from resume_search import build_index_entry, encode_entry, entry_ref, unindexed
+
+# Firestore rejects commits with more than 500 writes
+MAX_BATCH_WRITES = 500
+# "in" queries accept at most 30 values
+MAX_IN_VALUES = 30
+
+COMMIT_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+try:
+    from google.api_core import exceptions as gexc
+    TRANSIENT_ERRORS = (
+        gexc.Aborted, gexc.DeadlineExceeded, gexc.InternalServerError,
+        gexc.ServiceUnavailable, gexc.TooManyRequests, gexc.ResourceExhausted,
+    )
+except ImportError:  # pragma: no cover - google-api-core ships with firebase-admin
+    TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+# Failures worth trying again later rather than reporting as final
+RETRYABLE_ERRORS = TRANSIENT_ERRORS + (ConnectionError, TimeoutError)
+
+
+def with_retry(fn: Callable[[], Any], retries: int = COMMIT_RETRIES) -> Any:
+    """Call fn, retrying transient errors with jittered exponential backoff"""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except TRANSIENT_ERRORS:
+            if attempt == retries:
+                raise
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+
+def chunked(items: List[Any], size: int) -> Iterable[List[Any]]:
+    """Split a list into consecutive chunks"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def apply_writes(batch, writes: List[tuple]):
+    """Stage ('set', ref, data[, merge]) and ('delete', ref) writes on a batch"""
+    for write in writes:
+        if write[0] == 'delete':
+            batch.delete(write[1])
+        else:
+            batch.set(write[1], write[2], merge=write[3] if len(write) > 3 else False)
+
+
+def batch_write(db, items: Iterable[Any], writes_for: Callable[[Any], List[tuple]],
+                finalize: Optional[Callable[[List[Any]], List[tuple]]] = None,
+                item_id: Callable[[Any], str] = str) -> List[Dict[str, Any]]:
+    """Commit the writes for each item in as few batches as the limits allow.
+
+    An item's writes never straddle two commits. finalize(items) may return
+    shared trailing writes for a chunk, such as one search index update; one
+    write slot is reserved for it. Failed outcomes say whether the error was
+    transient, so callers can keep the work for later.
+    """
+    limit = MAX_BATCH_WRITES - (1 if finalize else 0)
+    outcomes: List[Dict[str, Any]] = []
+
+    def commit(pending: List[Any], writes: List[tuple]):
+        batch = db.batch()
+        apply_writes(batch, writes + (finalize(pending) if finalize else []))
+        try:
+            with_retry(batch.commit)
+            outcomes.extend({'id': item_id(item), 'ok': True, 'error': None, 'retryable': False} for item in pending)
+        except Exception as e:
+            # Transient errors that outlasted the retries may succeed later
+            retryable = isinstance(e, RETRYABLE_ERRORS)
+            outcomes.extend({'id': item_id(item), 'ok': False, 'error': str(e), 'retryable': retryable}
+                            for item in pending)
+
+    pending: List[Any] = []
+    writes: List[tuple] = []
+    for item in items:
+        item_writes = writes_for(item)
+        if pending and len(writes) + len(item_writes) > limit:
+            commit(pending, writes)
+            pending, writes = [], []
+        pending.append(item)
+        writes.extend(item_writes)
+
+    if pending:
+        commit(pending, writes)
+    return outcomes
+
+
+def delete_where_in(db, collection: str, field: str, values: List[str]) -> List[Dict[str, Any]]:
+    """Delete every document whose field matches one of the values"""
+    refs = []
+    for group in chunked(values, MAX_IN_VALUES):
+        refs.extend(doc.reference for doc in db.collection(collection).where(field, 'in', group).stream())
+    return batch_write(db, refs, lambda ref: [('delete', ref)], item_id=lambda ref: ref.id)
+
+
+def delete_resumes(db, user_id: str, resume_ids: List[str]) -> List[Dict[str, Any]]:
+    """Delete resumes and their search index entries in the same commits"""
+    return batch_write(db, resume_ids, lambda rid: [('delete', db.collection('resumes').document(rid)),
+                                                    ('delete', entry_ref(db, user_id, rid))])
+
+
+def duplicate_resumes(db, user_id: str, resume_ids: List[str], suffix: str = " (copy)") -> List[Dict[str, Any]]:
+    """Copy resumes inside transactions so each copy matches a consistent read.
+
+    Sources are read in the transaction of the chunk that copies them; copies
+    start without version history.
+    """
+    from firebase_admin import firestore
+
+    # Each copy costs two writes: the resume and its search index entry
+    chunk_size = MAX_BATCH_WRITES // 2
+    outcomes: List[Dict[str, Any]] = []
+
+    @firestore.transactional
+    def copy_chunk(transaction, chunk: List[str]) -> List[Dict[str, Any]]:
+        refs = [db.collection('resumes').document(rid) for rid in chunk]
+        snapshots = {doc.id: doc for doc in db.get_all(refs, transaction=transaction)}
+        results = []
+        for rid in chunk:
+            doc = snapshots.get(rid)
+            data = doc.to_dict() if doc is not None and doc.exists else None
+            if not data or data.get('user_id') != user_id:
+                results.append({'id': rid, 'ok': False, 'error': 'Resume not found'})
+                continue
+            copy_ref = db.collection('resumes').document()
+            data.pop('history_head', None)
+            data['name'] = f"{data.get('name', 'Untitled')}{suffix}"
+            data['created_at'] = data['updated_at'] = datetime.now()
+            transaction.set(copy_ref, data)
+            transaction.set(entry_ref(db, user_id, copy_ref.id),
+                            encode_entry(user_id, build_index_entry(data['name'], data.get('resume_data', {}))))
+            results.append({'id': rid, 'ok': True, 'error': None, 'new_id': copy_ref.id})
+        return results
+
+    for chunk in chunked(resume_ids, chunk_size):
+        try:
+            outcomes.extend(with_retry(lambda: copy_chunk(db.transaction(), chunk)))
+        except Exception as e:
+            outcomes.extend({'id': rid, 'ok': False, 'error': str(e)} for rid in chunk)
+    return outcomes
+
+
+def backfill_search_index(db, user_id: str, resume_ids: List[str],
+                          entries: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Index resumes saved before search existed and return the entries written"""
+    missing = unindexed(resume_ids, entries)
+    if not missing:
+        return {}
+
+    written: Dict[str, Dict[str, Any]] = {}
+    refs = [db.collection('resumes').document(rid) for rid in missing]
+    docs = []
+    for group in chunked(refs, MAX_BATCH_WRITES):
+        docs.extend(doc for doc in db.get_all(group, field_paths=['name', 'user_id', 'resume_data']) if doc.exists)
+
+    def writes_for(doc) -> List[tuple]:
+        data = doc.to_dict() or {}
+        if data.get('user_id') != user_id:
+            return []
+        written[doc.id] = build_index_entry(data.get('name', 'Untitled'), data.get('resume_data', {}))
+        return [('set', entry_ref(db, user_id, doc.id), encode_entry(user_id, written[doc.id]))]
+
+    indexed = {o['id'] for o in batch_write(db, docs, writes_for, item_id=lambda doc: doc.id) if o['ok']}
+    return {rid: entry for rid, entry in written.items() if rid in indexed}
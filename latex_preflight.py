@@ -0,0 +1,268 @@
+"""
+LaTeX Pre-flight Checks and Log Parsing
+A fast static pass over generated LaTeX that catches unbalanced braces and
+environments, undefined macros and unescaped special characters before
+pdflatex is spawned, plus a streaming parser for pdflatex logs. Both report
+source line numbers, which locate_field maps back to the resume field that
+produced the offending text.
+"""
+
+import re
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+# Macros provided by the LaTeX kernel
+KNOWN_MACROS = {
+    'documentclass', 'usepackage', 'input', 'begin', 'end', 'newcommand', 'renewcommand',
+    'providecommand', 'def', 'item', 'section', 'textbf', 'textit', 'emph', 'small', 'tiny',
+    'large', 'Large', 'Huge', 'huge', 'scshape', 'bfseries', 'itshape', 'raggedright',
+    'raggedbottom', 'vspace', 'hspace', 'hfill', 'setlength', 'textwidth', 'tabcolsep',
+    'extracolsep', 'fill', 'hbox', 'vcenter', 'bullet', 'labelitemi', 'labelitemii',
+    'newline', 'linebreak', 'par', 'quad', 'qquad', 'textbackslash', 'textasciicircum',
+    'textasciitilde', 'pdfgentounicode', 'today', 'arabic', 'pagestyle',
+}
+
+# Macros that are only defined once their package is loaded
+PACKAGE_MACROS = {
+    'color': {'color'},
+    'titlesec': {'titleformat', 'titlerule', 'titlespacing'},
+    'enumitem': {'setlist'},
+    'fancyhdr': {'fancyhf', 'fancyfoot', 'fancyhead', 'headrulewidth', 'footrulewidth'},
+    'hyperref': {'href', 'url', 'urlstyle'},
+    'fontawesome5': {'faPhone', 'faEnvelope', 'faIcon', 'faGithub', 'faLinkedin'},
+}
+MACRO_PACKAGES = {macro: package for package, macros in PACKAGE_MACROS.items() for macro in macros}
+
+DEFINING_MACROS = {'newcommand', 'renewcommand', 'providecommand'}
+# Macros whose first argument is a URL and may contain otherwise special characters
+URL_MACROS = {'href', 'url'}
+ALIGNMENT_ENVIRONMENTS = {'tabular', 'tabular*', 'tabularx', 'array', 'align', 'align*'}
+
+CONTROL_RE = re.compile(r'\\([A-Za-z@]+|.)')
+DEFINED_NAME_RE = re.compile(r'\s*\{?\s*\\([A-Za-z@]+)\s*\}?')
+ENV_NAME_RE = re.compile(r'\s*\{([^}]*)\}')
+PACKAGE_NAMES_RE = re.compile(r'\s*(?:\[[^\]]*\])?\s*\{([^}]*)\}')
+LOG_LINE_RE = re.compile(r'^l\.(\d+)\s?(.*)')
+
+MAX_LOG_ERRORS = 10
+
+
+def _issue(line: int, kind: str, message: str) -> Dict[str, Any]:
+    return {'line': line, 'kind': kind, 'message': message}
+
+
+def _skip_group(text: str, start: int) -> int:
+    """Index just past the balanced brace group at start, or start if none"""
+    i = start
+    while i < len(text) and text[i] == ' ':
+        i += 1
+    if i >= len(text) or text[i] != '{':
+        return start
+    depth = 0
+    while i < len(text):
+        if text[i] == '\\':
+            i += 2
+            continue
+        if text[i] == '{':
+            depth += 1
+        elif text[i] == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return start
+
+
+def check_latex(source: str) -> List[Dict[str, Any]]:
+    """Statically check generated LaTeX; an empty list means no problems found"""
+    issues: List[Dict[str, Any]] = []
+    defined = set()
+    known = set(KNOWN_MACROS)
+    braces: List[int] = []
+    envs: List[Tuple[str, int]] = []
+    in_math = False
+    in_document = False
+
+    # A \newcommand body is scanned with its own environment stack, since
+    # definitions like \resumeItemListStart open environments they don't close
+    definition_base: Optional[int] = None
+    definition_groups = 0
+    definition_envs: List[Tuple[str, int]] = []
+
+    for line_no, line in enumerate(source.splitlines(), 1):
+        i = 0
+        while i < len(line):
+            char = line[i]
+            active_envs = definition_envs if definition_base is not None else envs
+
+            if char == '\\':
+                match = CONTROL_RE.match(line, i)
+                if not match:
+                    issues.append(_issue(line_no, 'special', "Trailing backslash at end of line"))
+                    break
+                name = match.group(1)
+                i = match.end()
+                if not (name[0].isalpha() or name[0] == '@'):
+                    continue
+
+                if name in DEFINING_MACROS or name == 'def':
+                    defined_match = DEFINED_NAME_RE.match(line, i)
+                    if defined_match:
+                        defined.add(defined_match.group(1))
+                    if name in DEFINING_MACROS and definition_base is None:
+                        definition_base = len(braces)
+                        # The name group (if braced) and the body group
+                        definition_groups = 2 if line[i:].lstrip().startswith('{') else 1
+                        definition_envs = []
+                elif name in ('begin', 'end'):
+                    env_match = ENV_NAME_RE.match(line, i)
+                    if env_match:
+                        env = env_match.group(1)
+                        i = env_match.end()
+                        if name == 'begin':
+                            active_envs.append((env, line_no))
+                            if env == 'document':
+                                in_document = True
+                        elif active_envs and active_envs[-1][0] == env:
+                            active_envs.pop()
+                        elif definition_base is None:
+                            expected = f"\\end{{{active_envs[-1][0]}}}" if active_envs else "no open environment"
+                            issues.append(_issue(line_no, 'environment',
+                                                 f"\\end{{{env}}} does not match ({expected} expected)"))
+                elif name == 'usepackage':
+                    packages_match = PACKAGE_NAMES_RE.match(line, i)
+                    if packages_match:
+                        for package in packages_match.group(1).split(','):
+                            known.update(PACKAGE_MACROS.get(package.strip(), ()))
+                elif name not in known and name not in defined:
+                    package = MACRO_PACKAGES.get(name)
+                    hint = f" (needs \\usepackage{{{package}}})" if package else ""
+                    issues.append(_issue(line_no, 'undefined', f"Undefined macro \\{name}{hint}"))
+                if name in URL_MACROS:
+                    end = _skip_group(line, i)
+                    if end > i:
+                        i = end
+                continue
+
+            if char == '%':
+                issues.append(_issue(line_no, 'special', "Unescaped % comments out the rest of the line"))
+                break
+            if char == '{':
+                braces.append(line_no)
+            elif char == '}':
+                if not braces:
+                    issues.append(_issue(line_no, 'brace', "Unmatched closing brace"))
+                else:
+                    braces.pop()
+                    if definition_base is not None and len(braces) == definition_base:
+                        definition_groups -= 1
+                        if definition_groups == 0:
+                            definition_base = None
+            elif char == '$':
+                in_math = not in_math
+            elif char in '_^' and not in_math:
+                issues.append(_issue(line_no, 'special', f"Unescaped {char} outside math mode"))
+            elif char == '&' and not any(env in ALIGNMENT_ENVIRONMENTS for env, _ in envs + definition_envs):
+                issues.append(_issue(line_no, 'special', "Unescaped & outside a table"))
+            elif char == '#' and in_document:
+                issues.append(_issue(line_no, 'special', "Unescaped # in document body"))
+            i += 1
+
+        # Inline math never spans lines in generated output
+        if in_math:
+            issues.append(_issue(line_no, 'special', "Unbalanced $ (math mode left open)"))
+            in_math = False
+
+    for line_no in braces:
+        issues.append(_issue(line_no, 'brace', "Opening brace is never closed"))
+    for env, line_no in envs:
+        issues.append(_issue(line_no, 'environment', f"\\begin{{{env}}} is never closed"))
+    return issues
+
+
+def parse_log(lines: Iterable[str], max_errors: int = MAX_LOG_ERRORS) -> Iterator[Dict[str, Any]]:
+    """Stream errors out of a pdflatex log without holding the whole log.
+
+    Each error has the message after '!', and the source line number and
+    context from the following 'l.<n>' line when pdflatex reports one.
+    """
+    current: Optional[Dict[str, Any]] = None
+    emitted = 0
+    for raw in lines:
+        line = raw.rstrip('\n')
+        if line.startswith('! '):
+            if current:
+                yield current
+                emitted += 1
+                if emitted >= max_errors:
+                    return
+            current = {'message': line[2:].strip(), 'line': None, 'context': ''}
+            continue
+        if current:
+            match = LOG_LINE_RE.match(line)
+            if match:
+                current['line'] = int(match.group(1))
+                current['context'] = match.group(2).strip()
+                yield current
+                emitted += 1
+                if emitted >= max_errors:
+                    return
+                current = None
+    if current:
+        yield current
+
+
+def _field_values(value: Any, path: str) -> Iterator[Tuple[str, str]]:
+    """Yield (path, text) for every string in resume data"""
+    if isinstance(value, str):
+        if value.strip():
+            yield path, value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield from _field_values(item, f"{path}.{key}" if path else key)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _field_values(item, f"{path}[{index}]")
+
+
+def locate_field(data: Dict[str, Any], source_line: str) -> Optional[str]:
+    """Find the resume field whose text appears on a generated source line.
+
+    Matches both the raw and the escaped form and prefers the longest, so
+    short values like a GPA don't shadow the bullet that really failed.
+    """
+    from latex_renderer import escape_latex
+
+    best: Optional[Tuple[int, str]] = None
+    for path, text in _field_values(data, ''):
+        for candidate in {text.strip(), escape_latex(text.strip())}:
+            if len(candidate) >= 3 and candidate in source_line:
+                if best is None or len(candidate) > best[0]:
+                    best = (len(candidate), path)
+    return best[1] if best else None
+
+
+def field_label(path: str) -> str:
+    """Human-readable label for a field path like experience[0].bullets[2]"""
+    parts = re.findall(r'([A-Za-z_]+)|\[(\d+)\]', path)
+    label = []
+    for name, index in parts:
+        if name:
+            label.append(name.replace('_', ' ').title())
+        else:
+            label[-1] += f" #{int(index) + 1}"
+    return " › ".join(label)
+
+
+def annotate_issues(issues: List[Dict[str, Any]], source: str, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Attach the originating resume field to issues that carry a line number"""
+    lines = source.splitlines()
+    annotated = []
+    for issue in issues:
+        issue = dict(issue)
+        line = issue.get('line')
+        if line and 0 < line <= len(lines):
+            field = locate_field(data, lines[line - 1])
+            if field:
+                issue['field'] = field_label(field)
+        annotated.append(issue)
+    return annotated
@@ -0,0 +1,475 @@
+"""
+LaTeX Renderer
+Turns resume data into a LaTeX document and compiles it with pdflatex.
+Kept free of Streamlit so the same rendering can be reused by bulk export,
+background jobs and command-line tools.
+"""
+
+import difflib
+import os
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+
+from latex_preflight import check_latex, parse_log
+from resume_document import ResumeDocument, Section, cached_document
+
+# Per-job limits; keys match the optional Streamlit secrets of the same name
+DEFAULT_COMPILE_LIMITS = {
+    'compile_timeout': 30,        # wall-clock seconds
+    'compile_cpu_seconds': 20,    # CPU time before SIGXCPU
+    'compile_memory_mb': 1024,    # address space
+    'compile_output_mb': 20,      # largest file pdflatex may write
+    'compile_nice': 10,           # scheduling priority relative to the server
+}
+
+DEFAULT_FORMATTING_OPTIONS = {
+    'template': 'Standard Single-Column',
+    'margin_top': 0.5,
+    'margin_bottom': 0.5,
+    'margin_left': 0.5,
+    'margin_right': 0.5,
+    'font_size': 11,
+    'item_spacing': 0.04,
+    'section_spacing': 0.15,
+    'package_profile': 'full'
+}
+
+# Packages loaded by each profile. 'lean' keeps only what the layout needs and
+# drops the icon fonts, unused symbol packages, babel and the glyph-to-unicode map.
+PACKAGE_PROFILES = {
+    'full': {
+        'packages': ['enumitem', 'fontawesome5', 'latexsym', 'titlesec', 'marvosym', 'color', 'verbatim',
+                     'hyperref', 'fancyhdr', 'babel', 'tabularx'],
+        'glyph_to_unicode': True,
+    },
+    'lean': {
+        'packages': ['enumitem', 'titlesec', 'color', 'hyperref'],
+        'glyph_to_unicode': False,
+    },
+}
+PACKAGE_OPTIONS = {'color': 'usenames,dvipsnames', 'hyperref': 'hidelinks', 'babel': 'english'}
+
+# Allowed range of each numeric formatting option, the same as the app's sliders
+FORMATTING_OPTION_RANGES = {
+    'font_size': (9, 14),
+    'margin_top': (0.2, 1.0),
+    'margin_bottom': (0.2, 1.0),
+    'margin_left': (0.2, 1.0),
+    'margin_right': (0.2, 1.0),
+    'item_spacing': (0.02, 0.1),
+    'section_spacing': (0.05, 0.3),
+}
+MAX_TEMPLATE_NAME = 100
+
+LATEX_CONTACT_ICONS = {
+    'phone': "\\faPhone\\ ",
+    'email': "\\faEnvelope\\ ",
+    'linkedin': "\\faIcon{linkedin} ",
+    'github': "\\faGithub\\ ",
+}
+
+# Only the end of the log is kept; errors that stop a run are reported last
+LOG_TAIL_BYTES = 64 * 1024
+# Rendered publication entries kept across reruns; large CVs have a thousand or more
+PUBLICATION_CACHE_SIZE = 8192
+
+
+class LatexCompileError(Exception):
+    """Raised when pdflatex cannot produce a PDF.
+
+    kind is one of 'preflight', 'latex_error', 'timeout', 'cpu_limit',
+    'memory_limit', 'output_limit', 'killed', 'not_found' or, for compiles
+    sent to the compile farm, 'unavailable'. errors holds structured problems with source
+    line numbers where they are known.
+    """
+
+    def __init__(self, message: str, log: str = "", kind: str = 'latex_error',
+                 errors: Optional[List[Dict[str, Any]]] = None):
+        super().__init__(message)
+        self.log = log
+        self.kind = kind
+        self.errors = errors or []
+
+
+# Failures caused by the source itself: compiling it again fails the same way
+SOURCE_ERROR_KINDS = {'preflight', 'latex_error', 'cpu_limit', 'memory_limit', 'output_limit'}
+
+
+LATEX_SPECIALS = {
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '^': r'\textasciicircum{}',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '\\': r'\textbackslash{}'
+}
+LATEX_SPECIALS_RE = re.compile('|'.join(re.escape(char) for char in LATEX_SPECIALS))
+
+
+def escape_latex(text: str) -> str:
+    """Escape LaTeX special characters.
+
+    Done in a single pass so replacements are never escaped a second time.
+    """
+    if not text:
+        return ""
+    return LATEX_SPECIALS_RE.sub(lambda m: LATEX_SPECIALS[m.group()], text)
+
+
+def escape_url(url: str) -> str:
+    """Make a URL safe to use as the target argument of \\href"""
+    url = url.replace('\\', '%5C').replace('{', '%7B').replace('}', '%7D')
+    return url.replace('%', r'\%').replace('#', r'\#')
+
+
+def validate_formatting_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Formatting options from an untrusted source, merged over the defaults.
+
+    Numeric options are written into the preamble, so anything other than a
+    known key with an in-range number or a known profile raises ValueError.
+    """
+    unknown = sorted(set(options) - set(DEFAULT_FORMATTING_OPTIONS))
+    if unknown:
+        raise ValueError(f"Unknown formatting options: {', '.join(map(str, unknown))}")
+    fmt = {**DEFAULT_FORMATTING_OPTIONS, **options}
+    for key, (low, high) in FORMATTING_OPTION_RANGES.items():
+        value = fmt[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+            raise ValueError(f"{key} must be a number from {low} to {high}")
+        if isinstance(low, int):
+            if value != int(value):
+                raise ValueError(f"{key} must be a whole number")
+            fmt[key] = int(value)
+        else:
+            fmt[key] = float(value)
+    if fmt['package_profile'] not in PACKAGE_PROFILES:
+        raise ValueError(f"package_profile must be one of: {', '.join(PACKAGE_PROFILES)}")
+    if not isinstance(fmt['template'], str) or len(fmt['template']) > MAX_TEMPLATE_NAME:
+        raise ValueError("template must be a template name")
+    return fmt
+
+
+def package_profile(fmt: Dict[str, Any]) -> Dict[str, Any]:
+    """Package profile selected in the formatting options, 'full' if unknown"""
+    return PACKAGE_PROFILES.get(fmt.get('package_profile'), PACKAGE_PROFILES['full'])
+
+
+def _package_lines(profile: Dict[str, Any]) -> str:
+    lines = []
+    for name in profile['packages']:
+        options = PACKAGE_OPTIONS.get(name)
+        lines.append(f"\\usepackage[{options}]{{{name}}}" if options else f"\\usepackage{{{name}}}")
+    if profile['glyph_to_unicode']:
+        lines.append("\\input{glyphtounicode}")
+    return "\n".join(lines)
+
+
+def _page_style(profile: Dict[str, Any]) -> str:
+    """Page style without headers or footers"""
+    if 'fancyhdr' not in profile['packages']:
+        return "\\pagestyle{empty}"
+    return """\\pagestyle{fancy}
+\\fancyhf{}
+\\fancyfoot{}
+\\renewcommand{\\headrulewidth}{0pt}
+\\renewcommand{\\footrulewidth}{0pt}"""
+
+
+def render_latex_preamble(document: ResumeDocument, fmt: Dict[str, Any]) -> str:
+    """Document preamble, macro definitions and the name heading"""
+    profile = package_profile(fmt)
+    unicode_map = "\\pdfgentounicode=1\n\n" if profile['glyph_to_unicode'] else ""
+    return f"""\\documentclass[a4paper, {fmt['font_size']}pt]{{article}}
+{_package_lines(profile)}
+\\usepackage[a4paper, top={fmt['margin_top']}in, bottom={fmt['margin_bottom']}in, left={fmt['margin_left']}in, right={fmt['margin_right']}in]{{geometry}}
+
+{_page_style(profile)}
+
+\\setlist[itemize]{{itemsep={fmt['item_spacing']}in, topsep=4pt, bottomsep=4pt, leftmargin=0.15in}}
+\\urlstyle{{same}}
+\\raggedbottom
+\\raggedright
+\\setlength{{\\tabcolsep}}{{0in}}
+
+\\titleformat{{\\section}}{{\\vspace{{-5pt}}\\scshape\\raggedright\\large}}{{}}{{0em}}{{}}[\\color{{black}}\\titlerule \\vspace{{-5pt}}]
+
+{unicode_map}\\newcommand{{\\resumeItem}}[1]{{\\item\\small{{ #1\\vspace{{-2pt}} }}}}
+
+\\newcommand{{\\resumeSubheading}}[4]{{
+  \\vspace{{-3pt}}\\item
+  \\begin{{tabular*}}{{0.97\\textwidth}}[t]{{l@{{\\extracolsep{{\\fill}}}}r}}
+    \\textbf{{#1}} & \\small #2 \\\\
+    \\textit{{\\small#3}} & \\textit{{\\small #4}} \\\\
+  \\end{{tabular*}}\\vspace{{-5pt}}
+}}
+
+\\newcommand{{\\resumeProjectHeading}}[2]{{
+  \\item\\vspace{{-3pt}}
+  \\begin{{tabular*}}{{0.97\\textwidth}}{{l@{{\\extracolsep{{\\fill}}}}r}}
+    \\small#1 & \\small #2 \\\\
+  \\end{{tabular*}}\\vspace{{-9pt}}
+}}
+
+\\renewcommand{{\\labelitemii}}{{$\\vcenter{{\\hbox{{\\tiny$\\bullet$}}}}$}}
+
+\\newcommand{{\\resumeSubHeadingListStart}}{{\\begin{{itemize}}[leftmargin=0.15in, label={{}}]}}
+\\newcommand{{\\resumeSubHeadingListEnd}}{{\\end{{itemize}}}}
+\\newcommand{{\\resumeItemListStart}}{{\\begin{{itemize}}[leftmargin=0.2in]}}
+\\newcommand{{\\resumeItemListEnd}}{{\\end{{itemize}}\\vspace{{-4pt}}}}
+
+\\begin{{document}}
+
+\\begin{{center}}
+  \\textbf{{\\Huge \\scshape {escape_latex(document.name)}}} \\\\ \\vspace{{4pt}}
+  \\small"""
+
+
+def render_latex_contacts(document: ResumeDocument, fmt: Dict[str, Any]) -> str:
+    """Contact line under the name, closing the heading block"""
+    icons = 'fontawesome5' in package_profile(fmt)['packages']
+    contact_parts = []
+    for contact in document.contacts:
+        text = escape_latex(contact.text)
+        if contact.url:
+            text = f"\\href{{{escape_url(contact.url)}}}{{{text}}}"
+        contact_parts.append((LATEX_CONTACT_ICONS[contact.kind] if icons else "") + text)
+    return " $|$\n  ".join(contact_parts) + "\n\\end{center}\n"
+
+
+def _period(raw: str) -> str:
+    """Sentence-ending period unless the raw text already ends with punctuation"""
+    return "" if raw.endswith(('.', '?', '!')) else "."
+
+
+@lru_cache(maxsize=PUBLICATION_CACHE_SIZE)
+def render_latex_publication(title: str, authors: str, venue: str, year: str, url: str) -> str:
+    """LaTeX item for one publication, cached so unchanged entries cost a lookup"""
+    heading = f"\\textbf{{{escape_latex(title)}}}"
+    if url:
+        heading = f"\\href{{{escape_url(url)}}}{{{heading}}}"
+    parts = [escape_latex(authors) + _period(authors) if authors else "", heading + _period(title)]
+    details = ", ".join(part for part in (f"\\emph{{{escape_latex(venue)}}}" if venue else "",
+                                          escape_latex(year)) if part)
+    if details:
+        parts.append(details + _period(year or venue))
+    return "\\item " + " ".join(part for part in parts if part) + "\n"
+
+
+def render_latex_section(section: Section, fmt: Dict[str, Any]) -> str:
+    """LaTeX fragment for one section"""
+    if section.key == 'professional_summary':
+        return f"""
+\\vspace{{-0.19in}}
+\\section{{{section.title}}}
+\\begin{{itemize}}[leftmargin=0.15in, label={{}}]
+\\small \\item {escape_latex(section.text)}
+\\end{{itemize}}
+"""
+
+    latex = f"""
+\\vspace{{-{fmt['section_spacing']}in}}
+\\section{{{section.title}}}
+"""
+    if section.key == 'technical_skills':
+        latex += "\\begin{itemize}[leftmargin=0.15in, label={}]\n"
+        for entry in section.entries:
+            latex += f"\\item \\textbf{{{escape_latex(entry.title)}:}} {escape_latex(entry.subtitle)}\n"
+        return latex + "\\end{itemize}\n"
+
+    if section.key == 'publications':
+        items = [render_latex_publication(e.title, e.authors, e.subtitle, e.date, e.url) for e in section.entries]
+        return (latex + "\\begin{enumerate}[leftmargin=0.3in, label={[\\arabic*]}, itemsep=1pt]\n\\small\n"
+                + "".join(items) + "\\end{enumerate}\n")
+
+    if section.key == 'certifications':
+        latex += "\\begin{itemize}[leftmargin=0.15in, label={}]\n"
+        for entry in section.entries:
+            cert_text = f"\\textbf{{{escape_latex(entry.title)}}}"
+            if entry.subtitle:
+                if entry.url:
+                    cert_text += f" $|$ \\href{{{escape_url(entry.url)}}}{{{escape_latex(entry.subtitle)}}}"
+                else:
+                    cert_text += f" $|$ {escape_latex(entry.subtitle)}"
+            latex += f"\\small{{\\item{{{cert_text} \\vspace{{2pt}}}}\n}}\n"
+        return latex + "\\end{itemize}\n"
+
+    latex += "\\resumeSubHeadingListStart\n"
+    for entry in section.entries:
+        if section.key == 'experience':
+            latex += f"""\\resumeSubheading
+    {{{escape_latex(entry.title)}}} {{{escape_latex(entry.date)}}}
+    {{{escape_latex(entry.subtitle)}}} {{{escape_latex(entry.location)}}}
+"""
+        elif section.key == 'projects':
+            tech_stack = f" $|$ \\emph{{{escape_latex(entry.subtitle)}}}" if entry.subtitle else ""
+            latex += f"""\\resumeProjectHeading
+    {{\\textbf{{{escape_latex(entry.title)}}}{tech_stack}}}{{}}
+"""
+        elif section.key == 'education':
+            gpa_text = f"CGPA: {escape_latex(entry.note)}" if entry.note else ""
+            institution = ", ".join(escape_latex(part) for part in (entry.subtitle, entry.location) if part)
+            latex += f"""\\resumeSubheading
+    {{{escape_latex(entry.title)}}} {{{gpa_text}}}
+    {{{institution}}} {{{escape_latex(entry.date)}}}
+"""
+        if entry.bullets:
+            latex += "\\resumeItemListStart\n"
+            for bullet in entry.bullets:
+                latex += f"\\resumeItem{{{escape_latex(bullet)}}}\n"
+            latex += "\\resumeItemListEnd\n"
+    return latex + "\\resumeSubHeadingListEnd\n"
+
+
+def render_latex_fragments(document: ResumeDocument, fmt: Dict[str, Any]) -> Dict[str, str]:
+    """Document fragments in output order, keyed by 'heading' and section key"""
+    fragments = {'heading': render_latex_preamble(document, fmt) + render_latex_contacts(document, fmt)}
+    for section in document.sections:
+        fragments[section.key] = render_latex_section(section, fmt)
+    return fragments
+
+
+def join_latex_fragments(fragments: Dict[str, str]) -> str:
+    return "".join(fragments.values()) + "\n\\end{document}"
+
+
+def render_latex(document: ResumeDocument, fmt: Dict[str, Any]) -> str:
+    """LaTeX backend: walk the document model and emit a complete document"""
+    return join_latex_fragments(render_latex_fragments(document, fmt))
+
+
+def diff_latex_fragments(previous: Dict[str, str], current: Dict[str, str]) -> List[Tuple[str, str]]:
+    """Unified diffs of the fragments that changed, as (fragment key, diff) pairs"""
+    changes = []
+    for key in list(current) + [key for key in previous if key not in current]:
+        before, after = previous.get(key, ""), current.get(key, "")
+        if before != after:
+            diff = difflib.unified_diff(before.splitlines(), after.splitlines(),
+                                        f"{key} (before)", f"{key} (now)", lineterm="")
+            changes.append((key, "\n".join(diff)))
+    return changes
+
+
+def generate_latex(data: Dict[str, Any], fmt: Dict[str, Any]) -> str:
+    """Generate LaTeX code from resume data and formatting options"""
+    return render_latex(cached_document(data), fmt)
+
+
+def _limited_command(command: List[str], limits: Dict[str, Any]) -> List[str]:
+    """Wrap a command so rlimits and niceness are applied in the child.
+
+    The limits are set by prlimit (or a shell's ulimit where prlimit is not
+    available) rather than a preexec_fn, which is unsafe in threaded servers.
+    Windows has no rlimits; only the wall-clock timeout applies there.
+    """
+    cpu = int(limits['compile_cpu_seconds'])
+    memory = int(limits['compile_memory_mb']) * 1024 * 1024
+    output = int(limits['compile_output_mb']) * 1024 * 1024
+    nice = ['nice', '-n', str(int(limits['compile_nice']))]
+
+    if os.name != 'posix':
+        return command
+    if shutil.which('prlimit'):
+        # Soft limit sends SIGXCPU; the hard limit two seconds later kills outright
+        return ['prlimit', f'--cpu={cpu}:{cpu + 2}', f'--as={memory}', f'--fsize={output}', '--core=0',
+                '--'] + nice + command
+    # ulimit -f counts 512-byte blocks; some systems (macOS) cannot limit address space
+    script = (f'ulimit -S -t {cpu} && ulimit -H -t {cpu + 2} && ulimit -f {output // 512} && ulimit -c 0'
+              f' && {{ ulimit -v {memory // 1024} 2>/dev/null || true; }} && exec "$@"')
+    return ['/bin/sh', '-c', script, 'sh'] + nice + command
+
+
+def _read_tail(path: str, size: int = LOG_TAIL_BYTES) -> str:
+    """Read at most the last size bytes of a file"""
+    if not os.path.exists(path):
+        return ""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - size))
+        return f.read().decode('utf-8', errors='replace')
+
+
+def _parse_log_file(path: str) -> List[Dict[str, Any]]:
+    """Stream the first errors out of a pdflatex log file"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return list(parse_log(f))
+
+
+def _classify_failure(returncode: int, log: str, console: str) -> LatexCompileError:
+    """Turn a failed pdflatex exit into a structured error.
+
+    Allocation failures are reported on the console rather than in the log.
+    """
+    killed_by = -returncode if returncode < 0 else None
+    if killed_by == getattr(signal, 'SIGXCPU', None):
+        return LatexCompileError("PDF compilation used too much CPU time and was stopped", log, 'cpu_limit')
+    if killed_by == getattr(signal, 'SIGXFSZ', None):
+        return LatexCompileError("PDF compilation produced too much output and was stopped", log, 'output_limit')
+    lowered = console.lower()
+    if killed_by in (signal.SIGSEGV, signal.SIGABRT) or 'memory exhausted' in lowered or 'out of memory' in lowered:
+        return LatexCompileError("PDF compilation ran out of memory and was stopped", log, 'memory_limit')
+    if killed_by is not None:
+        # SIGKILL and friends come from the OOM killer or an operator, not from the document
+        return LatexCompileError(f"PDF compilation was killed by signal {killed_by}", log, 'killed')
+    return LatexCompileError("PDF compilation failed. LaTeX errors:", log, 'latex_error')
+
+
+def compile_latex(latex_content: str, limits: Optional[Dict[str, Any]] = None) -> bytes:
+    """Compile LaTeX to PDF using pdflatex under per-job resource limits.
+
+    The source is checked statically first so malformed documents are
+    rejected without spawning pdflatex.
+    """
+    issues = check_latex(latex_content)
+    if issues:
+        raise LatexCompileError("The generated LaTeX has problems that would stop compilation",
+                                kind='preflight', errors=issues)
+
+    limits = {**DEFAULT_COMPILE_LIMITS, **(limits or {})}
+    max_output = int(limits['compile_output_mb']) * 1024 * 1024
+    # Checked up front: the limit wrapper would report a missing pdflatex as an ordinary failure
+    if shutil.which('pdflatex') is None:
+        raise LatexCompileError("pdflatex not found. Please install TeX Live or MiKTeX", kind='not_found')
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            tex_file = os.path.join(temp_dir, "resume.tex")
+            pdf_file = os.path.join(temp_dir, "resume.pdf")
+            log_file = os.path.join(temp_dir, "resume.log")
+            console_file = os.path.join(temp_dir, "console.txt")
+            
+            # Write LaTeX content to file
+            with open(tex_file, 'w', encoding='utf-8') as f:
+                f.write(latex_content)
+            
+            # Console output goes to disk (capped by RLIMIT_FSIZE) instead of memory
+            with open(console_file, 'wb') as console:
+                result = subprocess.run(_limited_command([
+                    'pdflatex', '-interaction=nonstopmode', '-halt-on-error', '-no-shell-escape',
+                    '-output-directory', temp_dir, tex_file
+                ], limits), stdin=subprocess.DEVNULL, stdout=console, stderr=subprocess.STDOUT,
+                    timeout=float(limits['compile_timeout']))
+            
+            if result.returncode == 0 and os.path.exists(pdf_file):
+                if os.path.getsize(pdf_file) > max_output:
+                    raise LatexCompileError("Generated PDF exceeds the output size limit", kind='output_limit')
+                with open(pdf_file, 'rb') as f:
+                    return f.read()
+            console_tail = _read_tail(console_file)
+            error = _classify_failure(result.returncode, _read_tail(log_file) or console_tail, console_tail)
+            error.errors = _parse_log_file(log_file)
+            raise error
+                
+    except subprocess.TimeoutExpired:
+        raise LatexCompileError("PDF compilation timed out", kind='timeout')
+    except FileNotFoundError:
+        raise LatexCompileError("pdflatex not found. Please install TeX Live or MiKTeX", kind='not_found')
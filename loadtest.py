@@ -0,0 +1,266 @@
+"""
+Load Test Harness
+Simulates concurrent users editing, saving and compiling resumes and reports
+latency percentiles, throughput and error rates for each concurrency level.
+
+Targets:
+    headless  in-process generate_latex plus compiles behind the app's
+              CompileGate, with a local in-memory store standing in for
+              Firestore (default)
+    http      a running render_api.py instance
+
+By default compiles use a stand-in that sleeps for a realistic duration, so
+the harness runs offline without a TeX installation; pass --real-compiler to
+run pdflatex.
+
+Usage:
+    python loadtest.py --concurrency 1,4,8,16 --duration 20
+    python loadtest.py --target http --url http://127.0.0.1:8080 --concurrency 8
+
+Simulated users identify themselves with X-Client-Id, which render_api only
+honours from a trusted proxy; start it with --trusted-proxy 127.0.0.1 so each
+user gets their own rate limit.
+"""
+
+import argparse
+import copy
+import http.client
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Optional
+from urllib.parse import urlparse
+
+from compile_admission import CompileGate, CompileRejected
+from latex_renderer import generate_latex, compile_latex, DEFAULT_FORMATTING_OPTIONS
+
+SAMPLE_RESUME = {
+    "personal_info": {"name": "Load Test", "phone": "+1-555-000-0000", "email": "load@test.local",
+                      "linkedin": "linkedin.com/in/loadtest", "github": "github.com/loadtest"},
+    "professional_summary": "Engineer used to exercise the rendering pipeline under load.",
+    "technical_skills": [{"category": "Languages", "skills": "Python, Go, SQL"}],
+    "experience": [{
+        "title": "Engineer", "company": "Example Co", "location": "Remote", "dates": "2020 - Present",
+        "bullets": [f"Delivered improvement number {i} with measurable impact" for i in range(5)]
+    } for _ in range(3)],
+    "projects": [{"name": "Benchmark", "tech_stack": "Python", "bullets": ["Measured things", "Fixed things"]}],
+    "education": [{"degree": "BSc Computer Science", "institution": "Example University",
+                   "location": "Boston, MA", "dates": "2016-2020", "gpa": "3.9"}],
+    "certifications": [],
+    "section_order": ["professional_summary", "technical_skills", "experience", "projects", "education", "certifications"],
+    "custom_sections": {}
+}
+
+
+class LocalResumeStore:
+    """In-memory stand-in for the Firestore resumes collection"""
+
+    def __init__(self, latency_ms: float = 20.0):
+        self.latency = latency_ms / 1000.0
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def _wait(self):
+        time.sleep(random.uniform(0.5, 1.5) * self.latency)
+
+    def save(self, doc_id: str, data: Dict[str, Any]):
+        self._wait()
+        with self.lock:
+            self.docs[doc_id] = copy.deepcopy(data)
+
+    def load(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        self._wait()
+        with self.lock:
+            return copy.deepcopy(self.docs.get(doc_id))
+
+
+def fake_compiler(mean_ms: float) -> Callable[[str], bytes]:
+    """Stand-in for pdflatex: sleeps for a jittered compile time"""
+    def compile_fn(latex: str) -> bytes:
+        time.sleep(random.lognormvariate(0, 0.25) * mean_ms / 1000.0)
+        return b"%PDF-1.4\n" + latex[:64].encode('utf-8')
+    return compile_fn
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    """Thread-safe collection of per-step latencies and outcomes"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+
+    def record(self, step: str, seconds: float, outcome: str = 'ok'):
+        with self.lock:
+            if outcome == 'ok':
+                self.samples.setdefault(step, []).append(seconds)
+            elif outcome == 'rejected':
+                self.rejected[step] = self.rejected.get(step, 0) + 1
+            else:
+                self.errors[step] = self.errors.get(step, 0) + 1
+
+    def timed(self, step: str, fn: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            result = fn()
+        except CompileRejected:
+            self.record(step, 0.0, 'rejected')
+            return None
+        except Exception:
+            self.record(step, 0.0, 'error')
+            return None
+        self.record(step, time.perf_counter() - started)
+        return result
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        steps = {}
+        for step in sorted(set(self.samples) | set(self.errors) | set(self.rejected)):
+            values = sorted(self.samples.get(step, []))
+            total = len(values) + self.errors.get(step, 0) + self.rejected.get(step, 0)
+            steps[step] = {
+                'count': total,
+                'throughput_per_s': round(len(values) / elapsed, 2) if elapsed else 0.0,
+                'p50_ms': round(percentile(values, 50) * 1000, 1),
+                'p95_ms': round(percentile(values, 95) * 1000, 1),
+                'p99_ms': round(percentile(values, 99) * 1000, 1),
+                'error_rate': round(self.errors.get(step, 0) / total, 4) if total else 0.0,
+                'rejected_rate': round(self.rejected.get(step, 0) / total, 4) if total else 0.0,
+            }
+        return steps
+
+
+def edit_resume(data: Dict[str, Any], iteration: int):
+    """Apply a small realistic edit, like typing into one bullet"""
+    experience = random.choice(data['experience'])
+    index = random.randrange(len(experience['bullets']))
+    experience['bullets'][index] = f"Delivered improvement {iteration} with {random.randint(5, 95)}% impact"
+
+
+def headless_session(recorder: Recorder, store: LocalResumeStore, gate: CompileGate,
+                     compile_fn: Callable[[str], bytes], deadline: float, think_ms: float):
+    """One simulated user driving the in-process rendering path"""
+    user = str(uuid.uuid4())
+    data = copy.deepcopy(SAMPLE_RESUME)
+    fmt = dict(DEFAULT_FORMATTING_OPTIONS)
+    iteration = 0
+    while time.monotonic() < deadline:
+        iteration += 1
+        edit_resume(data, iteration)
+        latex = recorder.timed('generate', lambda: generate_latex(data, fmt))
+        recorder.timed('save', lambda: store.save(user, {'resume_data': data, 'formatting_options': fmt}))
+        if latex is not None:
+            recorder.timed('compile', lambda: gate.run(user, compile_fn, latex))
+        time.sleep(random.uniform(0.5, 1.5) * think_ms / 1000.0)
+
+
+def http_session(recorder: Recorder, url: str, deadline: float, think_ms: float):
+    """One simulated user driving a running render_api over a keep-alive connection"""
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+    client_id = str(uuid.uuid4())
+    data = copy.deepcopy(SAMPLE_RESUME)
+    iteration = 0
+
+    def post(path: str) -> bytes:
+        body = json.dumps({'resume_data': data})
+        conn.request('POST', path, body, {'Content-Type': 'application/json', 'X-Client-Id': client_id})
+        response = conn.getresponse()
+        payload = response.read()
+        if response.status in (429, 503):
+            raise CompileRejected(payload.decode('utf-8', 'replace'), 0.0, str(response.status))
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        return payload
+
+    try:
+        while time.monotonic() < deadline:
+            iteration += 1
+            edit_resume(data, iteration)
+            recorder.timed('render_tex', lambda: post('/render/tex'))
+            recorder.timed('render_pdf', lambda: post('/render/pdf'))
+            time.sleep(random.uniform(0.5, 1.5) * think_ms / 1000.0)
+    finally:
+        conn.close()
+
+
+def run_level(args, concurrency: int) -> Dict[str, Any]:
+    """Run one concurrency level and return its report"""
+    recorder = Recorder()
+    deadline = time.monotonic() + args.duration
+    started = time.monotonic()
+
+    if args.target == 'http':
+        jobs = [lambda: http_session(recorder, args.url, deadline, args.think_ms)] * concurrency
+    else:
+        store = LocalResumeStore(args.store_latency_ms)
+        gate = CompileGate({
+            'compile_rate_per_minute': args.rate_per_minute,
+            'compile_burst': max(1, int(args.rate_per_minute // 6)),
+            'max_concurrent_compiles': args.compile_workers,
+            'max_queued_compiles': args.max_queued,
+        })
+        compile_fn = compile_latex if args.real_compiler else fake_compiler(args.compile_ms)
+        jobs = [lambda: headless_session(recorder, store, gate, compile_fn, deadline, args.think_ms)] * concurrency
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(job) for job in jobs]:
+            future.result()
+
+    return {'concurrency': concurrency, 'steps': recorder.report(time.monotonic() - started)}
+
+
+def print_report(results: List[Dict[str, Any]]):
+    header = f"{'users':>5} {'step':<11} {'count':>6} {'ops/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'shed':>6}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        for step, stats in result['steps'].items():
+            print(f"{result['concurrency']:>5} {step:<11} {stats['count']:>6} {stats['throughput_per_s']:>7} "
+                  f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} "
+                  f"{stats['error_rate']:>7.1%} {stats['rejected_rate']:>6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the resume rendering pipeline")
+    parser.add_argument('--target', choices=['headless', 'http'], default='headless')
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help="render_api base URL for --target http")
+    parser.add_argument('--concurrency', default='1,2,4,8,16', help="Comma-separated user counts to sweep")
+    parser.add_argument('--duration', type=float, default=15.0, help="Seconds per concurrency level")
+    parser.add_argument('--think-ms', type=float, default=500.0, help="Mean pause between user actions")
+    parser.add_argument('--compile-ms', type=float, default=1500.0, help="Mean stand-in compile time")
+    parser.add_argument('--store-latency-ms', type=float, default=20.0, help="Stand-in storage latency")
+    parser.add_argument('--compile-workers', type=int, default=4, help="Concurrent compiles (headless)")
+    parser.add_argument('--max-queued', type=int, default=8, help="Queued compiles before shedding (headless)")
+    parser.add_argument('--rate-per-minute', type=float, default=600.0, help="Per-user compile rate (headless)")
+    parser.add_argument('--real-compiler', action='store_true', help="Run pdflatex instead of the stand-in")
+    parser.add_argument('--json', help="Also write the full report to this file")
+    args = parser.parse_args()
+
+    results = []
+    for level in [int(n) for n in args.concurrency.split(',') if n.strip()]:
+        print(f"▶ {level} concurrent users for {args.duration:.0f}s...")
+        results.append(run_level(args, level))
+
+    print()
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Full report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
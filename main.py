@@ -1,15 +1,36 @@
 import streamlit as st
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
+import io
 import json
 import os
 from datetime import datetime
-import subprocess
 import tempfile
 import requests
 import base64
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple, Callable
+import functools
+import time
 import uuid
+from resume_search import ResumeSearchIndex, build_index_entry, load_entries
+from resume_history import ResumeHistory, canonical_json, content_hash
+from resume_document import cached_document, SECTION_TITLES
+from latex_renderer import generate_latex, compile_latex, LatexCompileError, DEFAULT_COMPILE_LIMITS, DEFAULT_FORMATTING_OPTIONS
+from latex_renderer import PACKAGE_PROFILES
+from latex_renderer import render_latex_fragments, join_latex_fragments, diff_latex_fragments
+from resume_formats import render_formats, FILE_TYPES
+from bibtex import import_publications
+from resume_transfer import iter_resume_docs, export_archive, import_archive
+from firestore_batch import duplicate_resumes, delete_resumes, backfill_search_index
+from compile_admission import CompileGate, CompileRejected, DEFAULT_LIMITS
+from latex_preflight import annotate_issues
+from blob_store import BlobStore, DEFAULT_STORE_DIR, DEFAULT_STORE_MB
+from resume_listener import ListenerHub, firestore_starter, start_empty, DEFAULT_POLL_SECONDS, READY_TIMEOUT
+from write_behind import WriteBehindQueue, FirestoreWriter
+from page_preview import (ThumbnailCache, ThumbnailService, RasterError, DEFAULT_PREVIEW_DPI, PREVIEW_DPI_CHOICES,
+                          DEFAULT_THUMBNAIL_LIMITS, DEFAULT_THUMBNAIL_STORE_DIR, DEFAULT_THUMBNAIL_STORE_MB)
+from compile_farm import CompileFarm, DEFAULT_FARM_CONCURRENCY, DEFAULT_WAIT_SECONDS
+from tex_env import TexEnvironment, TexEnvironmentCache, DEFAULT_CACHE_PATH
 
 # Configure Streamlit page
 st.set_page_config(
@@ -49,6 +70,138 @@ def init_firebase():
 # Initialize Firebase
 db = init_firebase()
 
+@st.cache_resource
+def get_compile_gate() -> CompileGate:
+    """Compile rate limits and admission control shared by all sessions"""
+    try:
+        limits = {key: st.secrets.get(key, default) for key, default in DEFAULT_LIMITS.items()}
+        if st.secrets.get("compile_farm_db"):
+            # Farm compiles only wait on this node, so its CPU count must not cap them
+            limits['max_concurrent_compiles'] = st.secrets.get("farm_max_concurrent_compiles",
+                                                               DEFAULT_FARM_CONCURRENCY)
+    except Exception:
+        limits = {}
+    return CompileGate(limits)
+
+@st.cache_resource
+def get_artifact_store() -> BlobStore:
+    """Size-bounded store for generated PDFs shared by all sessions"""
+    try:
+        root = st.secrets.get("artifact_store_dir", DEFAULT_STORE_DIR)
+        max_mb = st.secrets.get("artifact_store_mb", DEFAULT_STORE_MB)
+    except Exception:
+        root, max_mb = DEFAULT_STORE_DIR, DEFAULT_STORE_MB
+    return BlobStore(root, int(max_mb) * 1024 * 1024)
+
+@st.cache_resource
+def get_artifact_base_url() -> Optional[str]:
+    """Public URL of a rendering API serving the artifact store, if one is deployed"""
+    try:
+        base_url = st.secrets.get("artifact_base_url")
+    except Exception:
+        base_url = None
+    return base_url.rstrip('/') if base_url else None
+
+@st.cache_resource
+def get_compile_limits() -> Dict[str, Any]:
+    """Per-job pdflatex resource limits, overridable through secrets"""
+    try:
+        return {key: st.secrets.get(key, default) for key, default in DEFAULT_COMPILE_LIMITS.items()}
+    except Exception:
+        return dict(DEFAULT_COMPILE_LIMITS)
+
+@st.cache_resource
+def get_compile_backend() -> Callable[..., bytes]:
+    """Local pdflatex, or the shared compile farm when compile_farm_db is set"""
+    try:
+        farm_db = st.secrets.get("compile_farm_db", "")
+        wait_seconds = float(st.secrets.get("compile_farm_wait_seconds", DEFAULT_WAIT_SECONDS))
+    except Exception:
+        farm_db = ""
+    if not farm_db:
+        return compile_latex
+    # The journal mode is set once with `compile_farm.py init`, never by app nodes
+    farm = CompileFarm(farm_db)
+    return functools.partial(farm.compile, timeout=wait_seconds)
+
+@st.cache_resource
+def get_tex_environment_cache() -> TexEnvironmentCache:
+    """TeX toolchain probe, cached on disk and re-checked when the toolchain changes"""
+    try:
+        cache_path = st.secrets.get("tex_env_cache", DEFAULT_CACHE_PATH)
+    except Exception:
+        cache_path = DEFAULT_CACHE_PATH
+    return TexEnvironmentCache(cache_path)
+
+def get_tex_environment() -> TexEnvironment:
+    return get_tex_environment_cache().get()
+
+SAVING_DISABLED_MESSAGE = "Saving is disabled: set write_queue_dir to a directory on a persistent disk"
+
+@st.cache_resource
+def get_write_queue() -> Optional[WriteBehindQueue]:
+    """Durable local queue that applies saves and deletes in the background; None disables saving"""
+    try:
+        root = st.secrets.get("write_queue_dir")
+    except Exception:
+        root = None
+    if not root:
+        # Acknowledged writes exist only in this log until they reach Firestore
+        return None
+    return WriteBehindQueue(root, FirestoreWriter(db).apply)
+
+@st.cache_resource
+def get_listener_hub() -> ListenerHub:
+    """Resume list listeners, one per user, shared by all sessions"""
+    try:
+        poll_only = st.secrets.get("resume_list_mode", "listen") == "poll"
+        interval = float(st.secrets.get("resume_list_poll_seconds", DEFAULT_POLL_SECONDS))
+    except Exception:
+        poll_only, interval = False, DEFAULT_POLL_SECONDS
+    if db is None:
+        # Without Firestore nothing can be saved, so every list stays empty
+        return ListenerHub(start_empty)
+    return ListenerHub(firestore_starter(db, poll_only, interval))
+
+@st.cache_resource
+def get_thumbnail_service() -> ThumbnailService:
+    """Background compile-and-rasterize pipeline for page previews"""
+    compile_fn = functools.partial(get_compile_backend(), limits=get_compile_limits())
+    try:
+        limits = {key: st.secrets.get(f"thumbnail_{key}", default)
+                  for key, default in DEFAULT_THUMBNAIL_LIMITS.items()}
+        root = st.secrets.get("thumbnail_store_dir", DEFAULT_THUMBNAIL_STORE_DIR)
+        max_mb = st.secrets.get("thumbnail_store_mb", DEFAULT_THUMBNAIL_STORE_MB)
+    except Exception:
+        limits, root, max_mb = dict(DEFAULT_THUMBNAIL_LIMITS), DEFAULT_THUMBNAIL_STORE_DIR, DEFAULT_THUMBNAIL_STORE_MB
+    # Own buckets and store; the compile slots are shared with interactive compiles
+    gate = CompileGate(limits, admission=get_compile_gate().admission)
+    return ThumbnailService(ThumbnailCache(BlobStore(root, int(max_mb) * 1024 * 1024)), gate, compile_fn)
+
+def get_preview_dpi() -> int:
+    try:
+        dpi = int(st.secrets.get("preview_dpi", DEFAULT_PREVIEW_DPI))
+    except Exception:
+        dpi = DEFAULT_PREVIEW_DPI
+    return dpi if dpi in PREVIEW_DPI_CHOICES else DEFAULT_PREVIEW_DPI
+
+# How long a duplicate waits for queued writes to its sources to sync
+DUPLICATE_SYNC_TIMEOUT = 10.0
+
+# How often an open page checks its resume list feed for changes
+RESUME_LIST_CHECK_SECONDS = 3.0
+
+# Publications shown per editor page; only these get widgets on a rerun
+PUBLICATIONS_PAGE_SIZE = 10
+
+# Edits closer together than this are treated as typing and do not re-render the preview
+PREVIEW_DEBOUNCE_SECONDS = 1.5
+PREVIEW_VIEWS = ["📄 LaTeX Preview", "🖼️ Page Preview", "🔀 Changed Sections", "📤 Export Options"]
+PACKAGE_PROFILE_LABELS = {
+    'full': "Full (icons, best text extraction)",
+    'lean': "Lean (faster compiles, no icons)",
+}
+
 # LaTeX Templates
 LATEX_TEMPLATES = {
     "Standard Single-Column": {
@@ -150,7 +303,8 @@ DEFAULT_RESUME_DATA = {
             "link": "https://aws.amazon.com/certification/"
         }
     ],
-    "section_order": ["professional_summary", "technical_skills", "experience", "projects", "education", "certifications"],
+    "publications": [],
+    "section_order": ["professional_summary", "technical_skills", "experience", "projects", "education", "publications", "certifications"],
     "custom_sections": {}
 }
 
@@ -164,16 +318,7 @@ class ResumeBuilder:
             st.session_state.resume_data = DEFAULT_RESUME_DATA.copy()
         
         if 'formatting_options' not in st.session_state:
-            st.session_state.formatting_options = {
-                'template': 'Standard Single-Column',
-                'margin_top': 0.5,
-                'margin_bottom': 0.5, 
-                'margin_left': 0.5,
-                'margin_right': 0.5,
-                'font_size': 11,
-                'item_spacing': 0.04,
-                'section_spacing': 0.15
-            }
+            st.session_state.formatting_options = dict(DEFAULT_FORMATTING_OPTIONS)
         
         if 'user_authenticated' not in st.session_state:
             st.session_state.user_authenticated = False
@@ -184,6 +329,22 @@ class ResumeBuilder:
         if 'user_resumes' not in st.session_state:
             st.session_state.user_resumes = []
 
+        if 'session_key' not in st.session_state:
+            st.session_state.session_key = str(uuid.uuid4())
+
+        if 'search_index' not in st.session_state:
+            st.session_state.search_index = None
+
+        if 'resume_history' not in st.session_state:
+            st.session_state.resume_history = None
+
+        if 'preview' not in st.session_state:
+            st.session_state.preview = None
+            st.session_state.preview_pending = None
+            st.session_state.last_edit_at = 0.0
+            st.session_state.refresh_preview = False
+            st.session_state.preview_stale = False
+
     def render_authentication(self):
         """Render authentication interface"""
         st.sidebar.markdown("### 🔐 Authentication")
@@ -243,10 +404,15 @@ class ResumeBuilder:
 
     def logout_user(self):
         """Logout user and clear session"""
+        if st.session_state.get('user_id'):
+            get_listener_hub().release(st.session_state.user_id, st.session_state.session_key)
         st.session_state.user_authenticated = False
         st.session_state.user_email = ""
         st.session_state.user_id = ""
         st.session_state.user_resumes = []
+        st.session_state.search_index = None
+        st.session_state.resume_history = None
+        st.session_state.bulk_outcomes = []
         st.success("👋 Logged out successfully!")
         st.rerun()
 
@@ -258,10 +424,18 @@ class ResumeBuilder:
         
         st.sidebar.markdown("### 📁 My Resumes")
         
-        # Load saved resumes
-        if st.sidebar.button("🔄 Refresh Resumes"):
-            self.load_user_resumes()
+        # The list is kept current by a listener; this only reads its memory
+        self.load_user_resumes()
+        self.watch_resume_feed()
+        if db:
+            self.render_sync_status()
         
+        # Full-text search across saved resumes
+        search_query = st.sidebar.text_input("🔍 Search Resumes", key="resume_search_query",
+                                             placeholder="Skill, company, bullet text...")
+        if search_query:
+            self.render_search_results(search_query)
+
         # Resume selection dropdown
         if st.session_state.user_resumes:
             selected_resume = st.sidebar.selectbox(
@@ -276,18 +450,28 @@ class ResumeBuilder:
                     
                 if st.sidebar.button(f"🗑️ Delete '{selected_resume}'", key=f"delete_{selected_resume}"):
                     self.delete_resume(selected_resume)
+
+                with st.sidebar.expander("🕘 Version History"):
+                    self.render_version_history(selected_resume)
+
+            with st.sidebar.expander("☑️ Bulk Actions"):
+                self.render_bulk_actions()
         
         # Save current resume
         st.sidebar.markdown("---")
         with st.sidebar.form("save_resume_form"):
             resume_name = st.text_input("Resume Name")
             resume_description = st.text_area("Description (optional)", height=60)
-            if st.form_submit_button("💾 Save Resume"):
+            if st.form_submit_button("💾 Save Resume", disabled=get_write_queue() is None):
                 if resume_name:
                     self.save_resume(resume_name, resume_description)
                 else:
                     st.error("Please enter a resume name")
         
+        # Bulk export / import
+        with st.sidebar.expander("📦 Export / Import"):
+            self.render_bulk_transfer()
+        
         # Quick actions
         col1, col2 = st.sidebar.columns(2)
         with col1:
@@ -297,45 +481,59 @@ class ResumeBuilder:
             if st.button("📋 Sample Resume"):
                 self.load_sample_resume()
 
+    def get_resume_feed(self):
+        """Listener-maintained resume list shared by this user's sessions"""
+        feed = get_listener_hub().acquire(st.session_state.user_id, st.session_state.session_key)
+        feed.ready.wait(READY_TIMEOUT)
+        return feed
+
     def load_user_resumes(self):
-        """Load user's saved resumes from Firestore"""
-        if not db or not st.session_state.user_authenticated:
+        """Load user's saved resumes from the listener feed"""
+        if not st.session_state.user_authenticated:
             return
-        
-        try:
-            docs = db.collection('resumes').where('user_id', '==', st.session_state.user_id).stream()
-            resumes = []
-            for doc in docs:
-                data = doc.to_dict()
-                resumes.append({
-                    'id': doc.id,
-                    'name': data.get('name', 'Untitled'),
-                    'description': data.get('description', ''),
-                    'created_at': data.get('created_at'),
-                    'updated_at': data.get('updated_at')
-                })
-            st.session_state.user_resumes = resumes
-        except Exception as e:
-            st.sidebar.error(f"Failed to load resumes: {str(e)}")
+
+        feed = self.get_resume_feed()
+        if feed.error:
+            st.sidebar.error(feed.error)
+        # Read the version first so a change made meanwhile still triggers a rerun
+        st.session_state.resume_feed_version = feed.version
+        st.session_state.user_resumes = feed.snapshot()
+
+    @st.fragment(run_every=RESUME_LIST_CHECK_SECONDS)
+    def watch_resume_feed(self):
+        """Rerun the app when the listener changed the resume list since it was shown"""
+        feed = self.get_resume_feed()
+        if feed.version != st.session_state.get('resume_feed_version'):
+            st.rerun()
 
     def save_resume(self, name: str, description: str = ""):
-        """Save current resume to Firestore"""
+        """Queue the current resume for saving to Firestore"""
         if not db or not st.session_state.user_authenticated:
             st.error("Authentication required to save resume")
             return
+        queue = get_write_queue()
+        if queue is None:
+            # The sidebar already says saving is disabled
+            return
         
         try:
-            resume_data = {
+            # Saving under an existing name adds a version instead of a new copy
+            existing = next((r for r in st.session_state.user_resumes if r['name'] == name), None)
+            resume_id = existing['id'] if existing else db.collection('resumes').document().id
+            payload = {
                 'name': name,
                 'description': description,
-                'user_id': st.session_state.user_id,
                 'resume_data': st.session_state.resume_data,
-                'formatting_options': st.session_state.formatting_options,
-                'created_at': datetime.now(),
-                'updated_at': datetime.now()
+                'formatting_options': st.session_state.formatting_options
             }
-            
-            db.collection('resumes').add(resume_data)
+            # Acknowledged once it is in the local log; Firestore is written in the background
+            queue.enqueue('save', st.session_state.user_id, resume_id, payload)
+
+            if st.session_state.search_index is not None:
+                st.session_state.search_index.add(resume_id, build_index_entry(name, st.session_state.resume_data))
+            self.get_resume_feed().apply([('MODIFIED', resume_id, {
+                **(existing or {}), 'name': name, 'description': description, 'updated_at': datetime.now()
+            })])
             st.sidebar.success(f"✅ Resume '{name}' saved!")
             self.load_user_resumes()
         except Exception as e:
@@ -345,10 +543,16 @@ class ResumeBuilder:
         """Load a saved resume"""
         try:
             resume = next(r for r in st.session_state.user_resumes if r['name'] == resume_name)
-            doc = db.collection('resumes').document(resume['id']).get()
-            
-            if doc.exists:
-                data = doc.to_dict()
+            # A save still waiting in the queue is newer than what Firestore has
+            queue = get_write_queue()
+            pending = queue.pending_op(st.session_state.user_id, resume['id']) if queue else None
+            if pending and pending['op'] == 'save':
+                data = pending['payload']
+            else:
+                doc = db.collection('resumes').document(resume['id']).get()
+                data = doc.to_dict() if doc.exists else None
+
+            if data:
                 st.session_state.resume_data = data['resume_data']
                 st.session_state.formatting_options = data['formatting_options']
                 st.success(f"✅ Loaded resume '{resume_name}'")
@@ -357,15 +561,263 @@ class ResumeBuilder:
             st.error(f"Failed to load resume: {str(e)}")
 
     def delete_resume(self, resume_name: str):
-        """Delete a saved resume"""
+        """Delete a saved resume, through the write queue when there is one"""
         try:
             resume = next(r for r in st.session_state.user_resumes if r['name'] == resume_name)
-            db.collection('resumes').document(resume['id']).delete()
+            outcome = self.delete_selected_resumes([resume['id']])[0]
+            if not outcome['ok']:
+                raise RuntimeError(outcome['error'])
             st.sidebar.success(f"🗑️ Deleted resume '{resume_name}'")
             self.load_user_resumes()
         except Exception as e:
             st.sidebar.error(f"Failed to delete resume: {str(e)}")
 
+    def render_sync_status(self):
+        """Show queued writes that have not reached Firestore yet"""
+        queue = get_write_queue()
+        if queue is None:
+            st.sidebar.warning(f"⚠️ {SAVING_DISABLED_MESSAGE}")
+            return
+        status = queue.status(st.session_state.user_id)
+        if status['pending']:
+            st.sidebar.caption(f"⏳ {status['pending']} resume(s) waiting to sync")
+        names = {r['id']: r['name'] for r in st.session_state.user_resumes}
+        for resume_id, error in status['failed'].items():
+            st.sidebar.error(f"❌ Could not save '{names.get(resume_id, resume_id)}': {error}")
+
+    def delete_selected_resumes(self, resume_ids: List[str]) -> List[Dict[str, Any]]:
+        """Delete resumes; queued deletes stay ordered after saves still waiting to sync"""
+        queue = get_write_queue()
+        if queue is None:
+            # Nothing can be waiting to sync, so delete right away
+            outcomes = delete_resumes(db, st.session_state.user_id, resume_ids)
+            deleted = [o['id'] for o in outcomes if o['ok']]
+            if deleted:
+                self.get_history().delete_histories(deleted)
+        else:
+            for resume_id in resume_ids:
+                queue.enqueue('delete', st.session_state.user_id, resume_id)
+            outcomes = [{'id': resume_id, 'ok': True, 'error': None} for resume_id in resume_ids]
+            deleted = resume_ids
+        self.get_resume_feed().apply(('REMOVED', resume_id, None) for resume_id in deleted)
+        if st.session_state.search_index is not None:
+            for resume_id in deleted:
+                st.session_state.search_index.remove(resume_id)
+        return outcomes
+
+    def duplicate_selected_resumes(self, resume_ids: List[str]) -> List[Dict[str, Any]]:
+        """Copy resumes once their queued writes have reached Firestore"""
+        queue = get_write_queue()
+        if queue is not None and not queue.flush(DUPLICATE_SYNC_TIMEOUT, st.session_state.user_id, resume_ids):
+            message = "Still syncing earlier changes; try again shortly"
+            return [{'id': resume_id, 'ok': False, 'error': message} for resume_id in resume_ids]
+        return duplicate_resumes(db, st.session_state.user_id, resume_ids)
+
+    def render_bulk_actions(self):
+        """Render multi-select delete and duplicate with per-resume outcomes"""
+        names = {r['id']: r['name'] for r in st.session_state.user_resumes}
+        selected = st.multiselect("Resumes", options=list(names), format_func=names.get, key="bulk_selection")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            delete_clicked = st.button("🗑️ Delete", key="bulk_delete", disabled=not selected)
+        with col2:
+            duplicate_clicked = st.button("📑 Duplicate", key="bulk_duplicate", disabled=not selected)
+        
+        if delete_clicked or duplicate_clicked:
+            try:
+                with st.spinner("Applying to selected resumes..."):
+                    if delete_clicked:
+                        outcomes = self.delete_selected_resumes(selected)
+                    else:
+                        outcomes = self.duplicate_selected_resumes(selected)
+                        # Copies were indexed server-side; reload the index on next search
+                        st.session_state.search_index = None
+                st.session_state.bulk_outcomes = [dict(o, name=names.get(o['id'], o['id'])) for o in outcomes]
+                self.load_user_resumes()
+            except Exception as e:
+                st.error(f"Bulk action failed: {str(e)}")
+        
+        for outcome in st.session_state.get('bulk_outcomes', []):
+            if outcome['ok']:
+                st.caption(f"✅ {outcome['name']}")
+            else:
+                st.caption(f"❌ {outcome['name']}: {outcome['error']}")
+
+    def get_search_index(self) -> ResumeSearchIndex:
+        """Load the user's search index entries, indexing resumes saved before search existed"""
+        if st.session_state.search_index is None:
+            user_id = st.session_state.user_id
+            entries = load_entries(db, user_id)
+            entries.update(backfill_search_index(db, user_id, [r['id'] for r in st.session_state.user_resumes], entries))
+            st.session_state.search_index = ResumeSearchIndex.from_entries(entries)
+        return st.session_state.search_index
+
+    def get_history(self) -> ResumeHistory:
+        """Version history accessor for the logged-in user"""
+        if st.session_state.resume_history is None:
+            st.session_state.resume_history = ResumeHistory(db, st.session_state.user_id)
+        return st.session_state.resume_history
+
+    def render_version_history(self, resume_name: str):
+        """Render version list, diff view and restore for a saved resume"""
+        resume = next((r for r in st.session_state.user_resumes if r['name'] == resume_name), None)
+        if not db or not resume:
+            return
+
+        try:
+            versions = self.get_history().list_versions(resume['id'])
+        except Exception as e:
+            st.error(f"Failed to load history: {str(e)}")
+            return
+
+        if not versions:
+            st.caption("No versions recorded yet")
+            return
+
+        labels = {
+            v['version']: f"v{v['version']} · {v['created_at']:%Y-%m-%d %H:%M}" if v['created_at'] else f"v{v['version']}"
+            for v in versions
+        }
+        numbers = [v['version'] for v in reversed(versions)]
+        selected = st.selectbox("Version", numbers, format_func=labels.get, key=f"history_version_{resume['id']}")
+        compare = st.selectbox("Compare with", numbers, index=min(1, len(numbers) - 1),
+                               format_func=labels.get, key=f"history_compare_{resume['id']}")
+
+        by_number = {v['version']: v for v in versions}
+        try:
+            diffs = self.get_history().diff(resume['id'], by_number[compare]['manifest'],
+                                            by_number[selected]['manifest'])
+        except Exception as e:
+            st.error(f"Failed to compare versions: {str(e)}")
+            diffs = []
+
+        if selected != compare and not diffs:
+            st.caption("No differences")
+        for section_diff in diffs:
+            st.markdown(f"**{section_diff['section'].replace('_', ' ').title()}**")
+            st.code(section_diff['diff'], language='diff')
+
+        if st.button(f"⏪ Restore v{selected}", key=f"history_restore_{resume['id']}"):
+            try:
+                resume_data, formatting_options = self.get_history().restore(
+                    resume['id'], by_number[selected]['manifest']
+                )
+                st.session_state.resume_data = resume_data
+                st.session_state.formatting_options.update(formatting_options)
+                st.success(f"✅ Restored version {selected}. Save to keep it as the latest version.")
+                st.rerun()
+            except Exception as e:
+                st.error(f"Failed to restore version: {str(e)}")
+
+    def render_search_results(self, query: str):
+        """Render search matches with snippets in the sidebar"""
+        if not db:
+            return
+
+        try:
+            results = self.get_search_index().search(query)
+        except Exception as e:
+            st.sidebar.error(f"Search failed: {str(e)}")
+            return
+
+        if not results:
+            st.sidebar.caption("No matching resumes")
+            return
+
+        for result in results:
+            st.sidebar.markdown(f"**{result['name']}**")
+            for snippet in result['snippets']:
+                st.sidebar.caption(f"{snippet['section'].replace('_', ' ').title()}: {snippet['text']}")
+
+    def render_bulk_transfer(self):
+        """Render streaming export and import of all saved resumes"""
+        archive_format = st.radio("Format", ["zip", "ndjson"], horizontal=True, key="export_format")
+        include_pdf = st.checkbox("Include compiled PDFs", key="export_include_pdf",
+                                  help="Compiles every resume, which takes longer")
+        
+        if st.button("📦 Prepare Export"):
+            self.export_resumes(archive_format, include_pdf)
+        
+        export_path = st.session_state.get('export_path')
+        if export_path and os.path.exists(export_path):
+            with open(export_path, 'rb') as f:
+                st.download_button(
+                    label="📥 Download Archive",
+                    data=f,
+                    file_name=f"resumes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{archive_format}",
+                    mime="application/zip" if archive_format == "zip" else "application/x-ndjson"
+                )
+        
+        uploaded = st.file_uploader("Import archive", type=["zip", "ndjson"], key="import_archive")
+        if uploaded and st.button("📥 Import Resumes"):
+            self.import_resumes(uploaded)
+
+    def export_resumes(self, archive_format: str, include_pdf: bool):
+        """Stream the user's resumes into an archive on disk"""
+        if not db:
+            return
+        
+        try:
+            # Archives are written to disk so session state only holds a path
+            previous = st.session_state.get('export_path')
+            if previous and os.path.exists(previous):
+                os.remove(previous)
+            
+            with tempfile.NamedTemporaryFile(suffix=f".{archive_format}", delete=False) as out:
+                with st.spinner("Exporting resumes..."):
+                    stats = export_archive(
+                        iter_resume_docs(db, st.session_state.user_id), out, archive_format,
+                        include_pdf=include_pdf, compile_fn=self.compile_for_export
+                    )
+            st.session_state.export_path = out.name
+            st.success(f"✅ Exported {stats['exported']} resumes")
+            if stats['pdf_failed']:
+                st.warning(f"⚠️ {stats['pdf_failed']} PDFs failed to compile or hit the compile rate limit and were skipped")
+            if stats['invalid']:
+                st.warning(f"⚠️ {stats['invalid']} resumes have invalid formatting options and were exported without .tex or PDF")
+        except Exception as e:
+            st.error(f"Failed to export resumes: {str(e)}")
+
+    def render_compile_errors(self, error: LatexCompileError, latex_content: str):
+        """Show structured compile errors mapped back to the resume fields"""
+        for issue in annotate_issues(error.errors, latex_content, st.session_state.resume_data):
+            location = issue.get('field') or (f"line {issue['line']}" if issue.get('line') else "")
+            st.markdown(f"- **{location or 'Document'}**: {issue['message']}")
+        
+        if error.kind == 'latex_error' and error.log:
+            with st.expander("Compiler log (last lines)"):
+                st.code(error.log[-5000:])
+
+    def compile_for_export(self, latex_content: str) -> bytes:
+        """Compile one exported PDF under the user's rate limit and global admission control"""
+        try:
+            return get_compile_gate().run(self.compile_key(), get_compile_backend(), latex_content,
+                                          get_compile_limits())
+        except CompileRejected as e:
+            raise LatexCompileError(str(e))
+
+    def import_resumes(self, uploaded):
+        """Import resumes from an uploaded archive with batched writes"""
+        if not db:
+            return
+        
+        try:
+            with st.spinner("Importing resumes..."):
+                stats = import_archive(db, st.session_state.user_id, uploaded)
+            # Imported entries were written straight to the stored index
+            st.session_state.search_index = None
+            st.success(f"✅ Imported {stats['imported']} resumes")
+            if stats['skipped']:
+                st.warning(f"⚠️ Skipped {stats['skipped']} records without resume data")
+            if stats['invalid']:
+                st.warning(f"⚠️ Rejected {stats['invalid']} records with malformed resume data or formatting options")
+            if stats['failed']:
+                st.error(f"❌ {stats['failed']} resumes failed to import")
+            self.load_user_resumes()
+        except Exception as e:
+            st.error(f"Failed to import resumes: {str(e)}")
+
     def create_new_resume(self):
         """Create a new blank resume"""
         st.session_state.resume_data = {
@@ -376,7 +828,8 @@ class ResumeBuilder:
             "projects": [],
             "education": [],
             "certifications": [],
-            "section_order": ["professional_summary", "technical_skills", "experience", "projects", "education", "certifications"],
+            "publications": [],
+            "section_order": ["professional_summary", "technical_skills", "experience", "projects", "education", "publications", "certifications"],
             "custom_sections": {}
         }
         st.success("📄 New blank resume created!")
@@ -402,6 +855,27 @@ class ResumeBuilder:
             st.session_state.formatting_options['font_size'] = st.slider(
                 "Font Size (pt):", 9, 14, st.session_state.formatting_options['font_size']
             )
+
+            profiles = list(PACKAGE_PROFILES.keys())
+            current = st.session_state.formatting_options.get('package_profile', 'full')
+            st.session_state.formatting_options['package_profile'] = st.selectbox(
+                "Package Profile:",
+                options=profiles,
+                index=profiles.index(current) if current in profiles else 0,
+                format_func=PACKAGE_PROFILE_LABELS.get,
+                help="Lean drops the icon fonts and other heavy packages for faster compiles"
+            )
+            if get_compile_backend() is compile_latex:
+                env = get_tex_environment()
+                missing = env.profile_missing(st.session_state.formatting_options['package_profile'])
+                if env.pdflatex is None:
+                    st.caption("⚠️ pdflatex not found; PDF downloads are unavailable")
+                elif missing:
+                    st.caption(f"⚠️ Not installed: {', '.join(missing)}")
+                if st.button("🔄 Re-check TeX installation", key="recheck_tex",
+                             help="Probe again after installing pdflatex or packages"):
+                    get_tex_environment_cache().refresh()
+                    st.rerun()
         
         with st.sidebar.expander("Page Margins", expanded=False):
             st.session_state.formatting_options['margin_top'] = st.slider(
@@ -475,6 +949,10 @@ class ResumeBuilder:
         with st.expander("🎓 Education", expanded=True):
             self.render_education_editor()
 
+        # Publications
+        with st.expander("📚 Publications", expanded=False):
+            self.render_publications_editor()
+
         # Certifications
         with st.expander("🏆 Certifications", expanded=True):
             self.render_certifications_editor()
@@ -652,244 +1130,131 @@ class ResumeBuilder:
             certifications.append({'name': '', 'issuer': '', 'link': ''})
             st.rerun()
 
+    def import_bibtex(self, uploaded, replace: bool):
+        """Stream publications out of an uploaded BibTeX file"""
+        publications = [] if replace else st.session_state.resume_data['publications']
+        seen = {pub.get('cite_key') for pub in publications}
+        errors, added, duplicates = [], 0, 0
+
+        uploaded.seek(0)
+        stream = io.TextIOWrapper(uploaded, encoding='utf-8', errors='replace')
+        try:
+            for publication in import_publications(stream, errors):
+                if publication['cite_key'] in seen:
+                    duplicates += 1
+                    continue
+                publication['cite_key'] = publication['cite_key'] or f"pub-{uuid.uuid4().hex[:8]}"
+                seen.add(publication['cite_key'])
+                publications.append(publication)
+                added += 1
+        finally:
+            stream.detach()
+
+        st.session_state.resume_data['publications'] = publications
+        st.success(f"✅ Imported {added} publications" + (f", skipped {duplicates} already present" if duplicates else ""))
+        if errors:
+            st.warning(f"⚠️ {len(errors)} entries could not be read")
+            with st.expander("Unreadable entries"):
+                for error in errors[:50]:
+                    st.text(error)
+
+    def render_publications_editor(self):
+        """Render publications editor; only one page of entries gets widgets"""
+        if 'publications' not in st.session_state.resume_data:
+            st.session_state.resume_data['publications'] = []
+
+        publications = st.session_state.resume_data['publications']
+
+        uploaded = st.file_uploader("Import BibTeX", type=['bib', 'bibtex', 'txt'], key="bibtex_upload")
+        if uploaded is not None:
+            replace = st.checkbox("Replace existing publications", key="bibtex_replace")
+            if st.button("📥 Import Publications"):
+                self.import_bibtex(uploaded, replace)
+                publications = st.session_state.resume_data['publications']
+
+        query = st.text_input("Filter", key="publication_filter", placeholder="Title, author, venue or year").lower()
+        searchable = ('title', 'authors', 'venue', 'year')
+        matches = [i for i, pub in enumerate(publications)
+                   if not query or query in " ".join(str(pub.get(k, '')) for k in searchable).lower()]
+        pages = max(1, -(-len(matches) // PUBLICATIONS_PAGE_SIZE))
+        # The label changes with the page count, which resets the widget when pages disappear
+        page = st.number_input(f"Page (of {pages})", 1, pages, 1) if pages > 1 else 1
+        st.caption(f"Showing {len(matches)} of {len(publications)} publications")
+
+        for i in matches[(page - 1) * PUBLICATIONS_PAGE_SIZE:page * PUBLICATIONS_PAGE_SIZE]:
+            pub = publications[i]
+            uid = pub.setdefault('cite_key', f"pub-{uuid.uuid4().hex[:8]}")
+            col1, col2 = st.columns([6, 1])
+            with col1:
+                pub['title'] = st.text_input("Title", value=pub.get('title', ''), key=f"pub_title_{uid}")
+            with col2:
+                if st.button("❌", key=f"remove_pub_{uid}", help="Remove publication"):
+                    publications.pop(i)
+                    st.rerun()
+
+            col1, col2, col3 = st.columns([3, 3, 1])
+            with col1:
+                pub['authors'] = st.text_input("Authors", value=pub.get('authors', ''), key=f"pub_authors_{uid}")
+            with col2:
+                pub['venue'] = st.text_input("Venue", value=pub.get('venue', ''), key=f"pub_venue_{uid}")
+            with col3:
+                pub['year'] = st.text_input("Year", value=pub.get('year', ''), key=f"pub_year_{uid}")
+            pub['url'] = st.text_input("Link (optional)", value=pub.get('url', ''), key=f"pub_url_{uid}")
+            st.markdown("---")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("➕ Add Publication"):
+                publications.insert(0, {'cite_key': f"pub-{uuid.uuid4().hex[:8]}", 'title': '', 'authors': '',
+                                        'venue': '', 'year': '', 'url': ''})
+                st.rerun()
+        with col2:
+            if publications and st.button("🗑️ Remove All Publications"):
+                publications.clear()
+                st.rerun()
+
     def generate_latex(self) -> str:
         """Generate LaTeX code from resume data"""
-        data = st.session_state.resume_data
-        fmt = st.session_state.formatting_options
-        
-        # Escape LaTeX special characters
-        def escape_latex(text):
-            if not text:
-                return ""
-            chars = {
-                '&': r'\&',
-                '%': r'\%',
-                '$': r'\$',
-                '#': r'\#',
-                '^': r'\textasciicircum{}',
-                '_': r'\_',
-                '{': r'\{',
-                '}': r'\}',
-                '~': r'\textasciitilde{}',
-                '\\': r'\textbackslash{}'
-            }
-            for char, replacement in chars.items():
-                text = text.replace(char, replacement)
-            return text
-        
-        # Start building LaTeX
-        latex = f"""\\documentclass[a4paper, {fmt['font_size']}pt]{{article}}
-\\usepackage{{enumitem}}
-\\usepackage{{fontawesome5}}
-\\usepackage{{latexsym}}
-\\usepackage{{titlesec}}
-\\usepackage{{marvosym}}
-\\usepackage[usenames,dvipsnames]{{color}}
-\\usepackage{{verbatim}}
-\\usepackage[hidelinks]{{hyperref}}
-\\usepackage{{fancyhdr}}
-\\usepackage[english]{{babel}}
-\\usepackage{{tabularx}}
-\\input{{glyphtounicode}}
-\\usepackage[a4paper, top={fmt['margin_top']}in, bottom={fmt['margin_bottom']}in, left={fmt['margin_left']}in, right={fmt['margin_right']}in]{{geometry}}
-
-\\pagestyle{{fancy}}
-\\fancyhf{{}}
-\\fancyfoot{{}}
-\\renewcommand{{\\headrulewidth}}{{0pt}}
-\\renewcommand{{\\footrulewidth}}{{0pt}}
-
-\\setlist[itemize]{{itemsep={fmt['item_spacing']}in, topsep=4pt, bottomsep=4pt, leftmargin=0.15in}}
-\\urlstyle{{same}}
-\\raggedbottom
-\\raggedright
-\\setlength{{\\tabcolsep}}{{0in}}
-
-\\titleformat{{\\section}}{{\\vspace{{-5pt}}\\scshape\\raggedright\\large}}{{}}{{0em}}{{}}[\\color{{black}}\\titlerule \\vspace{{-5pt}}]
-
-\\pdfgentounicode=1
-
-\\newcommand{{\\resumeItem}}[1]{{\\item\\small{{ #1\\vspace{{-2pt}} }}}}
-
-\\newcommand{{\\resumeSubheading}}[4]{{
-  \\vspace{{-3pt}}\\item
-  \\begin{{tabular*}}{{0.97\\textwidth}}[t]{{l@{{\\extracolsep{{\\fill}}}}r}}
-    \\textbf{{#1}} & \\small #2 \\\\
-    \\textit{{\\small#3}} & \\textit{{\\small #4}} \\\\
-  \\end{{tabular*}}\\vspace{{-5pt}}
-}}
-
-\\newcommand{{\\resumeProjectHeading}}[2]{{
-  \\item\\vspace{{-3pt}}
-  \\begin{{tabular*}}{{0.97\\textwidth}}{{l@{{\\extracolsep{{\\fill}}}}r}}
-    \\small#1 & \\small #2 \\\\
-  \\end{{tabular*}}\\vspace{{-9pt}}
-}}
-
-\\renewcommand{{\\labelitemii}}{{$\\vcenter{{\\hbox{{\\tiny$\\bullet$}}}}$}}
-
-\\newcommand{{\\resumeSubHeadingListStart}}{{\\begin{{itemize}}[leftmargin=0.15in, label={{}}]}}
-\\newcommand{{\\resumeSubHeadingListEnd}}{{\\end{{itemize}}}}
-\\newcommand{{\\resumeItemListStart}}{{\\begin{{itemize}}[leftmargin=0.2in]}}
-\\newcommand{{\\resumeItemListEnd}}{{\\end{{itemize}}\\vspace{{-4pt}}}}
-
-\\begin{{document}}
-
-\\begin{{center}}
-  \\textbf{{\\Huge \\scshape {escape_latex(data['personal_info'].get('name', ''))}}} \\\\ \\vspace{{4pt}}
-  \\small"""
-        
-        # Add contact information
-        contact_parts = []
-        if data['personal_info'].get('phone'):
-            contact_parts.append(f"\\faPhone\\ {escape_latex(data['personal_info']['phone'])}")
-        if data['personal_info'].get('email'):
-            contact_parts.append(f"\\faEnvelope\\ \\href{{mailto:{data['personal_info']['email']}}}{{{escape_latex(data['personal_info']['email'])}}}")
-        if data['personal_info'].get('linkedin'):
-            linkedin_url = data['personal_info']['linkedin']
-            if not linkedin_url.startswith('http'):
-                linkedin_url = 'https://' + linkedin_url
-            contact_parts.append(f"\\faIcon{{linkedin}} \\href{{{linkedin_url}}}{{{escape_latex(data['personal_info']['linkedin'])}}}")
-        if data['personal_info'].get('github'):
-            github_url = data['personal_info']['github']
-            if not github_url.startswith('http'):
-                github_url = 'https://' + github_url
-            contact_parts.append(f"\\faGithub\\ \\href{{{github_url}}}{{{escape_latex(data['personal_info']['github'])}}}")
-        
-        latex += " $|$\n  ".join(contact_parts)
-        latex += "\n\\end{center}\n"
-        
-        # Professional Summary
-        if data.get('professional_summary'):
-            latex += f"""
-\\vspace{{-0.19in}}
-\\section{{Professional Summary}}
-\\begin{{itemize}}[leftmargin=0.15in, label={{}}]
-\\small \\item {escape_latex(data['professional_summary'])}
-\\end{{itemize}}
-"""
-        
-        # Technical Skills
-        if data.get('technical_skills'):
-            latex += f"""
-\\vspace{{-{fmt['section_spacing']}in}}
-\\section{{Technical Skills}}
-\\begin{{itemize}}[leftmargin=0.15in, label={{}}]
-"""
-            for skill in data['technical_skills']:
-                if skill.get('category') and skill.get('skills'):
-                    latex += f"\\item \\textbf{{{escape_latex(skill['category'])}:}} {escape_latex(skill['skills'])}\n"
-            latex += "\\end{itemize}\n"
-        
-        # Experience
-        if data.get('experience'):
-            latex += f"""
-\\vspace{{-{fmt['section_spacing']}in}}
-\\section{{Experience}}
-\\resumeSubHeadingListStart
-"""
-            for exp in data['experience']:
-                if exp.get('title') and exp.get('company'):
-                    latex += f"""\\resumeSubheading
-    {{{escape_latex(exp.get('title', ''))}}} {{{escape_latex(exp.get('dates', ''))}}}
-    {{{escape_latex(exp.get('company', ''))}}} {{{escape_latex(exp.get('location', ''))}}}
-"""
-                    if exp.get('bullets'):
-                        latex += "\\resumeItemListStart\n"
-                        for bullet in exp['bullets']:
-                            if bullet.strip():
-                                latex += f"\\resumeItem{{{escape_latex(bullet)}}}\n"
-                        latex += "\\resumeItemListEnd\n"
-            latex += "\\resumeSubHeadingListEnd\n"
-        
-        # Projects
-        if data.get('projects'):
-            latex += f"""
-\\vspace{{-{fmt['section_spacing']}in}}
-\\section{{Projects}}
-\\resumeSubHeadingListStart
-"""
-            for project in data['projects']:
-                if project.get('name'):
-                    tech_stack = f" $|$ \\emph{{{escape_latex(project.get('tech_stack', ''))}}}" if project.get('tech_stack') else ""
-                    latex += f"""\\resumeProjectHeading
-    {{\\textbf{{{escape_latex(project['name'])}}}{tech_stack}}}{{}}
-"""
-                    if project.get('bullets'):
-                        latex += "\\resumeItemListStart\n"
-                        for bullet in project['bullets']:
-                            if bullet.strip():
-                                latex += f"\\resumeItem{{{escape_latex(bullet)}}}\n"
-                        latex += "\\resumeItemListEnd\n"
-            latex += "\\resumeSubHeadingListEnd\n"
-        
-        # Education
-        if data.get('education'):
-            latex += f"""
-\\vspace{{-{fmt['section_spacing']}in}}
-\\section{{Education}}
-\\resumeSubHeadingListStart
-"""
-            for edu in data['education']:
-                if edu.get('degree') and edu.get('institution'):
-                    gpa_text = f"CGPA: {edu['gpa']}" if edu.get('gpa') else ""
-                    latex += f"""\\resumeSubheading
-    {{{escape_latex(edu['degree'])}}} {{{gpa_text}}}
-    {{{escape_latex(edu['institution'])}}}, {escape_latex(edu.get('location', ''))}}} {{{escape_latex(edu.get('dates', ''))}}}
-"""
-            latex += "\\resumeSubHeadingListEnd\n"
-        
-        # Certifications
-        if data.get('certifications'):
-            latex += f"""
-\\vspace{{-{fmt['section_spacing']}in}}
-\\section{{Professional Certifications}}
-\\begin{{itemize}}[leftmargin=0.15in, label={{}}]
-"""
-            for cert in data['certifications']:
-                if cert.get('name'):
-                    cert_text = f"\\textbf{{{escape_latex(cert['name'])}}}"
-                    if cert.get('issuer'):
-                        if cert.get('link'):
-                            cert_text += f" $|$ \\href{{{cert['link']}}}{{{escape_latex(cert['issuer'])}}}"
-                        else:
-                            cert_text += f" $|$ {escape_latex(cert['issuer'])}"
-                    latex += f"\\small{{\\item{{{cert_text} \\vspace{{2pt}}}}\n}}\n"
-            latex += "\\end{itemize}\n"
-        
-        latex += "\n\\end{document}"
-        return latex
+        return generate_latex(st.session_state.resume_data, st.session_state.formatting_options)
+
+    def compile_key(self) -> str:
+        """Identity that compile rate limits are charged to"""
+        if st.session_state.user_authenticated and st.session_state.get('user_id'):
+            return st.session_state.user_id
+        return st.session_state.session_key
+
+    def check_tex_environment(self, latex_content: str):
+        """Warn about packages that look missing; the compile is attempted regardless.
+
+        The probe cache can be out of date and MiKTeX installs packages on
+        demand, so a cached miss is looked up again and never blocks a compile.
+        """
+        if get_compile_backend() is not compile_latex:
+            # Farm workers have their own TeX installation
+            return
+        env = get_tex_environment()
+        if env.pdflatex is None:
+            # compile_latex looks for pdflatex itself and reports it missing
+            return
+        missing = env.missing(latex_content)
+        if missing:
+            missing = get_tex_environment_cache().confirm_missing(missing)
+        if missing:
+            st.warning(f"⚠️ These LaTeX packages were not found and the compile may fail: {', '.join(missing)}")
+            if not env.profile_missing('lean'):
+                st.info("💡 Switch the package profile to Lean in Formatting Options to compile without them.")
 
     def compile_pdf(self, latex_content: str) -> bytes:
         """Compile LaTeX to PDF using pdflatex"""
+        self.check_tex_environment(latex_content)
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                tex_file = os.path.join(temp_dir, "resume.tex")
-                pdf_file = os.path.join(temp_dir, "resume.pdf")
-                
-                # Write LaTeX content to file
-                with open(tex_file, 'w', encoding='utf-8') as f:
-                    f.write(latex_content)
-                
-                # Compile with pdflatex
-                result = subprocess.run([
-                    'pdflatex', '-interaction=nonstopmode', 
-                    '-output-directory', temp_dir, tex_file
-                ], capture_output=True, text=True, timeout=30)
-                
-                if result.returncode == 0 and os.path.exists(pdf_file):
-                    with open(pdf_file, 'rb') as f:
-                        return f.read()
-                else:
-                    st.error("PDF compilation failed. LaTeX errors:")
-                    st.code(result.stdout + "\n" + result.stderr)
-                    return None
-                    
-        except subprocess.TimeoutExpired:
-            st.error("PDF compilation timed out")
+            return get_compile_gate().run(self.compile_key(), get_compile_backend(), latex_content, get_compile_limits())
+        except CompileRejected as e:
+            st.warning(f"⏳ {str(e)}")
             return None
-        except FileNotFoundError:
-            st.error("pdflatex not found. Please install TeX Live or MiKTeX")
+        except LatexCompileError as e:
+            st.error(str(e))
+            self.render_compile_errors(e, latex_content)
             return None
         except Exception as e:
             st.error(f"PDF compilation error: {str(e)}")
@@ -917,62 +1282,206 @@ class ResumeBuilder:
         except Exception as e:
             st.error(f"Failed to open in Overleaf: {str(e)}")
 
-    def render_preview_and_export(self):
-        """Render preview and export options"""
-        st.markdown("## 👁️ Preview & Export")
-        
-        # Generate LaTeX
+    def preview_fragments(self) -> Tuple[Dict[str, Any], bool]:
+        """LaTeX fragments for the preview and whether they lag behind the editor.
+
+        While edits arrive faster than PREVIEW_DEBOUNCE_SECONDS the last render
+        is reused; the preview fragment re-runs after the pause to catch up.
+        """
+        data, fmt = st.session_state.resume_data, st.session_state.formatting_options
+        key = content_hash(canonical_json([data, fmt]))
+        preview = st.session_state.preview
+        refresh, st.session_state.refresh_preview = st.session_state.refresh_preview, False
+        st.session_state.preview_stale = False
+        if preview and preview['key'] == key:
+            return preview, False
+
+        now = time.monotonic()
+        typing = now - st.session_state.last_edit_at < PREVIEW_DEBOUNCE_SECONDS
+        if key != st.session_state.preview_pending:
+            st.session_state.preview_pending = key
+            st.session_state.last_edit_at = now
+        if preview and typing and not refresh:
+            st.session_state.preview_stale = True
+            return preview, True
+
+        st.session_state.preview = {
+            'key': key,
+            'fragments': render_latex_fragments(cached_document(data), fmt),
+            'previous': preview['fragments'] if preview else {},
+        }
+        return st.session_state.preview, False
+
+    def render_stale_notice(self, stale: bool):
+        if stale:
+            col1, col2 = st.columns([3, 1])
+            col1.caption("⏳ Preview paused while you type")
+            col2.button("🔄 Refresh", key="refresh_preview_button",
+                        on_click=lambda: st.session_state.update(refresh_preview=True))
+
+    def render_latex_preview(self):
+        """Full LaTeX source of the current resume"""
+        preview, stale = self.preview_fragments()
+        self.render_stale_notice(stale)
+        st.markdown("### Generated LaTeX Code")
+        st.code(join_latex_fragments(preview['fragments']), language='latex', line_numbers=True)
+
+    def render_page_preview(self):
+        """Page thumbnails, compiled and rasterized in the background"""
+        preview, stale = self.preview_fragments()
+        self.render_stale_notice(stale)
+        dpi = st.select_slider("Thumbnail resolution (DPI):", PREVIEW_DPI_CHOICES, value=get_preview_dpi(),
+                               key="preview_dpi")
+        latex_content = join_latex_fragments(preview['fragments'])
+        job = get_thumbnail_service().request(self.compile_key(), latex_content, dpi)
+
+        if job.done():
+            try:
+                st.session_state.thumbnail_pages = job.result()
+            except CompileRejected as e:
+                st.warning(f"⏳ {str(e)}")
+            except LatexCompileError as e:
+                st.error(str(e))
+                self.render_compile_errors(e, latex_content)
+            except RasterError as e:
+                st.info(str(e))
+                return
+            except Exception as e:
+                st.error(f"Page preview failed: {str(e)}")
+        else:
+            col1, col2 = st.columns([3, 1])
+            previous = " Showing the previous version." if st.session_state.get('thumbnail_pages') else ""
+            col1.caption(f"⏳ Rendering pages in the background...{previous}")
+            col2.button("🔄 Refresh", key="refresh_thumbnails_button")
+
+        store = get_thumbnail_service().cache.store
+        columns = st.columns(2)
+        for number, blob in enumerate(st.session_state.get('thumbnail_pages') or [], 1):
+            path = store.path(blob)
+            if path:
+                columns[(number - 1) % 2].image(path, caption=f"Page {number}")
+
+    def render_section_changes(self):
+        """Only the sections whose LaTeX changed since the previous render"""
+        preview, stale = self.preview_fragments()
+        self.render_stale_notice(stale)
+        if not preview['previous']:
+            st.info("Edit your resume to see which sections changed.")
+            return
+
+        changes = diff_latex_fragments(preview['previous'], preview['fragments'])
+        if not changes:
+            st.info("The last edit did not change the generated LaTeX.")
+            return
+        for key, diff in changes:
+            st.markdown(f"#### {SECTION_TITLES.get(key, 'Heading & Layout')}")
+            st.code(diff, language='diff')
+
+    def render_export_options(self):
+        """Downloads, Overleaf and PDF compilation"""
         latex_content = self.generate_latex()
+
+        st.markdown("### Export Your Resume")
         
-        # Create tabs
-        preview_tab, export_tab = st.tabs(["📄 LaTeX Preview", "📤 Export Options"])
+        col1, col2 = st.columns(2)
         
-        with preview_tab:
-            st.markdown("### Generated LaTeX Code")
-            st.code(latex_content, language='latex', line_numbers=True)
+        with col1:
+            st.markdown("#### 📝 LaTeX File")
+            st.download_button(
+                label="📥 Download .tex File",
+                data=latex_content,
+                file_name=f"resume_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tex",
+                mime="text/plain",
+                help="Download LaTeX source code"
+            )
         
-        with export_tab:
-            st.markdown("### Export Your Resume")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("#### 📝 LaTeX File")
+        with col2:
+            st.markdown("#### 🌐 Overleaf")
+            if st.button("🔗 Open in Overleaf", help="Open resume in Overleaf editor"):
+                self.open_in_overleaf(latex_content)
+
+        st.markdown("---")
+
+        # Other formats share the document model built for the LaTeX above
+        st.markdown("#### 🗂️ Other Formats")
+        outputs = render_formats(st.session_state.resume_data, st.session_state.formatting_options,
+                                 ['html', 'markdown', 'text'])
+        labels = {'html': "🌐 HTML", 'markdown': "📝 Markdown", 'text': "🤖 Plain Text (ATS)"}
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        for col, (name, content) in zip(st.columns(len(outputs)), outputs.items()):
+            extension, mime = FILE_TYPES[name]
+            with col:
                 st.download_button(
-                    label="📥 Download .tex File",
-                    data=latex_content,
-                    file_name=f"resume_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tex",
-                    mime="text/plain",
-                    help="Download LaTeX source code"
+                    label=labels[name],
+                    data=content,
+                    file_name=f"resume_{timestamp}.{extension}",
+                    mime=mime,
+                    key=f"download_{name}"
                 )
-            
-            with col2:
-                st.markdown("#### 🌐 Overleaf")
-                if st.button("🔗 Open in Overleaf", help="Open resume in Overleaf editor"):
-                    self.open_in_overleaf(latex_content)
-            
-            st.markdown("---")
-            
-            # PDF Export
-            st.markdown("#### 📄 PDF Export")
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                if st.button("🎯 Generate PDF", help="Compile LaTeX to PDF"):
-                    with st.spinner("Compiling PDF..."):
-                        pdf_data = self.compile_pdf(latex_content)
-                        if pdf_data:
-                            st.session_state.pdf_data = pdf_data
-                            st.success("✅ PDF generated successfully!")
-            
-            with col2:
-                if 'pdf_data' in st.session_state:
-                    st.download_button(
-                        label="📥 Download PDF",
-                        data=st.session_state.pdf_data,
-                        file_name=f"resume_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                        mime="application/pdf"
-                    )
+
+        st.markdown("---")
+
+        # PDF Export
+        st.markdown("#### 📄 PDF Export")
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if st.button("🎯 Generate PDF", help="Compile LaTeX to PDF"):
+                with st.spinner("Compiling PDF..."):
+                    pdf_data = self.compile_pdf(latex_content)
+                    if pdf_data:
+                        # Keep only a reference; the bytes live in the shared store
+                        st.session_state.pdf_key = get_artifact_store().put(pdf_data)
+                        st.success("✅ PDF generated successfully!")
+        
+        with col2:
+            if st.session_state.get('pdf_key'):
+                pdf_key = st.session_state.pdf_key
+                base_url = get_artifact_base_url()
+                # download_button copies the file into Streamlit's in-memory media
+                # store for the session, so link to the rendering API when one serves the store
+                pdf_file = None if base_url else get_artifact_store().open(pdf_key)
+                if base_url and pdf_key in get_artifact_store():
+                    st.link_button("📥 Download PDF", f"{base_url}/artifacts/{pdf_key}")
+                elif pdf_file is None:
+                    st.session_state.pdf_key = None
+                    st.info("The generated PDF has expired. Please generate it again.")
+                else:
+                    with pdf_file:
+                        st.download_button(
+                            label="📥 Download PDF",
+                            data=pdf_file,
+                            file_name=f"resume_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                            mime="application/pdf"
+                        )
+
+    def render_preview_and_export(self):
+        """Render preview and export options"""
+        st.markdown("## 👁️ Preview & Export")
+
+        # Only the selected view does any work on a rerun
+        view = st.radio("View", PREVIEW_VIEWS, horizontal=True, key="preview_view", label_visibility="collapsed")
+        if view == PREVIEW_VIEWS[3]:
+            self.render_export_options()
+            return
+
+        # A preview held back while typing re-runs itself after the debounce
+        # window, so it catches up once the edits stop
+        _, stale = self.preview_fragments()
+        run_every = PREVIEW_DEBOUNCE_SECONDS if stale else None
+        st.fragment(self.render_preview_view, run_every=run_every)(view, stale)
+
+    def render_preview_view(self, view: str, scheduled: bool):
+        """One of the preview views, run as a fragment"""
+        if view == PREVIEW_VIEWS[0]:
+            self.render_latex_preview()
+        elif view == PREVIEW_VIEWS[1]:
+            self.render_page_preview()
+        else:
+            self.render_section_changes()
+        if scheduled and not st.session_state.preview_stale:
+            # Caught up; a full rerun drops the timer
+            st.rerun()
 
     def run(self):
         """Main application runner"""
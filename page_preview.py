@@ -0,0 +1,208 @@
+"""
+Page Thumbnails
+Compiles resumes in the background and rasterizes their pages into compact
+PNG thumbnails for the visual preview. PyMuPDF is used when installed, with
+poppler's pdftoppm as a fallback.
+
+Thumbnails live in their own blob store, so previews never evict
+downloadable PDFs, and compiles are charged to a separate rate limit from the
+user's interactive compiles. With PyMuPDF each page is keyed by its own
+content, so an edit that only moves text on page two leaves page one's
+thumbnail in place; with pdftoppm the whole document is the unit.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from blob_store import BlobStore, DEFAULT_STORE_DIR
+from compile_admission import CompileGate
+from latex_renderer import LatexCompileError, SOURCE_ERROR_KINDS
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+DEFAULT_THUMBNAIL_STORE_DIR = DEFAULT_STORE_DIR + '-thumbnails'
+DEFAULT_THUMBNAIL_STORE_MB = 128
+# Background preview compiles per user; charged separately from "Generate PDF"
+DEFAULT_THUMBNAIL_LIMITS = {
+    'compile_rate_per_minute': 12.0,
+    'compile_burst': 4,
+}
+
+DEFAULT_PREVIEW_DPI = 50
+PREVIEW_DPI_CHOICES = [36, 50, 72, 100]
+RASTER_TIMEOUT = 30
+THUMBNAIL_INDEX_SIZE = 4096
+MAX_TRACKED_JOBS = 256
+
+
+class RasterError(Exception):
+    """Pages could not be rasterized"""
+
+
+def raster_backend() -> Optional[str]:
+    """Name of the available rasterizer, or None"""
+    if fitz is not None:
+        return 'pymupdf'
+    if shutil.which('pdftoppm'):
+        return 'pdftoppm'
+    return None
+
+
+class ThumbnailCache:
+    """Maps document and page content keys to PNG blobs in a BlobStore"""
+
+    def __init__(self, store: BlobStore, max_entries: int = THUMBNAIL_INDEX_SIZE):
+        self.store = store
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        # content key -> list of blob keys (one per page), least recently used first
+        self.index: "OrderedDict[str, List[str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self.lock:
+            blobs = self.index.get(key)
+            if blobs is not None:
+                self.index.move_to_end(key)
+        if blobs is None or not all(blob in self.store for blob in blobs):
+            return None
+        return blobs
+
+    def put(self, key: str, pngs: List[bytes]) -> List[str]:
+        blobs = [self.store.put(png) for png in pngs]
+        self.remember(key, blobs)
+        return blobs
+
+    def remember(self, key: str, blobs: List[str]):
+        """Point a key at blobs that are already stored"""
+        with self.lock:
+            self.index[key] = blobs
+            self.index.move_to_end(key)
+            while len(self.index) > self.max_entries:
+                self.index.popitem(last=False)
+
+
+def _rasterize_pymupdf(pdf: bytes, dpi: int, cache: ThumbnailCache) -> List[str]:
+    """Rasterize only pages whose content is not already cached"""
+    pages = []
+    with fitz.open(stream=pdf, filetype='pdf') as document:
+        for page in document:
+            digest = hashlib.sha256(f"{dpi}:{tuple(page.rect)}:".encode('ascii'))
+            digest.update(page.read_contents())
+            key = 'page:' + digest.hexdigest()
+            blobs = cache.get(key)
+            if blobs is None:
+                blobs = cache.put(key, [page.get_pixmap(dpi=dpi).tobytes('png')])
+            pages.extend(blobs)
+    return pages
+
+
+def _rasterize_pdftoppm(pdf: bytes, dpi: int) -> List[bytes]:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = os.path.join(temp_dir, 'resume.pdf')
+        with open(pdf_path, 'wb') as f:
+            f.write(pdf)
+        try:
+            subprocess.run(['pdftoppm', '-png', '-r', str(dpi), pdf_path, os.path.join(temp_dir, 'page')],
+                           capture_output=True, timeout=RASTER_TIMEOUT, check=True)
+        except subprocess.TimeoutExpired:
+            raise RasterError("Rasterizing the preview timed out")
+        except subprocess.CalledProcessError as e:
+            raise RasterError(f"pdftoppm failed: {e.stderr.decode('utf-8', 'replace').strip()}")
+        # pdftoppm zero-pads page numbers to the width of the page count
+        names = sorted(name for name in os.listdir(temp_dir) if name.startswith('page') and name.endswith('.png'))
+        pngs = []
+        for name in names:
+            with open(os.path.join(temp_dir, name), 'rb') as f:
+                pngs.append(f.read())
+        return pngs
+
+
+def rasterize(pdf: bytes, dpi: int, cache: ThumbnailCache) -> List[str]:
+    """Blob keys of one PNG thumbnail per page, reusing cached pages"""
+    document_key = f"doc:{dpi}:" + hashlib.sha256(pdf).hexdigest()
+    blobs = cache.get(document_key)
+    if blobs is not None:
+        return blobs
+
+    backend = raster_backend()
+    if backend == 'pymupdf':
+        blobs = _rasterize_pymupdf(pdf, dpi, cache)
+        cache.remember(document_key, blobs)
+        return blobs
+    if backend == 'pdftoppm':
+        return cache.put(document_key, _rasterize_pdftoppm(pdf, dpi))
+    raise RasterError("Page preview needs PyMuPDF (pip install pymupdf) or poppler-utils (pdftoppm)")
+
+
+class ThumbnailService:
+    """Background compile-and-rasterize jobs, deduplicated by LaTeX source and DPI
+
+    Each client only waits on its latest revision: a job still queued when the
+    same client asks for a newer one is cancelled, unless another client wants it.
+    """
+
+    def __init__(self, cache: ThumbnailCache, gate: CompileGate, compile_fn: Callable[[str], bytes],
+                 workers: int = 1):
+        """gate should have its own rate limiter, sharing admission with interactive compiles"""
+        self.cache = cache
+        self.gate = gate
+        self.compile_fn = compile_fn
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnails')
+        self.lock = threading.Lock()
+        self.jobs: "OrderedDict[str, Future]" = OrderedDict()
+        # client key -> job key of the latest revision that client asked for
+        self.latest: "OrderedDict[str, str]" = OrderedDict()
+
+    def _render(self, client_key: str, latex: str, dpi: int) -> List[str]:
+        pdf = self.gate.run(client_key, self.compile_fn, latex)
+        return rasterize(pdf, dpi, self.cache)
+
+    def _reusable(self, job: Future) -> bool:
+        """Finished jobs are reused only while their blobs are stored or their source cannot compile"""
+        if not job.done():
+            return True
+        if job.cancelled():
+            return False
+        error = job.exception()
+        if error is not None:
+            # Shed, timed out, killed or no rasterizer: another attempt may succeed
+            return isinstance(error, LatexCompileError) and error.kind in SOURCE_ERROR_KINDS
+        return all(blob in self.cache.store for blob in job.result())
+
+    def _supersede(self, client_key: str, key: str):
+        """Record the client's latest revision and drop its previous job if it has not started"""
+        previous = self.latest.pop(client_key, None)
+        self.latest[client_key] = key
+        while len(self.latest) > MAX_TRACKED_JOBS:
+            self.latest.popitem(last=False)
+        if previous is None or previous == key or previous in self.latest.values():
+            return
+        job = self.jobs.get(previous)
+        if job is not None and job.cancel():
+            del self.jobs[previous]
+
+    def request(self, client_key: str, latex: str, dpi: int = DEFAULT_PREVIEW_DPI) -> Future:
+        """Future of the page thumbnail blob keys for this LaTeX source"""
+        key = f"{dpi}:" + hashlib.sha256(latex.encode('utf-8')).hexdigest()
+        with self.lock:
+            self._supersede(client_key, key)
+            job = self.jobs.get(key)
+            if job is not None and self._reusable(job):
+                self.jobs.move_to_end(key)
+                return job
+            job = self.pool.submit(self._render, client_key, latex, dpi)
+            self.jobs[key] = job
+            # Forget the oldest finished jobs; their thumbnails stay cached
+            for old_key in [k for k, j in self.jobs.items() if j.done()][:max(0, len(self.jobs) - MAX_TRACKED_JOBS)]:
+                del self.jobs[old_key]
+            return job
@@ -0,0 +1,378 @@
+"""
+Rendering API
+Standalone asyncio HTTP/1.1 service that renders resume JSON without
+Streamlit, using the same generate_latex and compile_latex as the app.
+
+    POST /render/tex   -> text/x-tex
+    POST /render/pdf   -> application/pdf (chunked transfer encoding)
+    POST /render/html, /render/markdown, /render/text -> other output formats
+    GET  /health       -> JSON status, load and request throughput
+    GET  /artifacts/<key> -> a PDF from the shared artifact store, streamed from disk
+
+Request bodies are JSON: {"resume_data": {...}, "formatting_options": {...}}.
+formatting_options is optional and limited to the options and ranges the
+app offers. Connections are kept alive between requests, and compiles run on
+their own worker pool behind the same admission control as the app.
+
+Usage:
+    python render_api.py --host 127.0.0.1 --port 8080 --workers 4
+    python render_api.py --farm-db /shared/compile-farm.db   # compile on farm workers
+    python render_api.py --artifact-store-dir /var/tmp/latex-resume-builder-artifacts
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from blob_store import BlobStore, DEFAULT_STORE_MB
+from compile_admission import CompileGate, CompileRejected
+from compile_farm import CompileFarm, DEFAULT_FARM_CONCURRENCY
+from latex_renderer import generate_latex, compile_latex, validate_formatting_options, LatexCompileError
+from latex_renderer import SOURCE_ERROR_KINDS
+from resume_document import resume_shape_problem
+from resume_formats import render_formats
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 15.0
+STREAM_CHUNK_BYTES = 64 * 1024
+
+TEXT_ROUTES = {
+    '/render/html': ('html', 'text/html; charset=utf-8'),
+    '/render/markdown': ('markdown', 'text/markdown; charset=utf-8'),
+    '/render/text': ('text', 'text/plain; charset=utf-8'),
+}
+
+class HttpError(Exception):
+    """Error that maps directly to an HTTP response"""
+
+    def __init__(self, status: HTTPStatus, message: str, extra: Optional[Dict[str, Any]] = None,
+                 headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra or {}
+        self.headers = headers or {}
+
+
+class RenderService:
+    """Request handling and worker pool for the rendering API"""
+
+    def __init__(self, workers: int = os.cpu_count() or 2, limits: Optional[Dict[str, Any]] = None,
+                 compile_fn=compile_latex, artifacts: Optional[BlobStore] = None,
+                 trusted_proxies: Iterable[str] = ()):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render')
+        self.gate = CompileGate({'max_concurrent_compiles': workers, **(limits or {})})
+        # Compiles get their own pool with a thread for every running or queued
+        # job, and are shed before submission, so the gate sees every request
+        # and cheap renders never wait behind compiles
+        admission = self.gate.admission
+        self.compile_capacity = admission.max_concurrent + admission.max_queued
+        self.compile_pool = ThreadPoolExecutor(max_workers=self.compile_capacity, thread_name_prefix='compile')
+        self.compiles_in_flight = 0
+        self.compile_fn = compile_fn
+        self.artifacts = artifacts
+        self.trusted_proxies = set(trusted_proxies)
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+
+    def parse_payload(self, body: bytes) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Validate a render request body"""
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Request body is not valid JSON")
+        if not isinstance(payload, dict) or not isinstance(payload.get('resume_data'), dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Expected an object with a resume_data object")
+        resume_data = payload['resume_data']
+        resume_data.setdefault('personal_info', {})
+        problem = resume_shape_problem(resume_data)
+        if problem:
+            raise HttpError(HTTPStatus.BAD_REQUEST, problem)
+
+        options = payload.get('formatting_options') or {}
+        if not isinstance(options, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "formatting_options must be an object")
+        try:
+            formatting_options = validate_formatting_options(options)
+        except ValueError as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, str(e))
+        return resume_data, formatting_options
+
+    async def render_tex(self, body: bytes) -> str:
+        resume_data, formatting_options = self.parse_payload(body)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, generate_latex, resume_data, formatting_options)
+
+    async def render_format(self, body: bytes, name: str) -> str:
+        resume_data, formatting_options = self.parse_payload(body)
+        loop = asyncio.get_running_loop()
+        outputs = await loop.run_in_executor(self.pool, render_formats, resume_data, formatting_options, [name])
+        return outputs[name]
+
+    async def render_pdf(self, body: bytes, client_key: str) -> bytes:
+        latex = await self.render_tex(body)
+        loop = asyncio.get_running_loop()
+        try:
+            if self.compiles_in_flight >= self.compile_capacity:
+                raise self.gate.admission.overloaded()
+            self.compiles_in_flight += 1
+            try:
+                return await loop.run_in_executor(self.compile_pool, self.gate.run, client_key,
+                                                  self.compile_fn, latex)
+            finally:
+                self.compiles_in_flight -= 1
+        except CompileRejected as e:
+            status = HTTPStatus.TOO_MANY_REQUESTS if e.reason == 'rate_limited' else HTTPStatus.SERVICE_UNAVAILABLE
+            raise HttpError(status, str(e), {'reason': e.reason, 'retry_after': round(e.retry_after, 1)},
+                            {'Retry-After': str(max(1, round(e.retry_after)))})
+        except LatexCompileError as e:
+            if e.kind in SOURCE_ERROR_KINDS:
+                status = HTTPStatus.UNPROCESSABLE_ENTITY
+            elif e.kind == 'unavailable':
+                status = HTTPStatus.SERVICE_UNAVAILABLE
+            else:
+                status = HTTPStatus.INTERNAL_SERVER_ERROR
+            raise HttpError(status, str(e), {'kind': e.kind, 'errors': e.errors})
+
+    def client_key(self, peer_address: str, headers: Dict[str, str]) -> str:
+        """Identity to rate limit by: the peer address, or the client a trusted proxy forwarded for"""
+        if peer_address not in self.trusted_proxies:
+            # Anything else in the request is chosen by the client
+            return peer_address
+        if headers.get('x-client-id'):
+            return headers['x-client-id']
+        # The nearest hop the proxies did not add themselves
+        for address in reversed([a.strip() for a in headers.get('x-forwarded-for', '').split(',') if a.strip()]):
+            if address not in self.trusted_proxies:
+                return address
+        return peer_address
+
+    def artifact_path(self, path: str) -> str:
+        """Location on disk of the artifact a /artifacts/<key> path names"""
+        location = self.artifacts.path(path[len('/artifacts/'):]) if self.artifacts else None
+        if location is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, "Artifact not found or expired")
+        return location
+
+    def health(self) -> Dict[str, Any]:
+        uptime = time.monotonic() - self.started
+        return {
+            'status': 'ok',
+            'uptime_seconds': round(uptime, 1),
+            'requests': self.requests,
+            'errors': self.errors,
+            'requests_per_second': round(self.requests / uptime, 2) if uptime else 0.0,
+            'compiles': self.gate.admission.stats(),
+        }
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """Read one HTTP/1.1 request; None when the client closed the connection"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Incomplete request")
+    except asyncio.LimitOverrunError:
+        raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request headers too large")
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ', 2)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    headers[':version'] = version
+
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise HttpError(HTTPStatus.LENGTH_REQUIRED, "Chunked request bodies are not supported")
+    try:
+        length = int(headers.get('content-length', '0') or 0)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+    if length < 0:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target.split('?', 1)[0], headers, body
+
+
+def wants_keep_alive(headers: Dict[str, str]) -> bool:
+    connection = headers.get('connection', '').lower()
+    if headers.get(':version') == 'HTTP/1.0':
+        return connection == 'keep-alive'
+    return connection != 'close'
+
+
+async def write_response(writer: asyncio.StreamWriter, status: HTTPStatus, body: bytes, content_type: str,
+                         keep_alive: bool, headers: Optional[Dict[str, str]] = None, stream: bool = False):
+    """Write a response, using chunked transfer encoding when streaming"""
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    if keep_alive:
+        lines.append(f"Keep-Alive: timeout={int(KEEP_ALIVE_TIMEOUT)}")
+    lines.append("Transfer-Encoding: chunked" if stream else f"Content-Length: {len(body)}")
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+
+    if not stream:
+        writer.write(body)
+        await writer.drain()
+        return
+
+    view = memoryview(body)
+    for start in range(0, len(view), STREAM_CHUNK_BYTES):
+        chunk = view[start:start + STREAM_CHUNK_BYTES]
+        writer.write(f"{len(chunk):X}\r\n".encode('ascii') + chunk + b"\r\n")
+        # Respect client backpressure between chunks
+        await writer.drain()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def write_file_response(writer: asyncio.StreamWriter, path: str, content_type: str, keep_alive: bool,
+                              headers: Optional[Dict[str, str]] = None):
+    """Stream a file from disk without holding it in memory"""
+    loop = asyncio.get_running_loop()
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        raise HttpError(HTTPStatus.NOT_FOUND, "Artifact not found or expired")
+    with f:
+        lines = ["HTTP/1.1 200 OK", f"Content-Type: {content_type}",
+                 f"Content-Length: {os.fstat(f.fileno()).st_size}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        while True:
+            chunk = await loop.run_in_executor(None, f.read, STREAM_CHUNK_BYTES)
+            if not chunk:
+                break
+            writer.write(chunk)
+            await writer.drain()
+
+
+def json_body(data: Dict[str, Any]) -> bytes:
+    return json.dumps(data, default=str).encode('utf-8')
+
+
+async def handle_connection(service: RenderService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serve requests on one connection until the client or timeout closes it"""
+    peer = writer.get_extra_info('peername')
+    peer_address = peer[0] if peer else 'unknown'
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await asyncio.wait_for(read_request(reader), KEEP_ALIVE_TIMEOUT)
+                if request is None:
+                    return
+                method, path, headers, body = request
+                keep_alive = wants_keep_alive(headers)
+                service.requests += 1
+
+                if path == '/render/tex' and method == 'POST':
+                    latex = await service.render_tex(body)
+                    await write_response(writer, HTTPStatus.OK, latex.encode('utf-8'),
+                                         'text/x-tex; charset=utf-8', keep_alive)
+                elif path == '/render/pdf' and method == 'POST':
+                    pdf = await service.render_pdf(body, service.client_key(peer_address, headers))
+                    await write_response(writer, HTTPStatus.OK, pdf, 'application/pdf', keep_alive, stream=True)
+                elif path in TEXT_ROUTES and method == 'POST':
+                    name, content_type = TEXT_ROUTES[path]
+                    content = await service.render_format(body, name)
+                    await write_response(writer, HTTPStatus.OK, content.encode('utf-8'), content_type, keep_alive)
+                elif path == '/health' and method == 'GET':
+                    await write_response(writer, HTTPStatus.OK, json_body(service.health()),
+                                         'application/json', keep_alive)
+                elif path.startswith('/artifacts/') and method == 'GET':
+                    await write_file_response(writer, service.artifact_path(path), 'application/pdf', keep_alive,
+                                              {'Content-Disposition': 'attachment; filename="resume.pdf"',
+                                               'Cache-Control': 'private, max-age=3600'})
+                elif path in ('/render/tex', '/render/pdf', '/health', *TEXT_ROUTES):
+                    raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+                else:
+                    raise HttpError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+            except HttpError as e:
+                service.errors += 1
+                await write_response(writer, e.status, json_body({'error': str(e), **e.extra}),
+                                     'application/json', keep_alive, e.headers)
+            except asyncio.TimeoutError:
+                return
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception:
+                # Never drop the connection on a bug; the details stay in the server log
+                traceback.print_exc()
+                service.errors += 1
+                keep_alive = False
+                await write_response(writer, HTTPStatus.INTERNAL_SERVER_ERROR,
+                                     json_body({'error': "Internal server error"}), 'application/json', keep_alive)
+
+            if not keep_alive:
+                return
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int, service: RenderService):
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(service, r, w), host, port, limit=MAX_HEADER_BYTES
+    )
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"🚀 Rendering API listening on {addresses}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Standalone resume rendering API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help="Concurrent compiles")
+    parser.add_argument('--rate-per-minute', type=float, default=60.0, help="Compiles per client per minute")
+    parser.add_argument('--farm-db', help="Send compiles to compile farm workers through this job database")
+    parser.add_argument('--farm-concurrency', type=int, default=DEFAULT_FARM_CONCURRENCY,
+                        help="Farm compiles waiting at once; replaces --workers as the compile cap with --farm-db")
+    parser.add_argument('--artifact-store-dir', help="Serve the app's generated PDFs from this artifact store")
+    parser.add_argument('--artifact-store-mb', type=int, default=DEFAULT_STORE_MB,
+                        help="Byte budget of the artifact store; match the app's artifact_store_mb")
+    parser.add_argument('--trusted-proxy', action='append', default=[], metavar='ADDRESS',
+                        help="Rate limit by the X-Client-Id or X-Forwarded-For this proxy sends (repeatable)")
+    args = parser.parse_args()
+
+    limits = {
+        'compile_rate_per_minute': args.rate_per_minute,
+        'compile_burst': max(1, int(args.rate_per_minute // 6)),
+    }
+    compile_fn = compile_latex
+    if args.farm_db:
+        compile_fn = CompileFarm(args.farm_db).compile
+        limits['max_concurrent_compiles'] = args.farm_concurrency
+    artifacts = None
+    if args.artifact_store_dir:
+        artifacts = BlobStore(args.artifact_store_dir, args.artifact_store_mb * 1024 * 1024)
+    service = RenderService(args.workers, limits, compile_fn, artifacts, args.trusted_proxy)
+    try:
+        asyncio.run(serve(args.host, args.port, service))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Resume Document Model
+Intermediate representation built once from resume_data and shared by every
+output format. Text is normalized here (Unicode NFC, trimmed, blank bullets
+and incomplete entries dropped) but left unescaped; each backend applies its
+own escaping while walking the document.
+"""
+
+import json
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Any, Optional
+
+DEFAULT_SECTION_ORDER = ["professional_summary", "technical_skills", "experience", "projects", "education",
+                         "publications", "certifications"]
+
+SECTION_TITLES = {
+    "professional_summary": "Professional Summary",
+    "technical_skills": "Technical Skills",
+    "experience": "Experience",
+    "projects": "Projects",
+    "education": "Education",
+    "publications": "Publications",
+    "certifications": "Professional Certifications",
+}
+
+# resume_data fields that hold lists of entry objects
+LIST_SECTIONS = [key for key in SECTION_TITLES if key != 'professional_summary']
+
+DOCUMENT_CACHE_SIZE = 64
+
+
+@dataclass
+class Contact:
+    kind: str            # phone, email, linkedin or github
+    text: str
+    url: str = ""
+
+
+@dataclass
+class Entry:
+    title: str = ""      # bold heading: job title, project, degree, skill category, certification, paper
+    subtitle: str = ""   # company, institution, tech stack, skills, issuer or venue
+    date: str = ""
+    location: str = ""
+    note: str = ""       # e.g. GPA
+    url: str = ""
+    authors: str = ""
+    bullets: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Section:
+    key: str
+    title: str
+    text: str = ""       # free text sections such as the summary
+    entries: List[Entry] = field(default_factory=list)
+
+
+@dataclass
+class ResumeDocument:
+    name: str
+    contacts: List[Contact]
+    sections: List[Section]
+
+
+def clean(value: Any) -> str:
+    """Normalize a text field"""
+    if not isinstance(value, str):
+        return ""
+    return unicodedata.normalize('NFC', value.replace('\r\n', '\n')).strip()
+
+
+def resume_shape_problem(data: Dict[str, Any]) -> Optional[str]:
+    """Why resume data from outside the app does not have the structure the app expects, if it does not"""
+    if not isinstance(data.get('personal_info'), dict):
+        return "personal_info must be an object"
+    for key in ['section_order'] + LIST_SECTIONS:
+        if data.get(key) is not None and not isinstance(data[key], list):
+            return f"{key} must be an array"
+    for key in LIST_SECTIONS:
+        for item in data.get(key) or []:
+            if isinstance(item, dict) and item.get('bullets') is not None and not isinstance(item['bullets'], list):
+                return f"bullets in {key} must be an array"
+    return None
+
+
+def absolute_url(url: str) -> str:
+    """Prefix scheme-less profile links with https://"""
+    return url if url.startswith('http') else 'https://' + url
+
+
+def _bullets(item: Dict[str, Any]) -> List[str]:
+    return [text for text in (clean(b) for b in item.get('bullets') or []) if text]
+
+
+def _section_entries(key: str, items: List[Dict[str, Any]]) -> List[Entry]:
+    """Build entries for a list section, skipping incomplete items"""
+    entries = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        if key == 'technical_skills' and clean(item.get('category')) and clean(item.get('skills')):
+            entries.append(Entry(title=clean(item['category']), subtitle=clean(item['skills'])))
+        elif key == 'experience' and clean(item.get('title')) and clean(item.get('company')):
+            entries.append(Entry(title=clean(item['title']), subtitle=clean(item['company']),
+                                 date=clean(item.get('dates')), location=clean(item.get('location')),
+                                 bullets=_bullets(item)))
+        elif key == 'projects' and clean(item.get('name')):
+            entries.append(Entry(title=clean(item['name']), subtitle=clean(item.get('tech_stack')),
+                                 bullets=_bullets(item)))
+        elif key == 'education' and clean(item.get('degree')) and clean(item.get('institution')):
+            entries.append(Entry(title=clean(item['degree']), subtitle=clean(item['institution']),
+                                 date=clean(item.get('dates')), location=clean(item.get('location')),
+                                 note=clean(item.get('gpa'))))
+        elif key == 'publications' and clean(item.get('title')):
+            entries.append(Entry(title=clean(item['title']), subtitle=clean(item.get('venue')),
+                                 date=clean(item.get('year')), authors=clean(item.get('authors')),
+                                 url=clean(item.get('url'))))
+        elif key == 'certifications' and clean(item.get('name')):
+            entries.append(Entry(title=clean(item['name']), subtitle=clean(item.get('issuer')),
+                                 url=clean(item.get('link'))))
+    return entries
+
+
+def build_document(data: Dict[str, Any]) -> ResumeDocument:
+    """Build the document model from resume data.
+
+    Sections follow section_order; known sections missing from it are
+    appended in the default order. Sections with nothing to show are omitted.
+    """
+    info = data.get('personal_info') or {}
+    contacts = []
+    if clean(info.get('phone')):
+        contacts.append(Contact('phone', clean(info['phone'])))
+    if clean(info.get('email')):
+        contacts.append(Contact('email', clean(info['email']), 'mailto:' + clean(info['email'])))
+    for kind in ('linkedin', 'github'):
+        if clean(info.get(kind)):
+            contacts.append(Contact(kind, clean(info[kind]), absolute_url(clean(info[kind]))))
+
+    order = [key for key in data.get('section_order') or [] if key in SECTION_TITLES]
+    order += [key for key in DEFAULT_SECTION_ORDER if key not in order]
+
+    sections = []
+    for key in order:
+        if key == 'professional_summary':
+            text = clean(data.get(key))
+            if text:
+                sections.append(Section(key, SECTION_TITLES[key], text=text))
+        else:
+            entries = _section_entries(key, data.get(key) or [])
+            if entries:
+                sections.append(Section(key, SECTION_TITLES[key], entries=entries))
+
+    return ResumeDocument(clean(info.get('name')), contacts, sections)
+
+
+@lru_cache(maxsize=DOCUMENT_CACHE_SIZE)
+def _build_from_json(serialized: str) -> ResumeDocument:
+    return build_document(json.loads(serialized))
+
+
+def cached_document(data: Dict[str, Any]) -> ResumeDocument:
+    """Build the document once per distinct resume content.
+
+    Reruns that leave the resume unchanged reuse the cached document; callers
+    must treat it as read-only.
+    """
+    try:
+        serialized = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return build_document(data)
+    return _build_from_json(serialized)
@@ -0,0 +1,200 @@
+"""
+Resume Output Formats
+HTML, Markdown and plain-text backends over the shared document model, plus
+single-pass rendering of several formats from one build of the document.
+Plain text is laid out for applicant tracking systems: no columns, no
+symbols, one fact per line.
+"""
+
+import html
+import re
+from typing import Dict, List, Any, Callable, Iterable
+from urllib.parse import urlparse
+
+from latex_renderer import render_latex
+from resume_document import ResumeDocument, Entry, cached_document
+
+CONTACT_LABELS = {'phone': 'Phone', 'email': 'Email', 'linkedin': 'LinkedIn', 'github': 'GitHub'}
+
+# Only these become links; anything else (javascript:, data:, relative paths) is shown as text
+LINK_SCHEMES = {'http', 'https', 'mailto'}
+
+MARKDOWN_SPECIALS_RE = re.compile(r'([\\`*_\[\]<>|])')
+# Characters that only start a heading, list or quote at the beginning of a line
+MARKDOWN_LINE_START_RE = re.compile(r'^([#>+\-]|\d+(?=\.))')
+
+HTML_STYLE = """body{font-family:Georgia,serif;max-width:800px;margin:2em auto;padding:0 1em;color:#222}
+h1{text-align:center;margin-bottom:.2em}.contacts{text-align:center;font-size:.9em}
+h2{border-bottom:1px solid #222;font-variant:small-caps;margin-top:1.2em}
+.entry-head{display:flex;justify-content:space-between}.entry-sub{display:flex;justify-content:space-between;font-style:italic;font-size:.9em}
+ul{margin:.2em 0 .6em}"""
+
+
+def escape_markdown(text: str) -> str:
+    text = MARKDOWN_SPECIALS_RE.sub(r'\\\1', text)
+    # "1." is escaped as "1\." and the other markers with a leading backslash
+    return MARKDOWN_LINE_START_RE.sub(
+        lambda m: m.group(1) + '\\' if m.group(1)[0].isdigit() else '\\' + m.group(1), text
+    )
+
+
+def linkable(url: str) -> bool:
+    """Whether a user-supplied URL is safe to emit as a link target"""
+    # Browsers skip whitespace and control characters inside a scheme, so refuse them outright
+    if not url or any(ord(ch) <= 32 or ch == '\x7f' for ch in url):
+        return False
+    try:
+        return urlparse(url).scheme.lower() in LINK_SCHEMES
+    except ValueError:
+        return False
+
+
+def _markdown_target(url: str) -> str:
+    """Percent-encode the characters that would end a Markdown link target early"""
+    return url.replace('(', '%28').replace(')', '%29').replace('<', '%3C').replace('>', '%3E')
+
+
+def _entry_heading(entry: Entry) -> str:
+    """Plain heading line shared by the Markdown and text backends"""
+    return " | ".join(part for part in (entry.title, entry.subtitle) if part)
+
+
+def _entry_details(entry: Entry, escape: Callable[[str], str] = str) -> str:
+    details = [entry.location, entry.date]
+    if entry.note:
+        details.append(f"GPA: {entry.note}")
+    return " | ".join(escape(part) for part in details if part)
+
+
+def _publication_parts(entry: Entry) -> List[str]:
+    """Authors, title and venue/year of a publication, unescaped"""
+    details = ", ".join(part for part in (entry.subtitle, entry.date) if part)
+    return [entry.authors, entry.title, details]
+
+
+def render_html(document: ResumeDocument, fmt: Dict[str, Any]) -> str:
+    """Standalone HTML page, suitable for previews"""
+    e = html.escape
+    contacts = " | ".join(
+        f'<a href="{e(c.url)}">{e(c.text)}</a>' if linkable(c.url) else e(c.text) for c in document.contacts
+    )
+    parts = [
+        "<!DOCTYPE html>",
+        f'<html><head><meta charset="utf-8"><title>{e(document.name or "Resume")}</title>',
+        f"<style>{HTML_STYLE}body{{font-size:{fmt.get('font_size', 11)}pt}}</style></head><body>",
+        f"<h1>{e(document.name)}</h1>",
+        f'<p class="contacts">{contacts}</p>',
+    ]
+    for section in document.sections:
+        parts.append(f"<section><h2>{e(section.title)}</h2>")
+        if section.text:
+            parts.append(f"<p>{e(section.text)}</p>")
+        if section.key == 'publications':
+            parts.append("<ol>")
+            for entry in section.entries:
+                authors, title, details = (e(part) for part in _publication_parts(entry))
+                title = f'<a href="{e(entry.url)}">{title}</a>' if linkable(entry.url) else title
+                parts.append("<li>" + ". ".join(filter(None, [authors, f"<strong>{title}</strong>",
+                                                               f"<em>{details}</em>" if details else ""])) + "</li>")
+            parts.append("</ol></section>")
+            continue
+        for entry in section.entries:
+            if section.key == 'technical_skills':
+                parts.append(f"<p><strong>{e(entry.title)}:</strong> {e(entry.subtitle)}</p>")
+                continue
+            subtitle = e(entry.subtitle)
+            if linkable(entry.url):
+                subtitle = f'<a href="{e(entry.url)}">{subtitle}</a>'
+            parts.append(f'<div class="entry-head"><strong>{e(entry.title)}</strong><span>{e(entry.date)}</span></div>')
+            if subtitle or entry.location or entry.note:
+                note = f"GPA: {e(entry.note)}" if entry.note else e(entry.location)
+                parts.append(f'<div class="entry-sub"><span>{subtitle}</span><span>{note}</span></div>')
+            if entry.bullets:
+                parts.append("<ul>" + "".join(f"<li>{e(b)}</li>" for b in entry.bullets) + "</ul>")
+        parts.append("</section>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def render_markdown(document: ResumeDocument, fmt: Dict[str, Any]) -> str:
+    """Markdown rendering for READMEs, portfolio sites and previews"""
+    m = escape_markdown
+    lines = [f"# {m(document.name)}", ""]
+    if document.contacts:
+        lines += [" | ".join(f"[{m(c.text)}]({_markdown_target(c.url)})" if linkable(c.url) else m(c.text) for c in document.contacts), ""]
+    for section in document.sections:
+        lines += [f"## {m(section.title)}", ""]
+        if section.text:
+            lines += [m(section.text), ""]
+        if section.key == 'publications':
+            for number, entry in enumerate(section.entries, 1):
+                authors, title, details = (m(part) for part in _publication_parts(entry))
+                title = f"[{title}]({_markdown_target(entry.url)})" if linkable(entry.url) else title
+                lines.append(f"{number}. " + ". ".join(filter(None, [authors, f"**{title}**",
+                                                                    f"*{details}*" if details else ""])))
+            lines.append("")
+            continue
+        for entry in section.entries:
+            if section.key == 'technical_skills':
+                lines.append(f"- **{m(entry.title)}:** {m(entry.subtitle)}")
+                continue
+            heading = f"**{m(entry.title)}**"
+            if entry.subtitle:
+                subtitle = f"[{m(entry.subtitle)}]({_markdown_target(entry.url)})" if linkable(entry.url) else m(entry.subtitle)
+                heading += f" | {subtitle}"
+            lines.append(f"### {heading}")
+            if _entry_details(entry):
+                lines.append(f"*{_entry_details(entry, m)}*")
+            lines.append("")
+            lines += [f"- {m(b)}" for b in entry.bullets]
+            if entry.bullets:
+                lines.append("")
+        if section.key == 'technical_skills':
+            lines.append("")
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def render_text(document: ResumeDocument, fmt: Dict[str, Any]) -> str:
+    """ATS-friendly plain text"""
+    lines = [document.name.upper()]
+    lines += [f"{CONTACT_LABELS[c.kind]}: {c.text}" for c in document.contacts]
+    for section in document.sections:
+        lines += ["", section.title.upper()]
+        if section.text:
+            lines.append(section.text)
+        for number, entry in enumerate(section.entries, 1):
+            if section.key == 'publications':
+                lines.append(f"[{number}] " + ". ".join(filter(None, _publication_parts(entry) + [entry.url])))
+                continue
+            if section.key == 'technical_skills':
+                lines.append(f"{entry.title}: {entry.subtitle}")
+                continue
+            lines.append(_entry_heading(entry))
+            if _entry_details(entry):
+                lines.append(_entry_details(entry))
+            if entry.url:
+                lines.append(entry.url)
+            lines += [f"- {b}" for b in entry.bullets]
+    return "\n".join(lines) + "\n"
+
+
+RENDERERS: Dict[str, Callable[[ResumeDocument, Dict[str, Any]], str]] = {
+    'latex': render_latex,
+    'html': render_html,
+    'markdown': render_markdown,
+    'text': render_text,
+}
+
+FILE_TYPES = {
+    'latex': ('tex', 'text/x-tex'),
+    'html': ('html', 'text/html'),
+    'markdown': ('md', 'text/markdown'),
+    'text': ('txt', 'text/plain'),
+}
+
+
+def render_formats(data: Dict[str, Any], fmt: Dict[str, Any],
+                   formats: Iterable[str] = tuple(RENDERERS)) -> Dict[str, str]:
+    """Render several formats from a single build of the document model"""
+    document = cached_document(data)
+    return {name: RENDERERS[name](document, fmt) for name in formats}
@@ -0,0 +1,161 @@
+"""
+Resume Version History
+Each saved version is a manifest mapping resume sections to content hashes.
+Section contents are stored once per resume as content-addressed blobs, and
+each version document only records the sections that changed since its
+parent, so storage grows with the size of the edits rather than the number
+of saves.
+"""
+
+import difflib
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from firestore_batch import delete_where_in
+
+VERSIONS_COLLECTION = 'resume_versions'
+BLOBS_COLLECTION = 'resume_blobs'
+
+# Formatting options are versioned alongside the resume sections
+FORMATTING_SECTION = 'formatting_options'
+
+
+def canonical_json(value: Any) -> str:
+    """Serialize a value deterministically so equal content hashes equally"""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def content_hash(blob: str) -> str:
+    """Content address of a section blob"""
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def split_sections(resume_data: Dict[str, Any], formatting_options: Dict[str, Any]) -> Dict[str, str]:
+    """Split a resume into independently stored section blobs"""
+    sections = {key: canonical_json(value) for key, value in resume_data.items()}
+    sections[FORMATTING_SECTION] = canonical_json(formatting_options)
+    return sections
+
+
+def make_delta(parent: Dict[str, str], manifest: Dict[str, str]) -> Dict[str, Any]:
+    """Describe how to get from the parent manifest to a new one"""
+    return {
+        'changed': {key: h for key, h in manifest.items() if parent.get(key) != h},
+        'removed': [key for key in parent if key not in manifest]
+    }
+
+
+def apply_delta(parent: Dict[str, str], delta: Dict[str, Any]) -> Dict[str, str]:
+    """Rebuild a manifest from its parent and a delta"""
+    manifest = {key: h for key, h in parent.items() if key not in delta.get('removed', [])}
+    manifest.update(delta.get('changed', {}))
+    return manifest
+
+
+def blob_id(resume_id: str, digest: str) -> str:
+    """Document id of a section blob, scoped to its resume"""
+    return f"{resume_id}_{digest}"
+
+
+def version_id(resume_id: str, version: int) -> str:
+    """Document id of a version record"""
+    return f"{resume_id}_{version:06d}"
+
+
+class ResumeHistory:
+    """Version history for a user's resumes stored in Firestore"""
+
+    def __init__(self, db, user_id: str):
+        self.db = db
+        self.user_id = user_id
+        # digest -> blob, shared by diff and restore within a session
+        self.blob_cache: Dict[str, str] = {}
+
+    def stage_version(self, batch, resume_id: str, resume_data: Dict[str, Any],
+                      formatting_options: Dict[str, Any], head: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Add a new version to a transaction and return the new history head.
+
+        head must have been read in the same transaction; otherwise concurrent
+        saves pick the same version number. Only blobs whose hash is not
+        already in the parent manifest are written.
+        """
+        parent = head['manifest'] if head else {}
+        number = head['version'] + 1 if head else 1
+        sections = split_sections(resume_data, formatting_options)
+        manifest = {key: content_hash(blob) for key, blob in sections.items()}
+        delta = make_delta(parent, manifest)
+
+        for key, digest in delta['changed'].items():
+            batch.set(self.db.collection(BLOBS_COLLECTION).document(blob_id(resume_id, digest)), {
+                'user_id': self.user_id,
+                'resume_id': resume_id,
+                'content': sections[key]
+            })
+            self.blob_cache[digest] = sections[key]
+
+        batch.set(self.db.collection(VERSIONS_COLLECTION).document(version_id(resume_id, number)), {
+            'user_id': self.user_id,
+            'resume_id': resume_id,
+            'version': number,
+            'delta': delta,
+            'created_at': datetime.now()
+        })
+        return {'version': number, 'manifest': manifest}
+
+    def list_versions(self, resume_id: str) -> List[Dict[str, Any]]:
+        """Load all version records of a resume and rebuild their manifests"""
+        docs = self.db.collection(VERSIONS_COLLECTION).where('resume_id', '==', resume_id).stream()
+        records = sorted((doc.to_dict() for doc in docs), key=lambda r: r['version'])
+
+        versions = []
+        manifest: Dict[str, str] = {}
+        for record in records:
+            manifest = apply_delta(manifest, record['delta'])
+            versions.append({
+                'version': record['version'],
+                'created_at': record.get('created_at'),
+                'changed': sorted(record['delta'].get('changed', {})),
+                'manifest': manifest
+            })
+        return versions
+
+    def fetch_blobs(self, resume_id: str, digests: List[str]) -> Dict[str, str]:
+        """Fetch section blobs in one round trip, skipping cached ones"""
+        missing = [d for d in set(digests) if d not in self.blob_cache]
+        if missing:
+            refs = [self.db.collection(BLOBS_COLLECTION).document(blob_id(resume_id, d)) for d in missing]
+            for doc in self.db.get_all(refs):
+                if doc.exists:
+                    data = doc.to_dict()
+                    self.blob_cache[content_hash(data['content'])] = data['content']
+        return {d: self.blob_cache[d] for d in digests if d in self.blob_cache}
+
+    def diff(self, resume_id: str, old: Dict[str, str], new: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Unified diffs of the sections that differ between two manifests"""
+        changed = sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
+        blobs = self.fetch_blobs(resume_id, [m[key] for key in changed for m in (old, new) if key in m])
+
+        def pretty(manifest: Dict[str, str], key: str) -> List[str]:
+            if key not in manifest:
+                return []
+            value = json.loads(blobs[manifest[key]])
+            return json.dumps(value, indent=2, ensure_ascii=False).splitlines()
+
+        return [{
+            'section': key,
+            'diff': "\n".join(difflib.unified_diff(pretty(old, key), pretty(new, key), lineterm='', n=2))
+        } for key in changed]
+
+    def restore(self, resume_id: str, manifest: Dict[str, str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Rebuild resume data and formatting options for a version"""
+        blobs = self.fetch_blobs(resume_id, list(manifest.values()))
+        sections = {key: json.loads(blobs[digest]) for key, digest in manifest.items()}
+        formatting_options = sections.pop(FORMATTING_SECTION, {})
+        return sections, formatting_options
+
+    def delete_histories(self, resume_ids: List[str]):
+        """Delete all versions and blobs belonging to the given resumes"""
+        for collection in (VERSIONS_COLLECTION, BLOBS_COLLECTION):
+            delete_where_in(self.db, collection, 'resume_id', resume_ids)
@@ -0,0 +1,246 @@
+"""
+Resume List Listener
+Keeps each user's resume list current from a Firestore on_snapshot listener
+instead of re-reading the collection on every refresh. Changes arrive as
+deltas and are applied to an in-memory feed. One feed per user is shared by
+all of that user's sessions and stopped when the last session releases it or
+goes idle.
+
+A listener that stops after starting is restarted, and its first snapshot
+replaces the feed so removals missed while it was down are not kept. When a
+listener cannot be started the feed is polled instead and the results are
+diffed into the same deltas. Every change bumps the feed's version, which
+sessions watch to know when to rerun.
+"""
+
+import threading
+import time
+from typing import Dict, List, Any, Callable, Iterable, Optional, Tuple
+
+SUMMARY_FIELDS = ['name', 'description', 'created_at', 'updated_at', 'history_head']
+DEFAULT_POLL_SECONDS = 15.0
+# Sessions that have not rendered for this long stop holding their user's listener
+SESSION_IDLE_SECONDS = 30 * 60
+READY_TIMEOUT = 5.0
+
+# (change type, document id, document data); data is None for removals
+Change = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+def summarize(doc_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Sidebar summary of a resume document"""
+    return {
+        'id': doc_id,
+        'name': data.get('name', 'Untitled'),
+        'description': data.get('description', ''),
+        'created_at': data.get('created_at'),
+        'updated_at': data.get('updated_at'),
+        'history_head': data.get('history_head')
+    }
+
+
+class ResumeListFeed:
+    """Resume summaries for one user, maintained from change deltas"""
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.lock = threading.Lock()
+        self.resumes: Dict[str, Dict[str, Any]] = {}
+        self.ready = threading.Event()
+        self.error: Optional[str] = None
+        self.stop: Callable[[], None] = lambda: None
+        # Bumped whenever the list or error changes
+        self.version = 0
+
+    def apply(self, changes: Iterable[Change]):
+        with self.lock:
+            changed = self.error is not None
+            for kind, doc_id, data in changes:
+                if kind == 'REMOVED' or data is None:
+                    changed = self.resumes.pop(doc_id, None) is not None or changed
+                else:
+                    summary = summarize(doc_id, data)
+                    if self.resumes.get(doc_id) != summary:
+                        self.resumes[doc_id] = summary
+                        changed = True
+            self.error = None
+            if changed:
+                self.version += 1
+        self.ready.set()
+
+    def replace(self, docs: Dict[str, Dict[str, Any]]):
+        """Make the feed match a full listing"""
+        with self.lock:
+            removed = [doc_id for doc_id in self.resumes if doc_id not in docs]
+        self.apply([('REMOVED', doc_id, None) for doc_id in removed] +
+                   [('MODIFIED', doc_id, data) for doc_id, data in docs.items()])
+
+    def fail(self, message: str):
+        with self.lock:
+            if self.error != message:
+                self.error = message
+                self.version += 1
+        self.ready.set()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Current summaries, ordered by name"""
+        with self.lock:
+            return sorted(self.resumes.values(), key=lambda r: (r['name'].lower(), r['id']))
+
+
+def listen_firestore(db, feed: ResumeListFeed):
+    """Start an on_snapshot listener for the user's resumes; returns the watch"""
+    first = [True]
+
+    def on_snapshot(docs, changes, read_time):
+        if first[0]:
+            # The first snapshot lists everything, including after a restart
+            first[0] = False
+            feed.replace({doc.id: doc.to_dict() for doc in docs})
+        else:
+            feed.apply((change.type.name, change.document.id, change.document.to_dict()) for change in changes)
+
+    return db.collection('resumes').where('user_id', '==', feed.user_id).on_snapshot(on_snapshot)
+
+
+def supervise_firestore(db, feed: ResumeListFeed, interval: float = DEFAULT_POLL_SECONDS) -> Callable[[], None]:
+    """Keep a listener running for the feed, restarting it when it stops.
+
+    Falls back to polling when a listener cannot be started. Raises if the
+    first listener fails to start so the caller can poll instead.
+    """
+    stopped = threading.Event()
+    lock = threading.Lock()
+    watch = listen_firestore(db, feed)
+    fallback: List[Callable[[], None]] = []
+
+    def run():
+        current = watch
+        while not stopped.wait(interval):
+            if getattr(current, 'is_active', True):
+                continue
+            feed.fail("Resume list listener stopped; reconnecting")
+            try:
+                current.unsubscribe()
+            except Exception:
+                pass
+            try:
+                current = listen_firestore(db, feed)
+            except Exception:
+                with lock:
+                    if not stopped.is_set():
+                        fallback.append(poll(firestore_fetch(db), feed, interval))
+                return
+        current.unsubscribe()
+
+    def stop():
+        with lock:
+            stopped.set()
+            for stop_poll in fallback:
+                stop_poll()
+
+    threading.Thread(target=run, name=f"resume-listen-{feed.user_id}", daemon=True).start()
+    return stop
+
+
+def poll(fetch: Callable[[str], Dict[str, Dict[str, Any]]], feed: ResumeListFeed,
+         interval: float = DEFAULT_POLL_SECONDS) -> Callable[[], None]:
+    """Poll fetch(user_id) -> {doc id: data} and apply the differences as deltas"""
+    stopped = threading.Event()
+
+    def run():
+        seen: Dict[str, Dict[str, Any]] = {}
+        while not stopped.is_set():
+            try:
+                current = {doc_id: summarize(doc_id, data) for doc_id, data in fetch(feed.user_id).items()}
+                changes: List[Change] = [('REMOVED', doc_id, None) for doc_id in seen if doc_id not in current]
+                changes += [('MODIFIED', doc_id, summary) for doc_id, summary in current.items()
+                            if seen.get(doc_id) != summary]
+                feed.apply(changes)
+                seen = current
+            except Exception as e:
+                feed.fail(f"Failed to load resumes: {str(e)}")
+            stopped.wait(interval)
+
+    threading.Thread(target=run, name=f"resume-poll-{feed.user_id}", daemon=True).start()
+    return stopped.set
+
+
+def firestore_fetch(db) -> Callable[[str], Dict[str, Dict[str, Any]]]:
+    """Polling query that reads only the summary fields"""
+    def fetch(user_id: str) -> Dict[str, Dict[str, Any]]:
+        query = db.collection('resumes').where('user_id', '==', user_id).select(SUMMARY_FIELDS)
+        return {doc.id: doc.to_dict() for doc in query.stream()}
+    return fetch
+
+
+def firestore_starter(db, poll_only: bool = False,
+                      interval: float = DEFAULT_POLL_SECONDS) -> Callable[[ResumeListFeed], Callable[[], None]]:
+    """Start a supervised listener per feed, polling when listeners are disabled or fail to start"""
+    def start(feed: ResumeListFeed) -> Callable[[], None]:
+        if not poll_only:
+            try:
+                return supervise_firestore(db, feed, interval)
+            except Exception:
+                pass
+        return poll(firestore_fetch(db), feed, interval)
+    return start
+
+
+def start_empty(feed: ResumeListFeed) -> Callable[[], None]:
+    """Feed without a backend, for running without Firestore where nothing is saved"""
+    feed.apply([])
+    return lambda: None
+
+
+class ListenerHub:
+    """One feed per user, shared across sessions and held by session leases"""
+
+    def __init__(self, start: Callable[[ResumeListFeed], Callable[[], None]],
+                 idle_seconds: float = SESSION_IDLE_SECONDS):
+        self.start = start
+        self.idle_seconds = idle_seconds
+        self.lock = threading.Lock()
+        self.feeds: Dict[str, ResumeListFeed] = {}
+        # user id -> session key -> last time that session rendered
+        self.leases: Dict[str, Dict[str, float]] = {}
+
+    def acquire(self, user_id: str, session_key: str) -> ResumeListFeed:
+        """Feed for a user, starting its listener if this is the first session"""
+        with self.lock:
+            self._reap()
+            self.leases.setdefault(user_id, {})[session_key] = time.monotonic()
+            feed = self.feeds.get(user_id)
+            if feed is None:
+                feed = self.feeds[user_id] = ResumeListFeed(user_id)
+                try:
+                    feed.stop = self.start(feed)
+                except Exception as e:
+                    feed.fail(f"Failed to start resume listener: {str(e)}")
+        return feed
+
+    def release(self, user_id: str, session_key: str):
+        """Drop a session's lease and stop the listener when none remain"""
+        with self.lock:
+            self.leases.get(user_id, {}).pop(session_key, None)
+            self._stop_unleased(user_id)
+
+    def _reap(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        for user_id in list(self.leases):
+            sessions = self.leases[user_id]
+            for session_key in [k for k, seen in sessions.items() if seen < cutoff]:
+                del sessions[session_key]
+            self._stop_unleased(user_id)
+
+    def _stop_unleased(self, user_id: str):
+        if self.leases.get(user_id):
+            return
+        self.leases.pop(user_id, None)
+        feed = self.feeds.pop(user_id, None)
+        if feed is not None:
+            feed.stop()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {'listeners': len(self.feeds), 'sessions': sum(len(s) for s in self.leases.values())}
@@ -0,0 +1,186 @@
+"""
+Resume Search Index
+Per-user full-text index over saved resumes. The extracted text of each saved
+resume is stored in its own document, search_indexes/{user_id}/entries/{resume_id},
+so no single document grows with the size of an account. A search loads the
+user's entries once and is answered in memory afterwards.
+
+Lines are stored as one JSON string so Firestore does not create an index
+entry for every line.
+"""
+
+import json
+import re
+from typing import Dict, List, Any, Iterable, Iterator, Tuple
+
+INDEX_COLLECTION = 'search_indexes'
+ENTRIES_COLLECTION = 'entries'
+# Firestore documents are limited to 1 MiB; leave room for the other fields
+MAX_ENTRY_BYTES = 900 * 1024
+
+# Keys that hold layout or import metadata rather than resume content
+SKIPPED_KEYS = {'section_order', 'cite_key', 'entry_type'}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+SNIPPET_WIDTH = 120
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def extract_lines(resume_data: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Flatten resume data into searchable lines tagged with their section"""
+    def walk(value: Any, section: str) -> Iterator[Tuple[str, str]]:
+        if isinstance(value, str):
+            if value.strip():
+                yield section, value.strip()
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if key not in SKIPPED_KEYS:
+                    yield from walk(item, section or key)
+        elif isinstance(value, list):
+            for item in value:
+                yield from walk(item, section)
+
+    return [{'section': section, 'text': text} for section, text in walk(resume_data, '')]
+
+
+def build_index_entry(name: str, resume_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the index entry for a single resume"""
+    return {'name': name, 'lines': extract_lines(resume_data)}
+
+
+def encode_entry(user_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored form of an index entry, truncated to fit in one document"""
+    lines = entry['lines']
+    encoded = json.dumps(lines, ensure_ascii=False, separators=(',', ':'))
+    while len(encoded.encode('utf-8')) > MAX_ENTRY_BYTES and lines:
+        lines = lines[:len(lines) * 3 // 4]
+        encoded = json.dumps(lines, ensure_ascii=False, separators=(',', ':'))
+    return {'user_id': user_id, 'name': entry['name'], 'lines_json': encoded}
+
+
+def decode_entry(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {'name': data.get('name', ''), 'lines': json.loads(data.get('lines_json') or '[]')}
+
+
+def entry_ref(db, user_id: str, resume_id: str):
+    """Document holding one resume's index entry"""
+    return db.collection(INDEX_COLLECTION).document(user_id).collection(ENTRIES_COLLECTION).document(resume_id)
+
+
+def load_entries(db, user_id: str) -> Dict[str, Dict[str, Any]]:
+    """All of a user's index entries keyed by resume id"""
+    entries = db.collection(INDEX_COLLECTION).document(user_id).collection(ENTRIES_COLLECTION).stream()
+    return {doc.id: decode_entry(doc.to_dict() or {}) for doc in entries}
+
+
+def unindexed(resume_ids: Iterable[str], entries: Dict[str, Any]) -> List[str]:
+    """Resumes saved before they were indexed, for backfilling"""
+    return [resume_id for resume_id in resume_ids if resume_id not in entries]
+
+
+def make_snippet(text: str, tokens: List[str]) -> str:
+    """Cut a window of text around the first matching token"""
+    if len(text) <= SNIPPET_WIDTH:
+        return text
+    lowered = text.lower()
+    positions = [lowered.find(token) for token in tokens if lowered.find(token) >= 0]
+    start = max(0, min(positions) - SNIPPET_WIDTH // 3) if positions else 0
+    end = start + SNIPPET_WIDTH
+    snippet = text[start:end].strip()
+    if start > 0:
+        snippet = "…" + snippet
+    if end < len(text):
+        snippet += "…"
+    return snippet
+
+
+class ResumeSearchIndex:
+    """In-memory inverted index from tokens to resume lines"""
+
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # token -> resume_id -> line numbers containing the token
+        self.postings: Dict[str, Dict[str, set]] = {}
+
+    @classmethod
+    def from_entries(cls, entries: Dict[str, Dict[str, Any]]) -> 'ResumeSearchIndex':
+        """Build an index from stored entries keyed by resume id"""
+        index = cls()
+        for resume_id, entry in entries.items():
+            index.add(resume_id, entry)
+        return index
+
+    def add(self, resume_id: str, entry: Dict[str, Any]):
+        """Index a resume, replacing any previous entry with the same id"""
+        self.remove(resume_id)
+        self.entries[resume_id] = entry
+        lines = [{'section': 'name', 'text': entry.get('name', '')}] + entry.get('lines', [])
+        for line_no, line in enumerate(lines):
+            for token in tokenize(line.get('text', '')):
+                self.postings.setdefault(token, {}).setdefault(resume_id, set()).add(line_no)
+
+    def remove(self, resume_id: str):
+        """Drop a resume from the index"""
+        entry = self.entries.pop(resume_id, None)
+        if entry is None:
+            return
+        lines = [{'text': entry.get('name', '')}] + entry.get('lines', [])
+        for line in lines:
+            for token in tokenize(line.get('text', '')):
+                matches = self.postings.get(token)
+                if matches is None:
+                    continue
+                matches.pop(resume_id, None)
+                if not matches:
+                    del self.postings[token]
+
+    def _lookup(self, token: str, prefix: bool) -> Dict[str, set]:
+        """Collect line matches for a token, optionally as a prefix"""
+        if not prefix:
+            return self.postings.get(token, {})
+        merged: Dict[str, set] = {}
+        for candidate, matches in self.postings.items():
+            if candidate.startswith(token):
+                for resume_id, line_nos in matches.items():
+                    merged.setdefault(resume_id, set()).update(line_nos)
+        return merged
+
+    def search(self, query: str, limit: int = 10, snippets_per_resume: int = 3) -> List[Dict[str, Any]]:
+        """Return resumes containing every query term, with matching snippets.
+
+        The last term is matched as a prefix so results update while typing.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        per_token = [self._lookup(token, prefix=(i == len(tokens) - 1)) for i, token in enumerate(tokens)]
+        candidates = set(per_token[0])
+        for matches in per_token[1:]:
+            candidates &= set(matches)
+
+        results = []
+        for resume_id in candidates:
+            entry = self.entries[resume_id]
+            lines = [{'section': 'name', 'text': entry.get('name', '')}] + entry.get('lines', [])
+            hits: Dict[int, int] = {}
+            for matches in per_token:
+                for line_no in matches[resume_id]:
+                    hits[line_no] = hits.get(line_no, 0) + 1
+            best_lines = sorted(hits, key=lambda n: (-hits[n], n))[:snippets_per_resume]
+            results.append({
+                'id': resume_id,
+                'name': entry.get('name', 'Untitled'),
+                'score': sum(hits.values()),
+                'snippets': [
+                    {'section': lines[n]['section'], 'text': make_snippet(lines[n]['text'], tokens)}
+                    for n in best_lines
+                ]
+            })
+
+        results.sort(key=lambda r: (-r['score'], r['name']))
+        return results[:limit]
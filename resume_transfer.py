@@ -0,0 +1,253 @@
+"""
+Bulk Resume Export / Import
+Streams resumes out of Firestore page by page into a ZIP or NDJSON archive,
+and streams archives back in with batched writes. Only one resume is held in
+memory at a time, so accounts with thousands of resumes export in constant
+memory.
+
+Admin usage (uses Application Default Credentials):
+    python resume_transfer.py export --out resumes.zip [--user UID] [--pdf]
+    python resume_transfer.py import --user UID --in resumes.zip
+"""
+
+import argparse
+import base64
+import io
+import json
+import re
+import zipfile
+from datetime import datetime
+from typing import Dict, List, Any, BinaryIO, Callable, Iterator, Optional
+
+from latex_renderer import generate_latex, compile_latex, validate_formatting_options, LatexCompileError
+from resume_document import resume_shape_problem
+from resume_search import build_index_entry, encode_entry, entry_ref
+from firestore_batch import batch_write
+
+PAGE_SIZE = 100
+
+# Fields copied from stored documents into archive records
+RECORD_FIELDS = ('name', 'description', 'resume_data', 'formatting_options', 'created_at', 'updated_at')
+
+
+def _json_default(value: Any) -> str:
+    """Serialize Firestore timestamps as ISO 8601"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _parse_datetime(value: Any) -> datetime:
+    """Read back an ISO 8601 timestamp, falling back to now"""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.now()
+
+
+def _safe_name(name: str) -> str:
+    """Turn a resume name into a portable archive path component"""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('_') or 'resume'
+
+
+def checked_record(resume_data: Any, formatting_options: Any) -> Dict[str, Any]:
+    """Formatting options merged over the defaults, once the record is known to be renderable.
+
+    Archives are user input and their options end up in the LaTeX preamble,
+    so anything the app itself could not have produced raises ValueError.
+    """
+    if not isinstance(resume_data, dict):
+        raise ValueError("resume_data must be an object")
+    problem = resume_shape_problem(resume_data)
+    if problem:
+        raise ValueError(problem)
+    if not isinstance(formatting_options, dict):
+        raise ValueError("formatting_options must be an object")
+    return validate_formatting_options(formatting_options)
+
+
+def iter_resume_docs(db, user_id: Optional[str] = None, page_size: int = PAGE_SIZE) -> Iterator[Any]:
+    """Yield resume snapshots page by page, ordered by document id.
+
+    With no user_id every user's resumes are exported (admin export).
+    """
+    from firebase_admin import firestore
+
+    query = db.collection('resumes')
+    if user_id:
+        query = query.where('user_id', '==', user_id)
+    query = query.order_by(firestore.FieldPath.document_id()).limit(page_size)
+
+    last = None
+    while True:
+        page = list((query.start_after(last) if last else query).stream())
+        yield from page
+        if len(page) < page_size:
+            return
+        last = page[-1]
+
+
+def to_record(doc_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Archive record for one stored resume"""
+    record = {'id': doc_id}
+    record.update({field: data.get(field) for field in RECORD_FIELDS})
+    return record
+
+
+def export_archive(docs: Iterator[Any], out: BinaryIO, archive_format: str = 'zip',
+                   include_tex: bool = True, include_pdf: bool = False,
+                   compile_fn: Callable[[str], bytes] = compile_latex) -> Dict[str, int]:
+    """Write resume snapshots into an archive incrementally.
+
+    ZIP archives hold a folder per resume with resume.json and optionally
+    resume.tex and resume.pdf. NDJSON archives hold one JSON record per line,
+    with the PDF base64 encoded when requested.
+    """
+    stats = {'exported': 0, 'pdf_failed': 0, 'invalid': 0}
+    zf = zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) if archive_format == 'zip' else None
+    text_out = None if zf else io.TextIOWrapper(out, encoding='utf-8', write_through=True)
+
+    try:
+        for doc in docs:
+            record = to_record(doc.id, doc.to_dict())
+            tex = pdf = None
+            if (include_tex or include_pdf) and record['resume_data']:
+                try:
+                    formatting_options = checked_record(record['resume_data'], record['formatting_options'] or {})
+                except ValueError:
+                    # Still exported, so the data is not lost, but reported instead of rendered
+                    stats['invalid'] += 1
+                else:
+                    tex = generate_latex(record['resume_data'], formatting_options)
+            if tex is not None:
+                if include_pdf:
+                    try:
+                        pdf = compile_fn(tex)
+                    except LatexCompileError:
+                        stats['pdf_failed'] += 1
+
+            if zf:
+                folder = f"{_safe_name(record['name'] or 'resume')}-{doc.id}"
+                zf.writestr(f"{folder}/resume.json", json.dumps(record, default=_json_default, indent=2))
+                if include_tex and tex:
+                    zf.writestr(f"{folder}/resume.tex", tex)
+                if pdf:
+                    zf.writestr(f"{folder}/resume.pdf", pdf)
+            else:
+                if include_tex and tex:
+                    record['tex'] = tex
+                if pdf:
+                    record['pdf_base64'] = base64.b64encode(pdf).decode('ascii')
+                text_out.write(json.dumps(record, default=_json_default) + "\n")
+            stats['exported'] += 1
+    finally:
+        if zf:
+            zf.close()
+        elif text_out:
+            text_out.detach()
+    return stats
+
+
+def iter_archive_records(archive: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield resume records from a ZIP or NDJSON archive one at a time"""
+    if zipfile.is_zipfile(archive):
+        archive.seek(0)
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if info.filename.endswith('/resume.json') or info.filename == 'resume.json':
+                    with zf.open(info) as f:
+                        yield json.load(f)
+        return
+
+    archive.seek(0)
+    for line in io.TextIOWrapper(archive, encoding='utf-8'):
+        if line.strip():
+            yield json.loads(line)
+
+
+def import_archive(db, user_id: str, archive: BinaryIO) -> Dict[str, int]:
+    """Create new resumes for the user from an archive using batched writes.
+
+    Imported resumes get fresh document ids and their search index entries
+    are written in the same commit that creates them.
+    """
+    stats = {'imported': 0, 'skipped': 0, 'invalid': 0, 'failed': 0}
+
+    def prepared() -> Iterator[Dict[str, Any]]:
+        for record in iter_archive_records(archive):
+            if not isinstance(record, dict) or not record.get('resume_data'):
+                stats['skipped'] += 1
+                continue
+            try:
+                formatting_options = checked_record(record['resume_data'], record.get('formatting_options') or {})
+            except ValueError:
+                stats['invalid'] += 1
+                continue
+            name = record.get('name') or 'Imported resume'
+            yield {
+                'ref': db.collection('resumes').document(),
+                'data': {
+                    'name': name,
+                    'description': record.get('description') or '',
+                    'user_id': user_id,
+                    'resume_data': record['resume_data'],
+                    'formatting_options': formatting_options,
+                    'created_at': _parse_datetime(record.get('created_at')),
+                    'updated_at': datetime.now()
+                },
+                'index_entry': encode_entry(user_id, build_index_entry(name, record['resume_data']))
+            }
+
+    def writes_for(item: Dict[str, Any]) -> List[tuple]:
+        return [('set', item['ref'], item['data']),
+                ('set', entry_ref(db, user_id, item['ref'].id), item['index_entry'])]
+
+    outcomes = batch_write(db, prepared(), writes_for, item_id=lambda item: item['ref'].id)
+    for outcome in outcomes:
+        stats['imported' if outcome['ok'] else 'failed'] += 1
+    return stats
+
+
+def main():
+    """Command-line entry point for admin exports and imports"""
+    import firebase_admin
+    from firebase_admin import firestore
+
+    parser = argparse.ArgumentParser(description="Bulk export or import saved resumes")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export_cmd = sub.add_parser('export', help="Export resumes to an archive")
+    export_cmd.add_argument('--out', required=True, help="Output .zip or .ndjson file")
+    export_cmd.add_argument('--user', help="Only export this user's resumes")
+    export_cmd.add_argument('--pdf', action='store_true', help="Compile and include PDFs")
+    export_cmd.add_argument('--no-tex', action='store_true', help="Skip .tex sources")
+
+    import_cmd = sub.add_parser('import', help="Import resumes from an archive")
+    import_cmd.add_argument('--in', dest='archive', required=True, help="Input .zip or .ndjson file")
+    import_cmd.add_argument('--user', required=True, help="Owner of the imported resumes")
+
+    args = parser.parse_args()
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app()
+    db = firestore.client()
+
+    if args.command == 'export':
+        archive_format = 'ndjson' if args.out.endswith('.ndjson') else 'zip'
+        with open(args.out, 'wb') as out:
+            stats = export_archive(iter_resume_docs(db, args.user), out, archive_format,
+                                   include_tex=not args.no_tex, include_pdf=args.pdf)
+        print(f"✅ Exported {stats['exported']} resumes to {args.out}")
+        if stats['invalid']:
+            print(f"⚠️  {stats['invalid']} resumes have invalid formatting options and were exported without .tex or PDF")
+        if stats['pdf_failed']:
+            print(f"⚠️  {stats['pdf_failed']} PDFs failed to compile")
+    else:
+        with open(args.archive, 'rb') as archive:
+            stats = import_archive(db, args.user, archive)
+        print(f"✅ Imported {stats['imported']} resumes ({stats['skipped']} skipped, {stats['invalid']} invalid, "
+              f"{stats['failed']} failed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Write-behind queue: give-up records and replay after a restart.
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import write_behind
+from write_behind import WriteBehindQueue, WriteFailed
+
+
+class Writer:
+    """apply_fn double that records flushes and fails as configured"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.applied = []
+        self.calls = threading.Event()
+
+    def __call__(self, ops):
+        self.calls.set()
+        if self.error is not None:
+            raise self.error
+        self.applied.extend(ops)
+
+
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(write_behind, 'FLUSH_DELAY', 0.0)
+    monkeypatch.setattr(write_behind, 'BACKOFF_BASE', 0.0)
+    monkeypatch.setattr(write_behind, 'MAX_ATTEMPTS', 2)
+
+
+def test_given_up_save_is_not_replayed_with_its_superseded_versions(tmp_path, monkeypatch):
+    fast_retries(monkeypatch)
+    # Both saves arrive within the flush delay, so they coalesce into one op
+    monkeypatch.setattr(write_behind, 'FLUSH_DELAY', 0.2)
+    writer = Writer(WriteFailed("rejected", retryable=False))
+    queue = WriteBehindQueue(str(tmp_path), writer)
+    queue.enqueue('save', 'u1', 'r1', {'name': 'v1'})
+    queue.enqueue('save', 'u1', 'r1', {'name': 'v2'})
+    assert queue.flush(timeout=5.0)
+    assert queue.status('u1')['failed'] == {'r1': "rejected"}
+    queue.close(timeout=1.0)
+
+    replayed = Writer()
+    restarted = WriteBehindQueue(str(tmp_path), replayed)
+    assert not restarted.pending
+    assert restarted.status('u1')['failed'] == {'r1': "rejected"}
+    restarted.close(timeout=1.0)
+    assert replayed.applied == []
+
+
+def test_retryable_failures_stay_queued_and_replay_after_restart(tmp_path, monkeypatch):
+    fast_retries(monkeypatch)
+    writer = Writer(WriteFailed("unavailable", retryable=True))
+    queue = WriteBehindQueue(str(tmp_path), writer)
+    queue.enqueue('delete', 'u1', 'r1')
+    assert writer.calls.wait(5.0)
+    assert not queue.flush(timeout=0.5)
+    assert queue.status('u1') == {'pending': 1, 'failed': {}}
+    # Simulate a crash: the log is left as it is
+    queue.log.close()
+
+    replayed = Writer()
+    restarted = WriteBehindQueue(str(tmp_path), replayed)
+    assert restarted.flush(timeout=5.0)
+    restarted.close(timeout=1.0)
+    assert [(op['op'], op['resume_id']) for op in replayed.applied] == [('delete', 'r1')]
+
+
+
+def test_failing_resume_backs_off_without_holding_back_others(tmp_path, monkeypatch):
+    fast_retries(monkeypatch)
+    monkeypatch.setattr(write_behind, 'FLUSH_DELAY', 0.2)
+    monkeypatch.setattr(write_behind, 'BACKOFF_BASE', 60.0)
+
+    def writer(ops):
+        if any(op['resume_id'] == 'bad' for op in ops):
+            raise WriteFailed("rejected", retryable=False)
+        applied.extend(op['resume_id'] for op in ops)
+
+    applied = []
+    queue = WriteBehindQueue(str(tmp_path), writer)
+    queue.enqueue('save', 'u1', 'bad', {'name': 'bad'})
+    good = queue.enqueue('save', 'u2', 'good', {'name': 'good'})
+    assert queue.flush(timeout=5.0, user_id='u2', resume_ids=['good'])
+    # Sharing a batch with the failing write does not count against the good one
+    assert good not in queue.attempts
+
+    queue.enqueue('save', 'u2', 'later', {'name': 'later'})
+    assert queue.flush(timeout=5.0, user_id='u2', resume_ids=['later'])
+    assert applied == ['good', 'later']
+    assert queue.status('u1') == {'pending': 1, 'failed': {}}
+    queue.close(timeout=0.0)
@@ -0,0 +1,253 @@
+"""
+TeX Environment Probe
+Records which pdflatex is installed, its version and which of the packages
+the templates load are available, so the app can tell before compiling that
+a PDF cannot be built. Probing spawns pdflatex and kpsewhich, so the result
+is cached on disk and reused until the toolchain changes: the pdflatex binary
+or one of TeX's file databases (ls-R) is replaced, or the probe gets old.
+
+The cache can miss installs that do not touch ls-R (packages in TEXMFHOME)
+and cannot know about MiKTeX's on-demand installs, so files it reports as
+missing are looked up again before the user is warned, and a miss is only
+ever a warning: the compile is still attempted.
+
+Also compares compile times of the package profiles.
+
+Usage:
+    python tex_env.py probe [--refresh]
+    python tex_env.py benchmark --runs 5
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Any, Optional
+
+from latex_renderer import PACKAGE_PROFILES, DEFAULT_FORMATTING_OPTIONS, generate_latex, compile_latex
+
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), 'latex-resume-builder-texenv.json')
+# Re-probe at least this often, for installations without ls-R databases
+PROBE_MAX_AGE = 24 * 3600
+# How often a running app re-checks the toolchain fingerprint
+CHECK_INTERVAL = 60.0
+PROBE_TIMEOUT = 30
+
+# Files every template needs in addition to its profile's packages
+BASE_FILES = ['article.cls', 'geometry.sty']
+
+
+def profile_files(profile: str) -> List[str]:
+    settings = PACKAGE_PROFILES[profile]
+    files = BASE_FILES + [f"{name}.sty" for name in settings['packages']]
+    return (files + ['glyphtounicode.tex']) if settings['glyph_to_unicode'] else files
+
+
+PROBED_FILES = sorted({name for profile in PACKAGE_PROFILES for name in profile_files(profile)})
+
+USEPACKAGE_RE = re.compile(r'\\usepackage\s*(?:\[[^\]]*\])?\s*\{([^}]*)\}')
+INPUT_RE = re.compile(r'\\input\s*\{([^}]*)\}')
+DOCUMENTCLASS_RE = re.compile(r'\\documentclass\s*(?:\[[^\]]*\])?\s*\{([^}]*)\}')
+
+
+def required_files(latex: str) -> List[str]:
+    """Class, package and input files a document loads"""
+    files = [f"{name.strip()}.cls" for name in DOCUMENTCLASS_RE.findall(latex)]
+    for names in USEPACKAGE_RE.findall(latex):
+        files += [f"{name.strip()}.sty" for name in names.split(',') if name.strip()]
+    for name in INPUT_RE.findall(latex):
+        name = name.strip()
+        files.append(name if os.path.splitext(name)[1] else f"{name}.tex")
+    return files
+
+
+def _stat(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def toolchain_fingerprint(databases: List[str]) -> Dict[str, Any]:
+    """Cheap identity of the installed toolchain; only stats files"""
+    pdflatex = shutil.which('pdflatex')
+    return {
+        'pdflatex': pdflatex,
+        'binary': _stat(os.path.realpath(pdflatex)) if pdflatex else None,
+        'databases': {path: _stat(path) for path in databases},
+    }
+
+
+def _run(args: List[str]) -> str:
+    try:
+        result = subprocess.run(args, capture_output=True, text=True, timeout=PROBE_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    return result.stdout
+
+
+@dataclass
+class TexEnvironment:
+    pdflatex: Optional[str]
+    version: str = ""
+    # file name -> whether kpsewhich can find it
+    files: Dict[str, bool] = field(default_factory=dict)
+    databases: List[str] = field(default_factory=list)
+    fingerprint: Dict[str, Any] = field(default_factory=dict)
+    probed_at: float = 0.0
+
+    def missing(self, latex: str) -> List[str]:
+        """Files the document needs that are known to be missing"""
+        return [name for name in required_files(latex) if self.files.get(name) is False]
+
+    def profile_missing(self, profile: str) -> List[str]:
+        """Missing files among those a package profile loads"""
+        return [name for name in profile_files(profile) if self.files.get(name) is False]
+
+
+def probe() -> TexEnvironment:
+    """Ask the toolchain for its version and which template files it can find"""
+    pdflatex = shutil.which('pdflatex')
+    if pdflatex is None:
+        return TexEnvironment(None, fingerprint=toolchain_fingerprint([]), probed_at=time.time())
+
+    version = (_run([pdflatex, '--version']).splitlines() or [""])[0].strip()
+    kpsewhich = shutil.which('kpsewhich')
+    files, databases = {}, []
+    if kpsewhich:
+        found = {os.path.basename(path) for path in _run([kpsewhich] + PROBED_FILES).splitlines() if path.strip()}
+        files = {name: name in found for name in PROBED_FILES}
+        databases = [path for path in _run([kpsewhich, '--all', 'ls-R']).splitlines() if path.strip()]
+    return TexEnvironment(pdflatex, version, files, databases, toolchain_fingerprint(databases), time.time())
+
+
+def find_missing(names: List[str]) -> List[str]:
+    """Look the given files up directly, bypassing the probe cache"""
+    kpsewhich = shutil.which('kpsewhich')
+    if not kpsewhich or not names:
+        return list(names)
+    found = {os.path.basename(path) for path in _run([kpsewhich] + names).splitlines() if path.strip()}
+    return [name for name in names if name not in found]
+
+
+def load_environment(cache_path: str = DEFAULT_CACHE_PATH, refresh: bool = False) -> TexEnvironment:
+    """Cached probe result, re-probing when the toolchain fingerprint changed"""
+    if not refresh:
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                env = TexEnvironment(**json.load(f))
+            if (time.time() - env.probed_at < PROBE_MAX_AGE
+                    and toolchain_fingerprint(env.databases) == env.fingerprint):
+                return env
+        except (OSError, ValueError, TypeError):
+            pass
+
+    env = probe()
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(asdict(env), f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # An unwritable cache only costs a probe per process
+        pass
+    return env
+
+
+class TexEnvironmentCache:
+    """Probe result for a long-running process, re-validated every CHECK_INTERVAL"""
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH):
+        self.cache_path = cache_path
+        self.lock = threading.Lock()
+        self.env: Optional[TexEnvironment] = None
+        self.checked = 0.0
+
+    def get(self) -> TexEnvironment:
+        with self.lock:
+            now = time.monotonic()
+            if self.env is None or now - self.checked > CHECK_INTERVAL:
+                self.env = load_environment(self.cache_path)
+                self.checked = now
+            return self.env
+
+    def refresh(self) -> TexEnvironment:
+        """Probe again now, replacing the cached result"""
+        with self.lock:
+            self.env = load_environment(self.cache_path, refresh=True)
+            self.checked = time.monotonic()
+            return self.env
+
+    def confirm_missing(self, names: List[str]) -> List[str]:
+        """Which of the files the probe reported missing really are; re-probes if any turned up"""
+        missing = find_missing(names)
+        if len(missing) < len(names):
+            self.refresh()
+        return missing
+
+
+def benchmark_profiles(data: Dict[str, Any], runs: int = 5) -> Dict[str, Dict[str, float]]:
+    """Compile the same resume with each package profile; timings in milliseconds.
+
+    One untimed compile per profile warms the filesystem cache first, and
+    profiles are interleaved so background load affects them equally.
+    """
+    sources = {name: generate_latex(data, {**DEFAULT_FORMATTING_OPTIONS, 'package_profile': name})
+               for name in PACKAGE_PROFILES}
+    timings: Dict[str, List[float]] = {name: [] for name in sources}
+    for run in range(runs + 1):
+        for name, latex in sources.items():
+            started = time.perf_counter()
+            compile_latex(latex)
+            if run:
+                timings[name].append((time.perf_counter() - started) * 1000)
+    return {name: {'median_ms': round(statistics.median(values), 1), 'min_ms': round(min(values), 1)}
+            for name, values in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TeX toolchain probe and package profile benchmark")
+    parser.add_argument('command', choices=['probe', 'benchmark'])
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help="Probe cache file")
+    parser.add_argument('--refresh', action='store_true', help="Probe again even if the cache is current")
+    parser.add_argument('--runs', type=int, default=5, help="Timed compiles per profile")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable output")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    env = load_environment(args.cache, args.refresh)
+    if args.command == 'probe':
+        if args.json:
+            print(json.dumps(asdict(env), indent=2))
+            return
+        print(f"pdflatex: {env.pdflatex or 'not found'} {env.version}")
+        for name, available in env.files.items():
+            print(f"  {'✅' if available else '❌'} {name}")
+        print(f"Loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return
+
+    if env.pdflatex is None:
+        parser.error("pdflatex not found. Please install TeX Live or MiKTeX")
+    from loadtest import SAMPLE_RESUME
+    results = benchmark_profiles(SAMPLE_RESUME, args.runs)
+    if args.json:
+        print(json.dumps({'pdflatex': env.version, 'runs': args.runs, 'profiles': results}, indent=2))
+        return
+    # Savings depend on the installation, so report which one was measured
+    print(f"{env.version} ({args.runs} timed runs per profile)")
+    for name, result in results.items():
+        print(f"{name:>6}: median {result['median_ms']:.0f} ms, best {result['min_ms']:.0f} ms")
+    full, lean = results['full']['median_ms'], results['lean']['median_ms']
+    print(f"lean saves {full - lean:.0f} ms per compile ({(full - lean) / full:.0%})")
+
+
+if __name__ == "__main__":
+    main()
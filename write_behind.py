@@ -0,0 +1,344 @@
+"""
+Write-Behind Queue
+Saves and deletes are acknowledged as soon as they are appended to a local
+append-only log, then applied to Firestore from a background thread.
+
+Operations waiting in the queue are coalesced per resume, so a burst of saves
+becomes one write of the latest content, and operations on the same resume
+are applied in the order they were made. When a flush fails its operations
+are retried one at a time, and only the resumes whose own write failed back
+off exponentially; the other resumes keep flushing. Only writes that Firestore
+keeps rejecting are given up on; while it is unreachable they stay queued.
+Unacknowledged operations are replayed from the log when the process restarts.
+
+Bulk deletes go through the queue as well, so a save queued earlier cannot
+land after the delete and bring the resume back.
+
+The log must live on a persistent disk: it is the only copy of acknowledged
+writes until they reach Firestore.
+
+Log records, one JSON object per line:
+    {"seq": 7, "op": "save", "user_id": ..., "resume_id": ..., "payload": {...}, "ts": ...}
+    {"ack": [5, 6, 7]}
+    {"failed": [4, 8], "error": "..."}
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from firestore_batch import MAX_BATCH_WRITES, RETRYABLE_ERRORS, delete_resumes, with_retry
+from resume_history import ResumeHistory
+from resume_search import build_index_entry, encode_entry, entry_ref
+
+LOG_NAME = 'writes.log'
+# Wait this long after a write before flushing so bursts coalesce
+FLUSH_DELAY = 0.5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+# Attempts before an operation that keeps failing with a non-transient error is dropped;
+# outages and timeouts are retried for as long as they last
+MAX_ATTEMPTS = 8
+MAX_FLUSH_OPS = 100
+# Rewrite the log without settled records once it grows past this size
+COMPACT_BYTES = 4 * 1024 * 1024
+
+
+class WriteFailed(Exception):
+    """Raised by apply functions when Firestore did not take a write"""
+
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an operation should stay queued instead of counting an attempt"""
+    return isinstance(error, RETRYABLE_ERRORS) or getattr(error, 'retryable', False)
+
+
+class WriteBehindQueue:
+    """Durable local queue of resume writes, flushed by a background thread"""
+
+    def __init__(self, root: str, apply_fn: Callable[[List[Dict[str, Any]]], None]):
+        self.apply_fn = apply_fn
+        self.path = os.path.join(root, LOG_NAME)
+        os.makedirs(root, exist_ok=True)
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        # seq -> operation, in seq order
+        self.pending: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self.failed: Dict[Tuple[str, str], str] = {}
+        self.attempts: Dict[int, int] = {}
+        # (user_id, resume_id) -> (consecutive failures, monotonic time of the next retry)
+        self.backoff: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self.next_seq = 1
+        self.closed = False
+        self._replay()
+        self.log = open(self.path, 'a', encoding='utf-8')
+        self.thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self.thread.start()
+
+    def _replay(self):
+        """Rebuild pending operations from the log left by an earlier run"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append
+                    continue
+                if 'seq' in record:
+                    self.pending[record['seq']] = record
+                    self.next_seq = max(self.next_seq, record['seq'] + 1)
+                elif 'ack' in record:
+                    for seq in record['ack']:
+                        self.pending.pop(seq, None)
+                elif 'failed' in record:
+                    for seq in record['failed']:
+                        op = self.pending.pop(seq, None)
+                        if op:
+                            self.failed[(op['user_id'], op['resume_id'])] = record['error']
+        self._compact()
+
+    def _compact(self):
+        """Rewrite the log with only the operations still pending"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for op in self.pending.values():
+                f.write(json.dumps(op, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _append(self, record: Dict[str, Any]) -> str:
+        line = json.dumps(record, default=str)
+        self.log.write(line + '\n')
+        self.log.flush()
+        os.fsync(self.log.fileno())
+        return line
+
+    def enqueue(self, op: str, user_id: str, resume_id: str, payload: Optional[Dict[str, Any]] = None) -> int:
+        """Durably record an operation and return its sequence number"""
+        with self.lock:
+            record = {'seq': self.next_seq, 'op': op, 'user_id': user_id, 'resume_id': resume_id,
+                      'payload': payload or {}, 'ts': datetime.now().isoformat()}
+            # Keep the round-tripped copy so later edits to the caller's data cannot leak in
+            self.pending[self.next_seq] = json.loads(self._append(record))
+            self.failed.pop((user_id, resume_id), None)
+            # New content is a new write; retry it without waiting out the old backoff
+            self.backoff.pop((user_id, resume_id), None)
+            self.next_seq += 1
+            self.wakeup.notify()
+            return record['seq']
+
+    def pending_op(self, user_id: str, resume_id: str) -> Optional[Dict[str, Any]]:
+        """Latest unflushed operation for a resume, for reading back local writes"""
+        with self.lock:
+            for op in reversed(self.pending.values()):
+                if op['user_id'] == user_id and op['resume_id'] == resume_id:
+                    return op
+        return None
+
+    def status(self, user_id: str) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'pending': len({op['resume_id'] for op in self.pending.values() if op['user_id'] == user_id}),
+                'failed': {rid: error for (uid, rid), error in self.failed.items() if uid == user_id},
+            }
+
+    def _next_due(self) -> Optional[float]:
+        """Seconds until some pending operation may be flushed, or None if nothing is pending"""
+        if not self.pending:
+            return None
+        now = time.monotonic()
+        keys = {(op['user_id'], op['resume_id']) for op in self.pending.values()}
+        return max(0.0, min(self.backoff.get(key, (0, now))[1] - now for key in keys))
+
+    def _coalesce(self) -> Tuple[List[Dict[str, Any]], Dict[int, List[int]]]:
+        """Latest operation per resume not backing off, and the earlier seqs each one supersedes"""
+        latest: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        superseded: Dict[Tuple[str, str], List[int]] = {}
+        for seq, op in self.pending.items():
+            key = (op['user_id'], op['resume_id'])
+            if key in latest:
+                superseded.setdefault(key, []).append(latest.pop(key)['seq'])
+            latest[key] = op
+        now = time.monotonic()
+        ready = [op for key, op in latest.items() if self.backoff.get(key, (0, now))[1] <= now]
+        ops = sorted(ready, key=lambda op: op['seq'])[:MAX_FLUSH_OPS]
+        covers = {op['seq']: superseded.get((op['user_id'], op['resume_id']), []) + [op['seq']] for op in ops}
+        return ops, covers
+
+    def _settle(self, seqs: List[int], record: Dict[str, Any]):
+        self._append(record)
+        for seq in seqs:
+            self.pending.pop(seq, None)
+            self.attempts.pop(seq, None)
+        if not self.pending and self.log.tell() > COMPACT_BYTES:
+            self.log.close()
+            self._compact()
+            self.log = open(self.path, 'a', encoding='utf-8')
+
+    def _back_off(self, op: Dict[str, Any]):
+        """Delay further flushes of this op's resume"""
+        key = (op['user_id'], op['resume_id'])
+        failures = self.backoff.get(key, (0, 0.0))[0] + 1
+        # The exponent is capped so a long outage cannot overflow the float
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** min(failures - 1, 16)) * random.uniform(0.5, 1.0))
+        self.backoff[key] = (failures, time.monotonic() + delay)
+
+    def _apply(self, ops: List[Dict[str, Any]], covers: Dict[int, List[int]]):
+        """Apply a flush; on failure retry its ops one at a time so only the failing ones back off"""
+        try:
+            self.apply_fn(ops)
+        except Exception as e:
+            if len(ops) > 1:
+                for op in ops:
+                    self._apply([op], covers)
+                return
+            op = ops[0]
+            with self.lock:
+                self._back_off(op)
+                if is_retryable(e):
+                    return
+                self.attempts[op['seq']] = self.attempts.get(op['seq'], 0) + 1
+                if self.attempts[op['seq']] >= MAX_ATTEMPTS:
+                    self.failed[(op['user_id'], op['resume_id'])] = str(e)
+                    self.backoff.pop((op['user_id'], op['resume_id']), None)
+                    # Give up on the superseded seqs too, or a restart would replay them
+                    self._settle(covers[op['seq']], {'failed': covers[op['seq']], 'error': str(e)})
+            return
+
+        settled = [seq for op in ops for seq in covers[op['seq']]]
+        with self.lock:
+            # Operations that arrived during the flush stay pending
+            self._settle(settled, {'ack': settled})
+            for op in ops:
+                self.backoff.pop((op['user_id'], op['resume_id']), None)
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while True:
+                    due = self._next_due()
+                    if due is not None and due <= 0:
+                        break
+                    if self.closed:
+                        # Whatever is still backing off is replayed on the next start
+                        return
+                    # Woken early by new writes
+                    self.wakeup.wait(due)
+            time.sleep(FLUSH_DELAY)
+
+            with self.lock:
+                ops, covers = self._coalesce()
+            if ops:
+                self._apply(ops, covers)
+
+    def flush(self, timeout: float = 30.0, user_id: Optional[str] = None,
+              resume_ids: Optional[List[str]] = None) -> bool:
+        """Wait until nothing is pending, or nothing for the given resumes; True if it drained in time"""
+        keys = {(user_id, rid) for rid in resume_ids} if resume_ids is not None else None
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if not any(keys is None or (op['user_id'], op['resume_id']) in keys
+                           for op in self.pending.values()):
+                    return True
+            time.sleep(0.05)
+        return False
+
+    def close(self, timeout: float = 30.0):
+        self.flush(timeout)
+        with self.lock:
+            self.closed = True
+            self.wakeup.notify()
+        self.thread.join(timeout=1.0)
+        self.log.close()
+
+
+class FirestoreWriter:
+    """Applies coalesced queue operations to Firestore"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def apply(self, ops: List[Dict[str, Any]]):
+        """Apply one flush; raises if any write failed so the queue retries"""
+        saves = [op for op in ops if op['op'] == 'save']
+        if saves:
+            self.apply_saves(saves)
+
+        deletes: Dict[str, List[str]] = {}
+        for op in ops:
+            if op['op'] == 'delete':
+                deletes.setdefault(op['user_id'], []).append(op['resume_id'])
+        for user_id, resume_ids in deletes.items():
+            outcomes = delete_resumes(self.db, user_id, resume_ids)
+            deleted = [o['id'] for o in outcomes if o['ok']]
+            if deleted:
+                ResumeHistory(self.db, user_id).delete_histories(deleted)
+            failures = [o for o in outcomes if not o['ok']]
+            if failures:
+                # Deletes are idempotent, so the ones that went through can be repeated
+                raise WriteFailed(failures[0]['error'], any(o['retryable'] for o in failures))
+
+    def apply_saves(self, saves: List[Dict[str, Any]]):
+        """Write resume documents, history versions and index entries in shared transactions"""
+        chunk, writes = [], 0
+        for op in saves:
+            # Version blobs, the version record, the resume itself and its index entry
+            op_writes = len(op['payload']['resume_data']) + 4
+            if chunk and writes + op_writes > MAX_BATCH_WRITES:
+                self.save_chunk(chunk)
+                chunk, writes = [], 0
+            chunk.append(op)
+            writes += op_writes
+        if chunk:
+            self.save_chunk(chunk)
+
+    def save_chunk(self, saves: List[Dict[str, Any]]):
+        """Stage a chunk of saves in one transaction.
+
+        History heads are read inside the transaction, so two nodes saving the
+        same resume at once get distinct version numbers; the loser retries
+        against the winner's head instead of overwriting its version record.
+        """
+        from firebase_admin import firestore
+
+        @firestore.transactional
+        def save(transaction):
+            refs = [self.db.collection('resumes').document(op['resume_id']) for op in saves]
+            existing = {doc.id: doc.to_dict() or {} for doc in
+                        self.db.get_all(refs, field_paths=['history_head'], transaction=transaction) if doc.exists}
+            for op, ref in zip(saves, refs):
+                payload = op['payload']
+                saved_at = datetime.fromisoformat(op['ts'])
+                head = ResumeHistory(self.db, op['user_id']).stage_version(
+                    transaction, op['resume_id'], payload['resume_data'], payload['formatting_options'],
+                    existing.get(op['resume_id'], {}).get('history_head')
+                )
+                doc = {
+                    'name': payload['name'],
+                    'description': payload.get('description', ''),
+                    'user_id': op['user_id'],
+                    'resume_data': payload['resume_data'],
+                    'formatting_options': payload['formatting_options'],
+                    'history_head': head,
+                    'updated_at': saved_at
+                }
+                if op['resume_id'] not in existing:
+                    doc['created_at'] = saved_at
+                transaction.set(ref, doc, merge=True)
+                transaction.set(entry_ref(self.db, op['user_id'], op['resume_id']),
+                                encode_entry(op['user_id'], build_index_entry(payload['name'], payload['resume_data'])))
+
+        with_retry(lambda: save(self.db.transaction()))